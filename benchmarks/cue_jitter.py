@@ -0,0 +1,88 @@
+import argparse
+import asyncio
+import random
+import threading
+import time
+from cue_runner import Cue, CueScheduler
+from osc_latency import LatencyHistogram
+
+# How late cues fire, measured against their ideal time start + at, for
+#   relative  asyncio.sleep(gap to the previous cue), the obvious loop
+#   absolute  sleeping to each cue's absolute deadline, no spin
+#   spin      CueScheduler: absolute deadline, sleep to a margin, spin the rest
+# with the event loop idle, busy with other coroutines (random 0-4 ms bursts
+# of CPU, like a UI or network callbacks), or sharing the GIL with a CPU-bound
+# thread. Run from the repo root:
+#   python -m benchmarks.cue_jitter --cues 200 --interval 0.02
+
+
+async def relative(cues, fire):
+    previous = 0.0
+    for cue in cues:
+        await asyncio.sleep(cue.at - previous)
+        previous = cue.at
+        fire(cue)
+
+
+def burn(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+async def loop_load(stop):
+    while not stop.is_set():
+        burn(random.uniform(0, 0.004))
+        await asyncio.sleep(0)
+
+
+def thread_load(stop):
+    while not stop.is_set():
+        burn(0.001)
+
+
+async def run(schedule, load, cues):
+    stop = threading.Event()
+    if load == "loop":
+        loader = asyncio.ensure_future(loop_load(stop))
+    elif load == "thread":
+        loader = threading.Thread(target=thread_load, args=(stop,), daemon=True)
+        loader.start()
+
+    lateness = LatencyHistogram()
+    start = time.perf_counter()
+
+    def fire(cue):
+        lateness.record(max(0.0, time.perf_counter() - (start + cue.at)) * 1e6)
+
+    if schedule == "relative":
+        await relative(cues, fire)
+    else:
+        scheduler = CueScheduler() if schedule == "spin" else CueScheduler(min_spin=0.0, max_spin=0.0)
+        await scheduler.run(cues, fire, start=start)
+    drift = time.perf_counter() - (start + cues[-1].at)
+
+    stop.set()
+    if load == "loop":
+        await loader
+    elif load == "thread":
+        loader.join()
+    return lateness, drift
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Cue scheduling jitter under load")
+    parser.add_argument('--cues', type=int, default=200)
+    parser.add_argument('--interval', type=float, default=0.02)
+    args = parser.parse_args()
+
+    cues = [Cue((i + 1) * args.interval, "producer", "say_this", [f"line {i}"]) for i in range(args.cues)]
+    print(f"{args.cues} cues every {args.interval * 1000:.0f} ms, lateness in us")
+    for load in ("idle", "loop", "thread"):
+        for schedule in ("relative", "absolute", "spin"):
+            lateness, drift = await run(schedule, load, cues)
+            print(f"{load:6s} {schedule:8s}  p50 {lateness.percentile(50):7.0f}  p99 {lateness.percentile(99):7.0f}  "
+                  f"max {lateness.max:7.0f}  last cue {drift * 1000:7.1f} ms late")
+
+if __name__ == "__main__":
+    asyncio.run(main())
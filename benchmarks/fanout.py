@@ -0,0 +1,122 @@
+import argparse
+import asyncio
+import socket
+import time
+from osc_fanout import FanOutSender
+from osc_queue import OSCSendQueue
+from osc_sender import OSCSender
+from robot_client import robot_group
+
+# Cost of sending to a group of robots: one client per robot (what N panels,
+# or N OSCServers, would do: every robot encodes and chunks for itself)
+# against one FanOutSender that encodes once and writes the same bytes to
+# every member. Each command is flushed on its own like a button press, or
+# --burst of them are flushed together the way a cue or a busy frame is.
+# "large" is a --large byte /say_this to robots that take /chunk messages.
+# The robots are plain UDP sockets on loopback; the last line sends to a
+# group with one member nobody listens on. Run from the repo root:
+#   python -m benchmarks.fanout --sizes 1 2 4 8 16 32
+
+
+def sinks(count):
+    socks = []
+    for _ in range(count):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(("127.0.0.1", 0))
+        sock.setblocking(False)
+        socks.append(sock)
+    return socks
+
+
+def drain(socks):
+    received = 0
+    for sock in socks:
+        while True:
+            try:
+                sock.recv(65536)
+            except BlockingIOError:
+                break
+            received += 1
+    return received
+
+
+def run(clients, text, count, burst):
+    start = time.perf_counter()
+    for i in range(count):
+        for client in clients:
+            client.send_message("/say_this", [text])
+        if i % burst == burst - 1:
+            for client in clients:
+                client.flush()
+    for client in clients:
+        client.flush()
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def measure(size, text, count, burst, chunking):
+    socks = sinks(size)
+    members = [{'ip_address': "127.0.0.1", 'port': sock.getsockname()[1],
+                'features': ["chunking"] if chunking else []} for sock in socks]
+    separate = [OSCSendQueue(OSCSender(member['ip_address'], member['port'], chunking=chunking))
+                for member in members]
+    fanout = OSCSendQueue(FanOutSender(robot_group(members)['members']))
+    try:
+        results = []
+        for clients in (separate, [fanout]):
+            drain(socks)
+            # a short run first so the encoder caches and socket buffers are warm
+            run(clients, text, 10, burst)
+            drain(socks)
+            results.append(run(clients, text, count, burst))
+        return results
+    finally:
+        for client in separate + [fanout]:
+            client.close()
+        for sock in socks:
+            sock.close()
+
+
+async def unreachable(count):
+    # ICMP port unreachable comes back on the member's own connected socket
+    socks = sinks(2)
+    dead = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    dead.bind(("127.0.0.1", 0))
+    dead_port = dead.getsockname()[1]
+    dead.close()
+    members = [{'ip_address': "127.0.0.1", 'port': sock.getsockname()[1]} for sock in socks]
+    members.append({'ip_address': "127.0.0.1", 'port': dead_port})
+    sender = FanOutSender(members)
+    for i in range(count):
+        sender.send_message("/say_this", [f"line {i}"])
+        await asyncio.sleep(0)
+    stats = sender.stats()
+    sender.close()
+    for sock in socks:
+        sock.close()
+    return stats
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Group fan-out cost against group size")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument('--count', type=int, default=2000, help="commands per measurement")
+    parser.add_argument('--burst', type=int, default=10)
+    parser.add_argument('--large', type=int, default=4000, help="bytes of text in the large command")
+    args = parser.parse_args()
+
+    small = "Good evening and welcome to the show"
+    large = ("All the news that fits. " * (args.large // 24 + 1))[:args.large]
+    print(f"us per command for the whole group, per robot client -> fan-out")
+    print(f"{'robots':>6s} {'flushed':>22s} {'burst of ' + str(args.burst):>22s} {'large, chunked':>22s}")
+    for size in args.sizes:
+        line = f"{size:6d}"
+        for text, burst, chunking in ((small, 1, False), (small, args.burst, False), (large, 1, True)):
+            separate, fanout = measure(size, text, args.count, burst, chunking)
+            line += f" {separate:8.1f} -> {fanout:7.1f} {separate / fanout:4.1f}x"
+        print(line)
+
+    for member, stats in (await unreachable(20)).items():
+        print(f"{member}: {stats['sent']} sent, {stats['errors']} failed")
+
+if __name__ == "__main__":
+    asyncio.run(main())
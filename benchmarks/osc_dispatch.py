@@ -0,0 +1,68 @@
+import argparse
+import logging
+import time
+from pythonosc.dispatcher import Dispatcher
+from osc_chunking import map_chunk_handler
+from osc_latency import map_echo_handler
+from osc_routing import RoutedDispatcher
+from osc_sender import build_datagram
+
+# Per-packet receive cost of the stock Dispatcher with a printing default
+# handler (what the GUIs used to do) against RoutedDispatcher with the
+# queue-backed logger. Run from the repo root; the log goes to stderr, so
+# compare a fast sink with a console that cannot keep up:
+#   python -m benchmarks.osc_dispatch 2>/dev/null
+#   python -m benchmarks.osc_dispatch 2> >(sleep 5; cat >/dev/null)
+
+PACKETS = {
+    'mapped': build_datagram("/send_camera_targets", ["guest_chair", "host_desk", "audience"]),
+    'unmatched': build_datagram("/telemetry/battery", [0.87]),
+}
+
+
+def time_dispatch(dispatcher, datagram, count):
+    # mean and worst per-packet time; the worst case is the UI loop stall
+    worst = 0.0
+    start = time.perf_counter()
+    for _ in range(count):
+        t = time.perf_counter()
+        dispatcher.call_handlers_for_packet(datagram, ("127.0.0.1", 9000))
+        worst = max(worst, time.perf_counter() - t)
+    return (time.perf_counter() - start) / count, worst
+
+
+def on_targets(address, *args):
+    pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OSC receive cost, default_handler vs routed dispatcher")
+    parser.add_argument('--count', type=int, default=20000)
+    args = parser.parse_args()
+
+    # stands in for the old print() to the console
+    console = logging.StreamHandler()
+
+    def printing_handler(address, *osc_args):
+        console.stream.write(f"OSC Message {address!r} {osc_args!r}\n")
+        if address == "/send_camera_targets":
+            on_targets(address, *osc_args)
+
+    stock = Dispatcher()
+    stock.set_default_handler(printing_handler)
+    map_chunk_handler(stock)
+    map_echo_handler(stock)
+
+    routed = RoutedDispatcher()
+    routed.map("/send_camera_targets", on_targets)
+    map_chunk_handler(routed)
+    map_echo_handler(routed)
+
+    for name, datagram in PACKETS.items():
+        (before, before_worst), (after, after_worst) = (time_dispatch(stock, datagram, args.count),
+                                                        time_dispatch(routed, datagram, args.count))
+        print(f"{name:10s} default_handler {before * 1e6:7.1f} us (worst {before_worst * 1e3:6.1f} ms)   "
+              f"routed {after * 1e6:7.1f} us (worst {after_worst * 1e3:6.1f} ms)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import argparse
+import os
+import random
+import socket
+import tempfile
+import time
+from pythonosc.osc_message_builder import OscMessageBuilder
+from osc_journal import INBOUND, OUTBOUND, JournalReader, OSCJournal
+from osc_queue import OSCSendQueue
+from osc_sender import OSCSender
+
+# What journaling costs the send path, how fast the background writer
+# keeps up, and how fast JournalReader answers the questions asked after a
+# show, on a synthetic --size-mb journal spanning --hours of traffic: robot
+# telemetry and camera target snapshots coming in, operator commands going
+# out, some of them bundled. Run from the repo root:
+#   python -m benchmarks.osc_journal --size-mb 1024
+#   python -m benchmarks.osc_journal --size-mb 4096 --dir /path/with/space
+
+
+def message(address, *args):
+    builder = OscMessageBuilder(address)
+    for arg in args:
+        builder.add_arg(arg)
+    return builder.build().dgram
+
+
+def send_cost(journal, count):
+    # one command per flush, like a button press, to a local UDP socket
+    sink = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sink.bind(("127.0.0.1", 0))
+    queue = OSCSendQueue(OSCSender("127.0.0.1", sink.getsockname()[1]), journal=journal)
+    start = time.perf_counter()
+    for i in range(count):
+        queue.send_message("/say_this", ["Good evening and welcome"])
+        queue.flush()
+        if i % 256 == 0:
+            # keep the sink's buffer from filling; not part of what is measured
+            paused = time.perf_counter()
+            try:
+                while True:
+                    sink.recv(65536, socket.MSG_DONTWAIT)
+            except BlockingIOError:
+                pass
+            start += time.perf_counter() - paused
+    elapsed = time.perf_counter() - start
+    queue.close()
+    sink.close()
+    return elapsed / count * 1e6
+
+
+def traffic(rng):
+    # (direction, packet) in the mix a show produces
+    telemetry = [message("/robot_state", "idle", 0.5, i) for i in range(16)]
+    snapshot = message("/camera_targets_snapshot", 1, 7, *[f"target_{i}" for i in range(40)])
+    commands = [message("/say_this", "Good evening and welcome to the show"),
+                message("/start_monologue"), message("/transition", "interview")]
+    bundle = b"#bundle\x00" + (1).to_bytes(8, "big") + b"".join(
+        len(part).to_bytes(4, "big") + part for part in commands[:2])
+    rare = message("/look_at_camera_target", "host_closeup")
+    while True:
+        roll = rng.random()
+        if roll < 0.80:
+            yield INBOUND, telemetry[rng.randrange(16)]
+        elif roll < 0.83:
+            yield INBOUND, snapshot
+        elif roll < 0.97:
+            yield OUTBOUND, commands[rng.randrange(3)]
+        elif roll < 0.999:
+            yield OUTBOUND, bundle
+        else:
+            yield OUTBOUND, rare
+
+
+def build(path, size, hours):
+    # fake clock: the records are spread evenly over `hours`, written as fast
+    # as the writer thread takes them
+    rng = random.Random(1)
+    show_start = time.time_ns() - int(hours * 3600e9)
+    now = [show_start]
+    journal = OSCJournal(path, clock=lambda: now[0], max_pending=1 << 20)
+    average = 16 + 60
+    step = int(hours * 3600e9 / (size / average))
+    start = time.perf_counter()
+    written = 0
+    for direction, packet in traffic(rng):
+        journal.record(direction, packet)
+        now[0] += step
+        written += 16 + len(packet)
+        if written >= size:
+            break
+        if len(journal._pending) > 500000:
+            time.sleep(0.01)
+    journal.close()
+    elapsed = time.perf_counter() - start
+    return journal, elapsed, show_start / 1e9
+
+
+def timed(label, size, query):
+    start = time.perf_counter()
+    count = sum(1 for _ in query())
+    elapsed = time.perf_counter() - start
+    print(f"  {label:44s} {count:10d} messages {elapsed * 1000:9.1f} ms  {size / elapsed / 1e9:6.2f} GB/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OSC journal send-path cost and reader speed")
+    parser.add_argument('--size-mb', type=int, default=1024)
+    parser.add_argument('--hours', type=float, default=3.0)
+    parser.add_argument('--count', type=int, default=100000, help="sends per send-path measurement")
+    parser.add_argument('--dir', default=tempfile.gettempdir())
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        journal = OSCJournal(os.path.join(directory, "send.journal"))
+        send_cost(None, 2000)
+        plain = send_cost(None, args.count)
+        journaled = send_cost(journal, args.count)
+        journal.close()
+        print(f"send + flush: {plain:.2f} us without a journal, {journaled:.2f} us with one "
+              f"({journal.recorded} recorded, {journal.dropped} dropped)")
+
+        path = os.path.join(directory, "show.journal")
+        journal, elapsed, show_start = build(path, args.size_mb << 20, args.hours)
+        size = os.path.getsize(path)
+        print(f"wrote {journal.recorded} packets, {size / 1e9:.2f} GB in {elapsed:.1f} s "
+              f"({journal.recorded / elapsed / 1e3:.0f}k packets/s, {size / elapsed / 1e6:.0f} MB/s), "
+              f"{journal.dropped} dropped")
+
+        # drop the page cache's head start as far as we can without root: read it once
+        reader = JournalReader(path)
+        minute = show_start + args.hours * 3600 / 2
+        timed("everything", size, lambda: reader.records())
+        timed("rare address /look_at_camera_target", size,
+              lambda: reader.records(address="/look_at_camera_target"))
+        timed("common address /say_this", size, lambda: reader.records(address="/say_this"))
+        timed("prefix /camera_targets*", size, lambda: reader.records(address="/camera_targets*"))
+        timed("one minute mid-show", size, lambda: reader.records(minute, minute + 60))
+        timed("one minute mid-show, outbound /say_this", size,
+              lambda: reader.records(minute, minute + 60, "/say_this", OUTBOUND))
+        reader.close()
+        os.remove(path + ".idx")
+        start = time.perf_counter()
+        reader = JournalReader(path)
+        print(f"  index rebuilt from the records in {(time.perf_counter() - start) * 1000:.0f} ms")
+        reader.close()
+
+if __name__ == "__main__":
+    main()
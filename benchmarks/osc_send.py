@@ -0,0 +1,67 @@
+import argparse
+import json
+import socket
+import time
+from pythonosc.udp_client import SimpleUDPClient
+from osc_sender import OSCSender, as_arg_list, build_datagram
+
+# Per-send cost of SimpleUDPClient against the pre-encoding OSCSender for the
+# kinds of messages the GUIs send. Run from the repo root:
+#   python -m benchmarks.osc_send
+
+MESSAGES = {
+    'constant': ("/stay_on_topic", []),
+    'one_string': ("/say_this", [json.dumps("Welcome back to the show, tonight we have a very special guest")]),
+    'scalar_string': ("/look_at_camera_target", "guest_chair"),
+}
+
+
+def time_sends(send, address, value, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        send(address, value)
+    return (time.perf_counter() - start) / count
+
+
+def simple_encode(address, value):
+    # what SimpleUDPClient.send_message does before touching the socket
+    return build_datagram(address, as_arg_list(value))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OSC per-send cost, before and after pre-encoding")
+    parser.add_argument('--count', type=int, default=100000)
+    args = parser.parse_args()
+
+    # a bound socket nobody reads from; the kernel drops what overflows its buffer
+    sink = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sink.bind(("127.0.0.1", 0))
+    port = sink.getsockname()[1]
+
+    simple = SimpleUDPClient("127.0.0.1", port)
+    sender = OSCSender("127.0.0.1", port)
+
+    report = {}
+    for name, (address, value) in MESSAGES.items():
+        before = time_sends(simple.send_message, address, value, args.count)
+        after = time_sends(sender.send_message, address, value, args.count)
+        encode_before = time_sends(simple_encode, address, value, args.count)
+        encode_after = time_sends(sender.encode, address, value, args.count)
+        report[name] = {
+            'send_us_before': round(before * 1e6, 3),
+            'send_us_after': round(after * 1e6, 3),
+            'encode_us_before': round(encode_before * 1e6, 3),
+            'encode_us_after': round(encode_after * 1e6, 3),
+            'speedup': round(before / after, 2),
+        }
+        print(f"{name:>14}: send {before * 1e6:7.2f} us -> {after * 1e6:7.2f} us, "
+              f"encode {encode_before * 1e6:6.2f} us -> {encode_after * 1e6:6.2f} us")
+
+    sink.close()
+    sender.close()
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == '__main__':
+    main()
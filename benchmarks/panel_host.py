@@ -0,0 +1,97 @@
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from fake_robot import FakeRobot
+
+# Startup time and resident memory of the chat, producer and camera GUIs run
+# as three processes against the same three panels in panel_host.py. Every
+# process gets a HOME whose registry cache points at a FakeRobot, so nothing
+# waits on a registry. Startup is the time until Kivy logs that the main
+# loop is running (the slowest of the three for separate processes); RSS is
+# summed over the processes after they settle. Run from the repo root:
+#   python -m benchmarks.panel_host --runs 3
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PANELS = {'chat': "chat_gui.py", 'producer': "producer_gui.py", 'camera': "camera_gui.py"}
+MAIN_LOOP_LINE = b"Start application main loop"
+
+
+def rss_mib(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+async def drain(stream):
+    while await stream.readline():
+        pass
+
+
+async def launch(args, env):
+    start = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, *args, cwd=REPO, env=env,
+        stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE)
+    while True:
+        line = await process.stderr.readline()
+        if not line:
+            raise RuntimeError(f"{' '.join(args)} exited before its main loop started")
+        if MAIN_LOOP_LINE in line:
+            break
+    elapsed = time.perf_counter() - start
+    asyncio.ensure_future(drain(process.stderr))
+    return process, elapsed
+
+
+async def run(commands, env, settle):
+    launched = await asyncio.gather(*(launch(args, env) for args in commands))
+    await asyncio.sleep(settle)
+    rss = sum(rss_mib(process.pid) for process, _ in launched)
+    for process, _ in launched:
+        process.terminate()
+        await process.wait()
+    return max(elapsed for _, elapsed in launched), rss
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Separate panel processes vs one panel host")
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--settle', type=float, default=2.0, help="seconds to wait before reading RSS")
+    parser.add_argument('--panels', nargs='+', choices=list(PANELS), default=list(PANELS))
+    args = parser.parse_args()
+
+    robot = await FakeRobot().start()
+    home = tempfile.mkdtemp(prefix="panel_host_bench_")
+    os.makedirs(os.path.join(home, ".talkshow_gui"))
+    robot_data = {'ip_address': robot.ip, 'port': robot.port}
+    with open(os.path.join(home, ".talkshow_gui", "registry_cache.json"), "w") as f:
+        json.dump({name + "_server": robot_data for name in PANELS}, f)
+
+    env = dict(os.environ, HOME=home, KIVY_NO_ARGS="1")
+    env.pop("KIVY_NO_CONSOLELOG", None)
+    separate = [[PANELS[name]] for name in args.panels]
+    host = [["panel_host.py", "--panels", *args.panels]]
+
+    # first start writes Kivy's config into the fresh HOME
+    await run(host, env, 0)
+    results = {'separate': [], 'host': []}
+    for _ in range(args.runs):
+        results['separate'].append(await run(separate, env, args.settle))
+        results['host'].append(await run(host, env, args.settle))
+    robot.stop()
+
+    print(f"panels: {', '.join(args.panels)}   ({args.runs} runs, median)")
+    for label, runs in results.items():
+        startup = statistics.median(elapsed for elapsed, _ in runs)
+        rss = statistics.median(rss for _, rss in runs)
+        print(f"{label:9s}: {len(separate) if label == 'separate' else 1} process(es), "
+              f"startup {startup * 1000:7.0f} ms, RSS {rss:6.1f} MiB")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,62 @@
+import argparse
+import json
+import shutil
+import tempfile
+import time
+from registry_store import ServerTable, RegistryJournal
+
+# Measures how long a restarting registry takes to rebuild its table from the
+# snapshot plus the journal tail, across table sizes.
+# Run from the repo root:  python -m benchmarks.registry_replay
+
+
+def build_state(directory, servers, journal_tail, snapshot_every):
+    table = ServerTable()
+    table.attach_journal(RegistryJournal(directory, snapshot_every=snapshot_every))
+    for i in range(servers):
+        table.register(f"server_{i}", {'ip_address': f"10.0.{i // 250}.{i % 250}", 'port': 9000 + i % 1000},
+                       ttl=30 if i % 2 else None)
+    # robots moving to new ports after the last compaction
+    for i in range(journal_tail):
+        table.register(f"server_{i % servers}", {'ip_address': '10.1.0.1', 'port': 20000 + i})
+    table._journal.close()
+
+
+def time_replay(directory, repeats):
+    timings = []
+    for _ in range(repeats):
+        table = ServerTable()
+        journal = RegistryJournal(directory, snapshot_every=10 ** 9)
+        start = time.perf_counter()
+        table.attach_journal(journal)
+        timings.append(time.perf_counter() - start)
+        journal.close()
+    return len(table), min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Registry journal replay time against table size")
+    parser.add_argument('--sizes', default="100,1000,10000,100000")
+    parser.add_argument('--tail', type=float, default=0.5, help="journal events after the snapshot, as a fraction of the table size")
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    report = []
+    for size in (int(s) for s in args.sizes.split(',')):
+        directory = tempfile.mkdtemp(prefix="registry_replay_")
+        try:
+            journal_tail = int(size * args.tail)
+            # one compaction right after the initial registrations, the rest stays in the journal
+            build_state(directory, size, journal_tail, snapshot_every=size)
+            servers, seconds = time_replay(directory, args.repeats)
+        finally:
+            shutil.rmtree(directory)
+        report.append({'servers': servers, 'journal_events': journal_tail, 'replay_ms': round(seconds * 1000, 2)})
+        print(f"{servers:>8} servers + {journal_tail:>7} journal events: {seconds * 1000:8.2f} ms")
+
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == '__main__':
+    main()
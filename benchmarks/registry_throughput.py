@@ -0,0 +1,147 @@
+import argparse
+import http.client
+import json
+import multiprocessing
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+# Simulates every GUI and robot process starting at once: each client
+# registers a server and then hammers /servers/<name> on a keep-alive
+# connection. Run from the repo root:  python -m benchmarks.registry_throughput
+
+
+def wait_for_port(host, port, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"registry did not come up on {host}:{port}")
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))
+    return sorted_values[index]
+
+
+def client_thread(host, port, client_id, duration, results):
+    conn = http.client.HTTPConnection(host, port, timeout=5)
+    server_name = f"bench_server_{client_id}"
+    body = json.dumps({'server_name': server_name, 'ip_address': '10.0.0.1', 'port': 9000 + client_id})
+    headers = {'Content-Type': 'application/json'}
+    register_latencies = []
+    lookup_latencies = []
+    errors = 0
+
+    end = time.perf_counter() + duration
+    i = 0
+    while time.perf_counter() < end:
+        # one registration (heartbeat-style re-register) for every 10 lookups
+        is_register = i % 10 == 0
+        start = time.perf_counter()
+        try:
+            if is_register:
+                conn.request('POST', '/register', body, headers)
+            else:
+                conn.request('GET', f'/servers/{server_name}')
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=5)
+            continue
+        elapsed = time.perf_counter() - start
+        (register_latencies if is_register else lookup_latencies).append(elapsed)
+        i += 1
+
+    conn.close()
+    results.append((register_latencies, lookup_latencies, errors))
+
+
+def client_process(host, port, first_id, threads, duration, queue):
+    results = []
+    workers = [threading.Thread(target=client_thread, args=(host, port, first_id + n, duration, results))
+               for n in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    queue.put(results)
+
+
+def run(host, port, processes, threads, duration):
+    queue = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=client_process,
+                                       args=(host, port, p * threads, threads, duration, queue))
+               for p in range(processes)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    results = []
+    for _ in workers:
+        results.extend(queue.get())
+    for worker in workers:
+        worker.join()
+    wall = time.perf_counter() - start
+
+    register_latencies = sorted(l for r in results for l in r[0])
+    lookup_latencies = sorted(l for r in results for l in r[1])
+    errors = sum(r[2] for r in results)
+    total = len(register_latencies) + len(lookup_latencies)
+
+    report = {
+        'clients': processes * threads,
+        'duration_s': round(wall, 2),
+        'requests_per_s': round(total / wall, 1),
+        'errors': errors,
+    }
+    for label, latencies in (('register', register_latencies), ('lookup', lookup_latencies)):
+        report[label] = {
+            'count': len(latencies),
+            'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+            'max_ms': round((latencies[-1] if latencies else 0) * 1000, 3),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Registry /register and /servers throughput benchmark")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=8, help="client threads per process")
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--server-threads', type=int, default=16)
+    parser.add_argument('--external', action='store_true', help="benchmark an already running registry")
+    args = parser.parse_args()
+
+    registry = None
+    if not args.external:
+        registry = subprocess.Popen([sys.executable, 'central_registry.py', '--host', args.host,
+                                     '--port', str(args.port), '--threads', str(args.server_threads)],
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(args.host, args.port)
+        report = run(args.host, args.port, args.processes, args.threads, args.duration)
+    finally:
+        if registry is not None:
+            registry.terminate()
+            registry.wait()
+
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+import argparse
+import asyncio
+import json
+import time
+from pythonosc.dispatcher import Dispatcher
+from pythonosc.osc_server import AsyncIOOSCUDPServer
+from fake_robot import FakeRobot
+from robot_client import make_robot_client
+
+# Delivery of reliable commands through a FakeRobot that drops a fraction of
+# datagrams in both directions. Run from the repo root:
+#   python -m benchmarks.reliable_delivery --drops 0 0.1 0.3
+
+
+async def run(drop_rate, count):
+    robot = await FakeRobot(drop_rate=drop_rate).start()
+    dispatcher = Dispatcher()
+    server = AsyncIOOSCUDPServer(("127.0.0.1", 0), dispatcher, asyncio.get_running_loop())
+    transport, _ = await server.create_serve_endpoint()
+    ack_port = transport.get_extra_info("sockname")[1]
+
+    robot_data = {'ip_address': robot.ip, 'port': robot.port, 'features': ["reliable"]}
+    client = make_robot_client(robot_data, dispatcher=dispatcher, reply_port=ack_port)
+
+    start = time.perf_counter()
+    for i in range(count):
+        client.send_message("/say_this", [json.dumps(f"line {i}")])
+        await asyncio.sleep(0)
+    while client._in_flight or client._backlog:
+        await asyncio.sleep(0.005)
+    elapsed = time.perf_counter() - start
+
+    delivered = {args[0] for addr, args in robot.received if addr == "/say_this"}
+    print(f"drop {drop_rate:4.0%}: {len(delivered)}/{count} delivered, "
+          f"{sum(1 for addr, _ in robot.received if addr == '/say_this') - len(delivered)} duplicates dispatched, "
+          f"{client.retransmits} retransmits, {client.failed} failed, {elapsed:.2f}s, "
+          f"rto {client.rtt.rto * 1000:.1f} ms")
+
+    client.close()
+    transport.close()
+    robot.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Acknowledged OSC delivery over a lossy local link")
+    parser.add_argument('--count', type=int, default=1000)
+    parser.add_argument('--drops', type=float, nargs='+', default=[0.0, 0.05, 0.1, 0.3])
+    args = parser.parse_args()
+
+    for drop_rate in args.drops:
+        asyncio.run(run(drop_rate, args.count))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import os
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+import chat_gui
+import producer_gui
+from fake_robot import FakeRobot, run_in_thread
+from osc_endpoint import OSCEndpoint
+from replay_session import replay, session_cues
+from cue_runner import CueRunner
+from session_recorder import SessionRecorder, load_session
+
+# What recording costs per button press, and how fast and how accurately a
+# recorded session replays into a FakeRobot. The session is an operator
+# working the chat and producer panels with --gap seconds between actions on
+# average; it is recorded through SessionRecorder, then replayed at each
+# --speeds factor ("max" for back to back). The robot runs on its own thread
+# and event loop like a separate process would. At max speed "robot got"
+# falls short of what was sent: asyncio reads one datagram per loop pass and
+# the robot's socket buffer overflows, which is the limit a flat-out replay
+# is there to find. Run from the repo root:
+#   python -m benchmarks.session_replay --actions 200 --speeds 10 50 max
+LINES = ["Good evening", "Tell us about the weather", "interview", "Thank you all for coming"]
+
+
+def operator(chat, producer, rng):
+    # one button press or popup submission, the way the panels call the server
+    choice = rng.randrange(4)
+    if choice == 0:
+        chat.send_start_monologue(None)
+    elif choice == 1:
+        chat.send_enable_listen(None)
+    elif choice == 2:
+        producer.send_say_this(rng.choice(LINES))
+    else:
+        producer.send_transition(rng.choice(LINES))
+
+
+def overhead(chat, producer, calls):
+    rng = random.Random(1)
+    start = time.perf_counter()
+    for i in range(calls):
+        operator(chat, producer, rng)
+    elapsed = time.perf_counter() - start
+    chat.client.flush()
+    producer.client.flush()
+    return elapsed / calls * 1e6
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Session recording overhead and replay rate")
+    parser.add_argument('--actions', type=int, default=200)
+    parser.add_argument('--gap', type=float, default=0.5, help="mean seconds between operator actions")
+    parser.add_argument('--speeds', nargs='+', default=["10", "50", "max"])
+    parser.add_argument('--repeat', type=int, default=20, help="passes of the session at max speed")
+    args = parser.parse_args()
+
+    robot = FakeRobot()
+    stop_robot = run_in_thread(robot)
+    robot_data = {'ip_address': robot.ip, 'port': robot.port}
+    endpoint = OSCEndpoint("127.0.0.1")
+    chat = chat_gui.OSCServer(robot_data, endpoint)
+    producer = producer_gui.OSCServer(robot_data, endpoint)
+
+    plain = overhead(chat, producer, args.actions)
+    with tempfile.TemporaryDirectory() as directory:
+        recorder = SessionRecorder(os.path.join(directory, "session.jsonl"), panels=["chat", "producer"])
+        recorder.attach("chat", chat)
+        recorder.attach("producer", producer)
+        recorded = overhead(chat, producer, args.actions)
+        recorder.close()
+        header, actions = load_session(recorder.path)
+    await asyncio.sleep(0.2)
+    print(f"{len(actions)} actions recorded, {recorded:.1f} us per action recorded vs {plain:.1f} us without")
+
+    # re-time the session the way an operator would have spaced it
+    rng = random.Random(2)
+    at = 0.0
+    paced = []
+    for _, panel, command, values in actions:
+        paced.append((round(at, 3), panel, command, values))
+        at += rng.expovariate(1 / args.gap)
+    servers = {'chat': chat_gui.OSCServer(robot_data, endpoint),
+               'producer': producer_gui.OSCServer(robot_data, endpoint)}
+    print(f"session lasts {paced[-1][0]:.1f} s")
+
+    for speed in args.speeds:
+        flat_out = speed == "max"
+        cues = session_cues(paced, 1.0 if flat_out else float(speed), args.repeat if flat_out else 1)
+        robot.received.clear()
+        runner = CueRunner(servers)
+        elapsed = await replay(runner, cues, flat_out=flat_out)
+        await asyncio.sleep(0.2)
+        line = (f"{speed:>4s}{'' if flat_out else 'x'}  {runner.fired:6d} actions in {elapsed:6.2f} s "
+                f"{runner.fired / elapsed:8.0f}/s  robot got {len(robot.received)}")
+        if not flat_out:
+            lateness = runner.scheduler.lateness
+            line += (f"  lateness p50 {lateness.percentile(50):.0f} us p99 {lateness.percentile(99):.0f} us"
+                     f"  {runner.scheduler.late} late")
+        print(line)
+
+    endpoint.close()
+    stop_robot()
+
+if __name__ == "__main__":
+    asyncio.run(main())
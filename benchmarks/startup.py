@@ -0,0 +1,181 @@
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks.registry_throughput import wait_for_port
+from fake_robot import ROBOT_SERVERS, FakeRobot
+
+# Time to the first interactive frame of each GUI, from process launch to the
+# first frame drawn once the app's widgets are built, and for the camera
+# panels until the camera targets the robot sends back are on screen. The
+# robot is a FakeRobot that answers /get_camera_targets; the registry is
+# either the GUI's disk cache ("cached") or a local central_registry.py with
+# an empty cache ("registry"), behind a proxy that adds --registry-latency to
+# every round trip like a registry across the show network would. Run from
+# the repo root:
+#   python -m benchmarks.startup --runs 5 --registry-latency 0.2
+# --repo points at another checkout (e.g. a git worktree of an older commit)
+# to compare against it.
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TARGETS = 50
+
+# Runs inside the GUI process: watches for the first frame flipped after the
+# app has a root widget, then for the first one showing the robot's targets.
+PROBE = r'''
+import os, runpy, sys, time
+from kivy.app import App
+from kivy.clock import Clock
+url = os.environ.get("STARTUP_BENCH_REGISTRY")
+if url:
+    import registry_client
+    registry_client._registry_client = registry_client.RegistryClient(registry_url=url)
+sys.argv = sys.argv[1:]
+script = sys.argv[0]
+# the chat and producer panels have no camera targets to wait for
+targets = int(os.environ["STARTUP_BENCH_TARGETS"]) if script not in ("chat_gui.py", "producer_gui.py") else 0
+started = float(os.environ["STARTUP_BENCH_T0"])
+
+def report(label):
+    # straight to fd 2, Kivy may have replaced sys.stderr
+    os.write(2, f"STARTUP_BENCH {label} {time.time() - started:.4f}\n".encode())
+
+def shown_targets(root):
+    return max((len(getattr(widget, "data", ())) for widget in root.walk()), default=0)
+
+def watch(dt):
+    app = App.get_running_app()
+    if app is None or app.root is None:
+        return
+    from kivy.core.window import Window
+    seen = set()
+    def flipped(*args):
+        if "frame" not in seen:
+            seen.add("frame")
+            report("frame")
+        if shown_targets(app.root) >= targets:
+            if targets:
+                report("targets")
+            os._exit(0)
+    Window.bind(on_flip=flipped)
+    return False
+
+Clock.schedule_interval(watch, 0)
+sys.path.insert(0, os.getcwd())
+runpy.run_path(script, run_name="__main__")
+'''
+
+
+async def start_delay_proxy(port, upstream_port, latency):
+    # half the latency on the way in, half on the way back
+    async def pipe(reader, writer):
+        try:
+            while data := await reader.read(65536):
+                await asyncio.sleep(latency / 2)
+                writer.write(data)
+                await writer.drain()
+        except OSError:
+            pass
+        finally:
+            writer.close()
+
+    async def handle(reader, writer):
+        upstream_reader, upstream_writer = await asyncio.open_connection("127.0.0.1", upstream_port)
+        asyncio.ensure_future(pipe(reader, upstream_writer))
+        asyncio.ensure_future(pipe(upstream_reader, writer))
+
+    return await asyncio.start_server(handle, "127.0.0.1", port)
+
+
+async def measure(repo, script, home, env, timeout):
+    env = dict(env, STARTUP_BENCH_T0=repr(time.time()))
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-c", PROBE, script, cwd=repo, env=env,
+        stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE)
+    times = {}
+    try:
+        async with asyncio.timeout(timeout):
+            while True:
+                line = await process.stderr.readline()
+                if not line:
+                    break
+                if line.startswith(b"STARTUP_BENCH "):
+                    _, label, elapsed = line.split()
+                    times[label.decode()] = float(elapsed)
+    except TimeoutError:
+        pass
+    if process.returncode is None:
+        process.kill()
+    await process.wait()
+    return times
+
+
+def reset_home(home, cache):
+    # fresh registry and camera target caches, Kivy's config kept
+    shutil.rmtree(os.path.join(home, ".talkshow_gui"), ignore_errors=True)
+    os.makedirs(os.path.join(home, ".talkshow_gui"))
+    if cache is not None:
+        with open(os.path.join(home, ".talkshow_gui", "registry_cache.json"), "w") as f:
+            json.dump(cache, f)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Time to first interactive frame of the GUIs")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--repo', default=REPO, help="checkout whose GUIs are started")
+    parser.add_argument('--scripts', nargs='+', default=["chat_gui.py", "producer_gui.py", "camera_gui.py"])
+    parser.add_argument('--registry-port', type=int, default=5057)
+    parser.add_argument('--registry-latency', type=float, default=0.2, help="seconds added per round trip")
+    parser.add_argument('--timeout', type=float, default=20.0)
+    args = parser.parse_args()
+
+    robot = await FakeRobot(targets=TARGETS).start()
+    robot_data = {'ip_address': robot.ip, 'port': robot.port}
+
+    registry = subprocess.Popen([sys.executable, 'central_registry.py', '--port', str(args.registry_port),
+                                 '--in-memory'], cwd=REPO, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    home = tempfile.mkdtemp(prefix="startup_bench_")
+    try:
+        wait_for_port("127.0.0.1", args.registry_port)
+        await robot.register(f"http://127.0.0.1:{args.registry_port}", ttl=3600)
+        proxy = await start_delay_proxy(args.registry_port + 1, args.registry_port, args.registry_latency)
+        url = f"http://127.0.0.1:{args.registry_port + 1}"
+
+        env = dict(os.environ, HOME=home, KIVY_NO_ARGS="1", KIVY_NO_CONSOLELOG="1",
+                   STARTUP_BENCH_TARGETS=str(TARGETS))
+        scenarios = {
+            'cached': (dict.fromkeys(ROBOT_SERVERS, robot_data), env),
+            'registry': (None, dict(env, STARTUP_BENCH_REGISTRY=url)),
+        }
+        # first start writes Kivy's config into the fresh HOME
+        reset_home(home, scenarios['cached'][0])
+        await measure(args.repo, "chat_gui.py", home, env, args.timeout)
+
+        print(f"{args.repo}  ({args.runs} runs, median ms from launch, "
+              f"registry latency {args.registry_latency * 1000:.0f} ms)")
+        for scenario, (cache, scenario_env) in scenarios.items():
+            for script in args.scripts:
+                runs = []
+                for _ in range(args.runs):
+                    reset_home(home, cache)
+                    runs.append(await measure(args.repo, script, home, scenario_env, args.timeout))
+                line = f"{scenario:9s} {script:16s}"
+                for label in ("frame", "targets"):
+                    values = [times[label] for times in runs if label in times]
+                    if values:
+                        line += f"  first {label} {statistics.median(values) * 1000:6.0f}"
+                print(line)
+        proxy.close()
+    finally:
+        registry.terminate()
+        registry.wait()
+        robot.stop()
+        shutil.rmtree(home, ignore_errors=True)
+
+if __name__ == "__main__":
+    asyncio.run(main())
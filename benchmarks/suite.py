@@ -0,0 +1,289 @@
+import os
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+
+import argparse
+import asyncio
+import glob
+import json
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import chat_gui
+import producer_gui
+from benchmarks.registry_throughput import wait_for_port
+from benchmarks.startup import REPO, measure, reset_home
+from camera_targets import CameraTargets, map_target_handlers
+from fake_robot import ROBOT_SERVERS, FakeRobot, run_in_thread
+from osc_endpoint import OSCEndpoint
+from registry_client import RegistryClient
+
+# End-to-end numbers against a FakeRobot registered in a local
+# central_registry.py, saved so the next run shows what got slower:
+#
+#   send      OSCServer.send_* into the robot, flushed per command (what a
+#             button press does) and queued into bundles; commands go out
+#             in windows of SEND_WINDOW and the clock runs until the robot
+#             has them all, so this is delivered throughput, not how fast
+#             a socket buffer overflows
+#   resolve   registry lookups: the first one (session setup), warm ones,
+#             and the batch lookup the GUIs start with
+#   targets   /get_camera_targets to the reply applied, and the target list
+#             view redrawn with that many rows
+#   startup   launch to first frame, and to the camera targets on screen
+#             (benchmarks/startup.py with a cached registry)
+#
+# Each run is written to --results-dir as <time>-<commit>.json and compared
+# with the newest earlier file there (or --baseline); anything worse by more
+# than --threshold is flagged. Run from the repo root:
+#   python -m benchmarks.suite
+#   python -m benchmarks.suite --only send targets --baseline benchmarks/results/before.json
+RESULTS_DIR = os.path.join(REPO, "benchmarks", "results")
+GROUPS = ("send", "resolve", "targets", "startup")
+SEND_WINDOW = 100
+
+
+def metric(value, unit, better="lower"):
+    return {'value': round(value, 3), 'unit': unit, 'better': better}
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def wait_for(condition, timeout=5.0):
+    deadline = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < deadline:
+        await asyncio.sleep(0.0002)
+    return condition()
+
+
+async def bench_send(robot, endpoint, count):
+    robot_data = {'ip_address': robot.ip, 'port': robot.port}
+    producer = producer_gui.OSCServer(robot_data, endpoint)
+    chat = chat_gui.OSCServer(robot_data, endpoint)
+    results = {}
+    for mode in ("flushed", "queued"):
+        robot.received.clear()
+        start = time.perf_counter()
+        for i in range(count):
+            if i % 2:
+                chat.send_start_monologue(None)
+            else:
+                producer.send_say_this(f"line {i}")
+            if mode == "flushed":
+                producer.client.flush()
+                chat.client.flush()
+            if i % SEND_WINDOW == SEND_WINDOW - 1 or i == count - 1:
+                producer.client.flush()
+                chat.client.flush()
+                await wait_for(lambda: len(robot.received) > i, timeout=0.5)
+        elapsed = time.perf_counter() - start
+        results[f"send.{mode}.rate"] = metric(len(robot.received) / elapsed, "msg/s", "higher")
+        results[f"send.{mode}.delivered"] = metric(len(robot.received) / count * 100, "%", "higher")
+    return results
+
+
+async def bench_resolve(registry_url, cache_file, samples):
+    client = RegistryClient(registry_url=registry_url, cache_file=cache_file)
+    try:
+        start = time.perf_counter()
+        await client.refresh("chat_server")
+        first = time.perf_counter() - start
+
+        warm = []
+        for i in range(samples):
+            start = time.perf_counter()
+            await client.refresh(ROBOT_SERVERS[i % len(ROBOT_SERVERS)])
+            warm.append(time.perf_counter() - start)
+
+        batch = []
+        for i in range(samples):
+            start = time.perf_counter()
+            await client.resolve_many(ROBOT_SERVERS, revalidate=False)
+            batch.append(time.perf_counter() - start)
+            client._cache.clear()
+    finally:
+        client.close()
+    return {
+        'resolve.first_ms': metric(first * 1000, "ms"),
+        'resolve.warm_p50_ms': metric(statistics.median(warm) * 1000, "ms"),
+        'resolve.warm_p99_ms': metric(percentile(warm, 99) * 1000, "ms"),
+        'resolve.batch_p50_ms': metric(statistics.median(batch) * 1000, "ms"),
+    }
+
+
+async def bench_targets(robot, endpoint, samples):
+    from target_list import TargetListView
+    from kivy.clock import Clock
+
+    robot_data = {'ip_address': robot.ip, 'port': robot.port}
+    client = endpoint.client_for(robot_data)
+    updates = []
+    targets = map_target_handlers(endpoint.dispatcher, CameraTargets(on_change=lambda store: updates.append(store)))
+    client.send_message("/camera_client_data", json.dumps({'ip': endpoint.ip, 'port': endpoint.bind_port}))
+
+    round_trips = []
+    for _ in range(samples):
+        seen = len(updates)
+        start = time.perf_counter()
+        client.send_message("/get_camera_targets", [])
+        client.flush()
+        if not await wait_for(lambda: len(updates) > seen):
+            raise RuntimeError("the robot never answered /get_camera_targets")
+        round_trips.append(time.perf_counter() - start)
+
+    def ignore(target):
+        pass
+
+    view = TargetListView(ignore, ignore, ignore, size=(600, 800), size_hint=(None, None))
+    redraws = []
+    for i in range(samples):
+        # alternate between the list and one row short so every pass changes something
+        names = targets.names()[:len(targets) - i % 2]
+        start = time.perf_counter()
+        view.update(names)
+        view.refresh_views()
+        Clock.tick()
+        redraws.append(time.perf_counter() - start)
+    client.close()
+    return {
+        'targets.round_trip_p50_ms': metric(statistics.median(round_trips) * 1000, "ms"),
+        'targets.round_trip_p99_ms': metric(percentile(round_trips, 99) * 1000, "ms"),
+        'targets.redraw_p50_ms': metric(statistics.median(redraws) * 1000, "ms"),
+    }
+
+
+async def bench_startup(robot, runs, target_count, timeout):
+    robot_data = {'ip_address': robot.ip, 'port': robot.port}
+    home = tempfile.mkdtemp(prefix="suite_startup_")
+    env = dict(os.environ, HOME=home, KIVY_NO_ARGS="1", KIVY_NO_CONSOLELOG="1",
+               STARTUP_BENCH_TARGETS=str(target_count))
+    cache = dict.fromkeys(ROBOT_SERVERS, robot_data)
+    results = {}
+    try:
+        # the first start writes Kivy's config into the fresh HOME
+        reset_home(home, cache)
+        await measure(REPO, "chat_gui.py", home, env, timeout)
+        for script in ("chat_gui.py", "camera_gui.py"):
+            times = []
+            for _ in range(runs):
+                reset_home(home, cache)
+                times.append(await measure(REPO, script, home, env, timeout))
+            name = script[:-len("_gui.py")]
+            for label in ("frame", "targets"):
+                values = [run[label] for run in times if label in run]
+                if values:
+                    results[f"startup.{name}.{label}_ms"] = metric(statistics.median(values) * 1000, "ms")
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def previous_results(results_dir, exclude):
+    files = sorted(path for path in glob.glob(os.path.join(results_dir, "*.json")) if path != exclude)
+    return files[-1] if files else None
+
+
+def compare(current, baseline, threshold):
+    # prints every metric against the baseline; returns the regressed names
+    regressions = []
+    for name, entry in current.items():
+        line = f"{name:32s} {entry['value']:12.3f} {entry['unit']:8s}"
+        before = baseline.get(name)
+        if before and before['value']:
+            change = (entry['value'] - before['value']) / before['value']
+            worse = change > threshold if entry['better'] == "lower" else change < -threshold
+            line += f" {before['value']:12.3f}  {change * 100:+6.1f}%"
+            if worse:
+                line += "  REGRESSION"
+                regressions.append(name)
+        print(line)
+    return regressions
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="End-to-end benchmarks against a fake robot")
+    parser.add_argument('--only', nargs='+', choices=GROUPS, default=list(GROUPS))
+    parser.add_argument('--count', type=int, default=5000, help="commands per send measurement")
+    parser.add_argument('--samples', type=int, default=50, help="samples per latency measurement")
+    parser.add_argument('--targets', type=int, default=500, help="camera targets the robot holds")
+    parser.add_argument('--startup-runs', type=int, default=3)
+    parser.add_argument('--registry-port', type=int, default=5059)
+    parser.add_argument('--results-dir', default=RESULTS_DIR)
+    parser.add_argument('--baseline', help="results file to compare with (default: the newest in --results-dir)")
+    parser.add_argument('--threshold', type=float, default=0.10, help="relative change that counts as a regression")
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args()
+
+    registry_url = f"http://127.0.0.1:{args.registry_port}"
+    registry = subprocess.Popen([sys.executable, 'central_registry.py', '--port', str(args.registry_port),
+                                 '--in-memory'], cwd=REPO, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    robot = FakeRobot(targets=args.targets)
+    stop_robot = None
+    endpoint = None
+    scratch = tempfile.mkdtemp(prefix="suite_")
+    results = {}
+    try:
+        wait_for_port("127.0.0.1", args.registry_port)
+        stop_robot = run_in_thread(robot, registry_url, ttl=3600)
+        endpoint = await OSCEndpoint("127.0.0.1", 0).start()
+        if "send" in args.only:
+            results.update(await bench_send(robot, endpoint, args.count))
+        if "resolve" in args.only:
+            results.update(await bench_resolve(registry_url, os.path.join(scratch, "cache.json"), args.samples))
+        if "targets" in args.only:
+            results.update(await bench_targets(robot, endpoint, args.samples))
+        if "startup" in args.only:
+            results.update(await bench_startup(robot, args.startup_runs, args.targets, timeout=20.0))
+    finally:
+        if endpoint is not None:
+            endpoint.close()
+        if stop_robot is not None:
+            stop_robot()
+        registry.terminate()
+        registry.wait()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    commit = git_commit()
+    settings = {'count': args.count, 'samples': args.samples, 'targets': args.targets,
+                'startup_runs': args.startup_runs}
+    path = None
+    if not args.no_save:
+        os.makedirs(args.results_dir, exist_ok=True)
+        path = os.path.join(args.results_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{commit}.json")
+        with open(path, "w") as f:
+            json.dump({'commit': commit, 'time': time.time(), 'host': platform.node(),
+                       'python': platform.python_version(), 'settings': settings, 'results': results}, f, indent=2)
+
+    baseline_path = args.baseline or previous_results(args.results_dir, path)
+    baseline = {}
+    if baseline_path:
+        with open(baseline_path) as f:
+            saved = json.load(f)
+        baseline = saved['results']
+        print(f"{commit} against {os.path.basename(baseline_path)}")
+        if saved.get('settings') != settings:
+            print(f"  (baseline was run with {saved.get('settings')}, not comparable one to one)")
+    regressions = compare(results, baseline, args.threshold)
+    if path:
+        print(f"Saved to {path}")
+    if regressions:
+        print(f"{len(regressions)} regressions over {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,105 @@
+import os
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+
+import argparse
+import gc
+import time
+import tracemalloc
+from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.button import Button
+from kivy.uix.label import Label
+from target_list import TargetListView
+
+# Cost of showing a camera target list: the old update_buttons, one
+# BoxLayout and three Buttons per target, against the virtualized
+# TargetListView in an 800px viewport. No window is opened; this times
+# widget and layout work and measures allocated memory. Run from the repo root:
+#   python -m benchmarks.target_list --sizes 10 100 1000 --virtual-sizes 10000 50000
+
+
+def ignore(target):
+    pass
+
+
+def rebuild(column, targets):
+    # what OSCApp.update_buttons did originally
+    column.clear_widgets()
+    column.add_widget(Label(text='Camera Targets', size_hint_y=None, height=30))
+    column.add_widget(Button(text="Create new camera target"))
+    column.add_widget(Button(text="Look around"))
+    for target in targets:
+        target_layout = BoxLayout(orientation='horizontal', size_hint_y=None, height=44)
+        target_btn = Button(text=target, size_hint_x=0.5)
+        target_btn.bind(on_press=lambda instance, t=target: ignore(t))
+        delete_btn = Button(text="Del", size_hint_x=0.25)
+        delete_btn.bind(on_press=lambda instance, t=target: ignore(t))
+        look_around_btn = Button(text="Look", size_hint_x=0.25)
+        look_around_btn.bind(on_press=lambda instance, t=target: ignore(t))
+        target_layout.add_widget(target_btn)
+        target_layout.add_widget(delete_btn)
+        target_layout.add_widget(look_around_btn)
+        column.add_widget(target_layout)
+    column.do_layout()
+    return len(targets)
+
+
+def virtual():
+    view = TargetListView(ignore, ignore, ignore, row_height=44, delete_text="Del", look_around_text="Look",
+                          size=(600, 800), size_hint=(None, None))
+
+    def update(targets):
+        view.update(targets)
+        # what the Clock trigger would run on the next frame
+        view.refresh_views()
+        return len(view.layout_manager.children)
+    return update
+
+
+def measure(update, targets):
+    gc.collect()
+    start = time.perf_counter()
+    rows = update(targets)
+    return time.perf_counter() - start, rows
+
+
+def allocated(update, targets):
+    # tracemalloc slows allocation down a lot, so memory is a separate run
+    gc.collect()
+    tracemalloc.start()
+    update(targets)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return memory
+
+
+def report(label, size, make_update):
+    targets = [f"target_{i}" for i in range(size)]
+    update = make_update()
+    load, rows = measure(update, targets)
+    refresh, _ = measure(update, targets[1:] + ["new_target"])
+    memory = allocated(make_update(), targets)
+    print(f"{size:8d} {label:8s} {load * 1000:9.1f} ms {refresh * 1000:9.1f} ms "
+          f"{memory / 1024:9.0f} KiB {rows:6d}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Camera target list, one row per target vs virtualized")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--virtual-sizes', type=int, nargs='+', default=[10000, 50000],
+                        help="sizes only run for the virtualized list")
+    args = parser.parse_args()
+
+    # warm up Kivy's property and style machinery
+    virtual()(["warm_up"] * 10)
+    rebuild(BoxLayout(orientation='vertical'), ["warm_up"])
+
+    print(f"{'targets':>8s} {'':8s} {'load':>12s} {'change':>12s} {'memory':>13s} {'rows':>6s}")
+    for size in args.sizes:
+        report("rebuild", size, lambda: lambda targets: rebuild(BoxLayout(orientation='vertical'), targets))
+        report("virtual", size, virtual)
+    for size in args.virtual_sizes:
+        report("virtual", size, virtual)
+
+if __name__ == "__main__":
+    main()
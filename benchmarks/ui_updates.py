@@ -0,0 +1,62 @@
+import os
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+
+import argparse
+import time
+from kivy.clock import Clock
+from camera_targets import CameraTargets
+from target_list import TargetListView
+from ui_updates import UIUpdateQueue
+
+# A burst of camera target deltas landing between two frames, rendered from
+# the network callback on every message (what the GUIs used to do) against
+# posting to UIUpdateQueue and drawing once. Run from the repo root:
+#   python -m benchmarks.ui_updates --targets 1000 --burst 10 100 1000
+
+
+def ignore(target):
+    pass
+
+
+def run(targets, burst, queued):
+    view = TargetListView(ignore, ignore, ignore, size=(600, 800), size_hint=(None, None))
+    ui_updates = UIUpdateQueue()
+
+    def render(store):
+        view.update(store.names())
+        view.refresh_views()
+
+    store = CameraTargets()
+    store.replace([f"target_{i}" for i in range(targets)], epoch=1, version=1)
+    render(store)
+    Clock.tick()
+    if queued:
+        store.on_change = lambda store: ui_updates.post("camera_targets", render, store)
+    else:
+        store.on_change = render
+
+    start = time.perf_counter()
+    for i in range(burst):
+        store.apply_delta(1, 2 + i, added=[f"new_{i}"])
+    Clock.tick()
+    return time.perf_counter() - start, ui_updates
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-message rendering vs frame-synchronized UI updates")
+    parser.add_argument('--targets', type=int, default=1000)
+    parser.add_argument('--burst', type=int, nargs='+', default=[10, 100, 1000])
+    args = parser.parse_args()
+
+    run(10, 10, True)
+    for burst in args.burst:
+        direct, _ = run(args.targets, burst, False)
+        queued, ui_updates = run(args.targets, burst, True)
+        stats = ui_updates.stats()
+        print(f"burst {burst:5d}: per message {direct * 1000:8.1f} ms   queued {queued * 1000:7.1f} ms "
+              f"({stats['drains']} drain, {stats['coalesced']} coalesced, "
+              f"drain {stats['drain_max_us'] / 1000:.1f} ms)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import asyncio
+import time
+from osc_endpoint import OSCEndpoint, get_ip
+from registry_client import RegistryError, get_registry_client
+from robot_client import robot_group
+
+# Startup shared by the GUIs and panel_host.py. The slow parts are Kivy
+# creating its window (a couple of hundred ms on the main thread) and, when
+# an endpoint is not cached, the registry round trip, so that lookup is put
+# on the wire first and the window opened while it is in flight. Once the
+# robots are known, `on_resolved` builds the servers and tells the robots
+# where to answer; with cached endpoints that happens before the window
+# exists and the camera targets arrive while it opens.
+#
+# Revalidating cached endpoints, and the watches started through
+# watch_after_first_frame(), wait until the window has been drawn once: the
+# first of those requests imports requests, more CPU than anything else left
+# at that point. The GUI modules must not import kivy.core.window
+# themselves. With `required`, a robot server the registry does not know is
+# an error rather than None in the dict handed to `on_resolved`.
+
+
+def open_window():
+    from kivy.core.window import Window
+    return Window
+
+
+def after_first_frame(callback):
+    window = open_window()
+
+    def flipped(*args):
+        window.unbind(on_flip=flipped)
+        callback()
+
+    window.bind(on_flip=flipped)
+
+
+def watch_after_first_frame(server_name, on_change):
+    after_first_frame(lambda: asyncio.ensure_future(get_registry_client().watch(server_name, on_change)))
+
+
+async def bootstrap(robot_servers, on_resolved, bind_port=None, required=True):
+    started = time.perf_counter()
+    registry = get_registry_client()
+    cached = [registry.cached(name) for name in robot_servers]
+    if not all(cached):
+        registry.prepare()
+    resolving = asyncio.ensure_future(registry.resolve_many(robot_servers, revalidate=False))
+
+    peer = next((server_data["ip_address"] for server_data in cached if server_data), None)
+    endpoint = OSCEndpoint(await get_ip(peer), bind_port)
+    if bind_port is not None:
+        await endpoint.start()
+
+    # one pass through the loop hands an uncached lookup to its thread
+    await asyncio.sleep(0)
+    if not resolving.done():
+        open_window()
+    robots = await resolving
+    missing = [name for name, server_data in robots.items() if server_data is None]
+    if required and missing:
+        endpoint.close()
+        raise RegistryError(f"Not registered: {', '.join(missing)}")
+    result = on_resolved(endpoint, robots)
+    open_window()
+    stale = [name for name, server_data in zip(robot_servers, cached) if server_data]
+    if stale:
+        after_first_frame(lambda: asyncio.ensure_future(registry.resolve_many(stale)))
+    print(f"Bootstrap finished in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return result
+
+
+async def resolve_groups(server_names, robots=None):
+    # Robot groups for multi-robot segments, {server name: group}: the
+    # explicit `robots` for every name, or else every registered instance of
+    # each name (None for names nobody registered).
+    if robots:
+        return dict.fromkeys(server_names, robot_group(robots))
+    registry = get_registry_client()
+    found = await asyncio.gather(*[registry.instances(name) for name in server_names], return_exceptions=True)
+    groups = {}
+    for name, instances in zip(server_names, found):
+        if isinstance(instances, RegistryError) or not instances:
+            groups[name] = None
+        elif isinstance(instances, BaseException):
+            raise instances
+        else:
+            groups[name] = robot_group(instances)
+    return groups
@@ -0,0 +1,157 @@
+import asyncio
+import json
+import os
+import time
+
+# Versioned camera target state. Besides the full list the robot has always
+# sent,
+#
+#   /send_camera_targets  name:s...                     (unversioned, legacy)
+#
+# a robot can send
+#
+#   /camera_targets_snapshot  epoch:i  version:i  name:s...
+#   /camera_targets_added     epoch:i  version:i  name:s...
+#   /camera_targets_removed   epoch:i  version:i  name:s...
+#
+# Every change bumps the version by one; epoch changes when the robot
+# restarts and its counter starts over. A delta that does not follow the
+# version we hold means we missed one, and the GUI asks for the full list
+# again with /get_camera_targets.
+SNAPSHOT_ADDRESS = "/camera_targets_snapshot"
+ADDED_ADDRESS = "/camera_targets_added"
+REMOVED_ADDRESS = "/camera_targets_removed"
+LEGACY_ADDRESS = "/send_camera_targets"
+
+SAVE_DELAY = 0.5
+RESYNC_INTERVAL = 2.0
+
+
+class CameraTargets:
+    # Ordered set of target names (a dict, so lookups and removals are O(1))
+    # plus the (epoch, version) it reflects, saved to `cache_file` so the
+    # panel can show the last known list before the robot answers.
+    def __init__(self, cache_file=None, on_change=None, request_resync=None):
+        self.cache_file = cache_file
+        self.on_change = on_change
+        self.request_resync = request_resync
+        self._targets = {}
+        self.epoch = None
+        self.version = None
+        self.resyncs = 0
+        self._resync_requested = None
+        self._save_handle = None
+        self._load()
+
+    def __contains__(self, name):
+        return name in self._targets
+
+    def __len__(self):
+        return len(self._targets)
+
+    def names(self):
+        return list(self._targets)
+
+    def replace(self, names, epoch=None, version=None):
+        self._targets = dict.fromkeys(names)
+        self.epoch = epoch
+        self.version = version
+        self._resync_requested = None
+        self._changed()
+
+    def apply_delta(self, epoch, version, added=(), removed=()):
+        if self.version is None or epoch != self.epoch or version > self.version + 1:
+            # no baseline, robot restarted or a delta went missing
+            self.resync()
+            return False
+        if version <= self.version:
+            # duplicate or reordered delta we already hold
+            return False
+        for name in removed:
+            self._targets.pop(name, None)
+        for name in added:
+            self._targets[name] = None
+        self.version = version
+        self._changed()
+        return True
+
+    def discard(self, name):
+        # optimistic local delete; the robot's own delta confirms it later
+        if name in self._targets:
+            del self._targets[name]
+            self._changed()
+
+    def resync(self):
+        # one request per gap, not one per delta that arrives behind it
+        now = time.monotonic()
+        if self._resync_requested is not None and now - self._resync_requested < RESYNC_INTERVAL:
+            return
+        self._resync_requested = now
+        self.resyncs += 1
+        if self.request_resync is not None:
+            self.request_resync()
+
+    def _changed(self):
+        if self.on_change is not None:
+            self.on_change(self)
+        self._schedule_save()
+
+    def _load(self):
+        if self.cache_file is None:
+            return
+        try:
+            with open(self.cache_file) as f:
+                cached = json.load(f)
+            self._targets = dict.fromkeys(cached['targets'])
+            self.epoch = cached.get('epoch')
+            self.version = cached.get('version')
+        except (OSError, ValueError, KeyError, TypeError):
+            return
+
+    def _schedule_save(self):
+        if self.cache_file is None or self._save_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.save()
+            return
+        # a burst of deltas costs one write
+        self._save_handle = loop.call_later(SAVE_DELAY, self.save)
+
+    def save(self):
+        self._save_handle = None
+        if self.cache_file is None:
+            return
+        data = {'epoch': self.epoch, 'version': self.version, 'targets': self.names()}
+        tmp_path = self.cache_file + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.cache_file)
+        except OSError as e:
+            print(f"Could not write camera target cache: {e}")
+
+
+def map_target_handlers(dispatcher, targets):
+    def legacy_handler(address, *names):
+        targets.replace(names)
+
+    def snapshot_handler(address, epoch=None, version=None, *names):
+        if isinstance(epoch, int) and isinstance(version, int):
+            targets.replace(names, epoch, version)
+
+    def added_handler(address, epoch=None, version=None, *names):
+        if isinstance(epoch, int) and isinstance(version, int):
+            targets.apply_delta(epoch, version, added=names)
+
+    def removed_handler(address, epoch=None, version=None, *names):
+        if isinstance(epoch, int) and isinstance(version, int):
+            targets.apply_delta(epoch, version, removed=names)
+
+    dispatcher.map(LEGACY_ADDRESS, legacy_handler)
+    dispatcher.map(SNAPSHOT_ADDRESS, snapshot_handler)
+    dispatcher.map(ADDED_ADDRESS, added_handler)
+    dispatcher.map(REMOVED_ADDRESS, removed_handler)
+    return targets
@@ -1,29 +1,292 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
+import argparse
+import json
+import math
+import os
+import secrets
+import threading
+import time
+from registry_store import ServerTable, RegistryJournal, DEFAULT_INSTANCE, LATEST, STRATEGIES
 
 app = Flask(__name__)
 
-registered_servers = {}
+server_table = ServerTable()
 
-@app.route('/register', methods=['POST'])
-def register():
-    data = request.json
+MAX_TTL = 24 * 60 * 60
+MAX_WATCH_TIMEOUT = 60
+# worker threads kept free of /watch long-polls for registrations and lookups;
+# watches past the rest are answered at once and told when to poll again
+RESERVED_THREADS = 8
+WATCH_RETRY_AFTER = 5.0
+STATE_DIR = os.path.join(os.path.expanduser("~"), ".talkshow_registry")
+MAX_CACHED_RESPONSES = 4096
+# entry versions restart with an in-memory table, so tags are scoped to this process
+BOOT_ID = secrets.token_hex(4)
+
+# pre-serialized lookup bodies keyed by request, each tagged with the entry versions it was built from
+response_cache = {}
+
+watch_slots = threading.BoundedSemaphore(32 - RESERVED_THREADS)
+
+
+def parse_ttl(value):
+    if value is None:
+        return None
+    try:
+        ttl = float(value)
+    except (TypeError, ValueError):
+        return False
+    if not 0 < ttl <= MAX_TTL:
+        return False
+    return ttl
+
+def is_name(value):
+    # names and ids are dictionary keys in the table, so nothing but non-empty strings
+    return isinstance(value, str) and value != ""
+
+def is_port(value):
+    return isinstance(value, int) and not isinstance(value, bool) and 0 < value < 65536
+
+def parse_registration(data):
     server_name = data.get('server_name')
     ip_address = data.get('ip_address')
     port = data.get('port')
-    
+    ttl = parse_ttl(data.get('ttl'))
+    instance_id = data.get('instance_id') or DEFAULT_INSTANCE
+    weight = data.get('weight')
+    features = data.get('features')
+    transport = data.get('transport')
+
     if not (server_name and ip_address and port):
+        return None, 'Missing data'
+    if not (is_name(server_name) and is_name(instance_id)):
+        return None, 'Invalid server_name or instance_id'
+    if not is_name(ip_address):
+        return None, 'Invalid ip_address'
+    if not is_port(port):
+        return None, 'Invalid port'
+    if ttl is False:
+        return None, 'Invalid ttl'
+    if weight is not None and not (isinstance(weight, (int, float)) and weight > 0):
+        return None, 'Invalid weight'
+    if features is not None and not (isinstance(features, list) and all(isinstance(f, str) for f in features)):
+        return None, 'Invalid features'
+    if transport not in (None, 'udp', 'tcp'):
+        return None, 'Invalid transport'
+
+    server_info = {'ip_address': ip_address, 'port': port}
+    if weight is not None:
+        server_info['weight'] = weight
+    if features:
+        # protocol extensions the robot understands, e.g. "chunking"
+        server_info['features'] = sorted(set(features))
+    if transport == 'tcp':
+        # OSC 1.1 SLIP-framed stream on the same port number
+        server_info['transport'] = transport
+    return (server_name, server_info, ttl, instance_id), None
+
+def apply_registration(server_name, server_info, ttl, instance_id):
+    lease_id = server_table.register(server_name, server_info, ttl=ttl, instance_id=instance_id)
+    response = {'server_name': server_name, 'instance_id': instance_id, 'message': 'Registered successfully'}
+    if lease_id:
+        response.update({'lease_id': lease_id, 'ttl': ttl})
+    return response
+
+@app.route('/register', methods=['POST'])
+def register():
+    data = request.json
+
+    if isinstance(data, list):
+        # batch registration: validate everything before touching the table
+        registrations = []
+        for index, item in enumerate(data):
+            registration, error = parse_registration(item) if isinstance(item, dict) else (None, 'Missing data')
+            if error:
+                return jsonify({'error': error, 'index': index}), 400
+            registrations.append(registration)
+        return jsonify([apply_registration(*registration) for registration in registrations]), 200
+
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Missing data'}), 400
+    registration, error = parse_registration(data)
+    if error:
+        return jsonify({'error': error}), 400
+    response = apply_registration(*registration)
+    del response['server_name']
+    if response['instance_id'] == DEFAULT_INSTANCE:
+        del response['instance_id']
+    return jsonify(response), 200
+
+@app.route('/heartbeat', methods=['POST'])
+def heartbeat():
+    data = request.json
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Missing data'}), 400
+    server_name = data.get('server_name')
+    lease_id = data.get('lease_id')
+    instance_id = data.get('instance_id') or DEFAULT_INSTANCE
+    load = data.get('load')
+
+    if not (server_name and lease_id):
+        return jsonify({'error': 'Missing data'}), 400
+    if not (is_name(server_name) and is_name(lease_id) and is_name(instance_id)):
+        return jsonify({'error': 'Invalid server_name, lease_id or instance_id'}), 400
+    if load is not None and not isinstance(load, (int, float)):
+        return jsonify({'error': 'Invalid load'}), 400
+
+    ttl = server_table.renew(server_name, lease_id, instance_id=instance_id, load=load)
+    if ttl is None:
+        # the lease expired or was replaced, the service has to register again
+        return jsonify({'error': 'Lease not found'}), 404
+    return jsonify({'ttl': ttl}), 200
+
+@app.route('/deregister', methods=['POST'])
+def deregister():
+    data = request.json
+    if not isinstance(data, dict):
         return jsonify({'error': 'Missing data'}), 400
-    
-    registered_servers[server_name] = {'ip_address': ip_address, 'port': port}
-    return jsonify({'message': 'Registered successfully'}), 200
+    server_name = data.get('server_name')
+    instance_id = data.get('instance_id')
+
+    if not server_name:
+        return jsonify({'error': 'Missing data'}), 400
+    if not (is_name(server_name) and (instance_id is None or is_name(instance_id))):
+        return jsonify({'error': 'Invalid server_name or instance_id'}), 400
+
+    # without an instance_id every instance of the name is removed
+    if not server_table.deregister(server_name, instance_id=instance_id):
+        return jsonify({'error': 'Server not found'}), 404
+    return jsonify({'message': 'Deregistered successfully'}), 200
+
+def cached_json_response(cache_key, etag, build_body):
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    cached = response_cache.get(cache_key)
+    if cached is None or cached[0] != etag:
+        if len(response_cache) >= MAX_CACHED_RESPONSES:
+            response_cache.clear()
+        cached = (etag, json.dumps(build_body()).encode())
+        response_cache[cache_key] = cached
+
+    response = Response(cached[1], status=200, mimetype='application/json')
+    response.set_etag(etag)
+    return response
+
+def selection_args():
+    strategy = request.args.get('strategy', LATEST)
+    return (strategy if strategy in STRATEGIES else None), request.args.get('client')
 
 @app.route('/servers/<server_name>', methods=['GET'])
 def get_server(server_name):
-    server_info = registered_servers.get(server_name)
+    strategy, client_id = selection_args()
+    if strategy is None:
+        return jsonify({'error': 'Unknown strategy'}), 400
+
+    if strategy != LATEST:
+        # balanced picks differ per request, so they bypass the response cache
+        server_info = server_table.select(server_name, strategy, client_id)
+        if server_info:
+            return jsonify(server_info), 200
+        return jsonify({'error': 'Server not found'}), 404
+
+    # read the version before the entry so the tag never claims newer data than the body
+    etag = f"{BOOT_ID}-{server_table.entry_version(server_name)}"
+    server_info = server_table.get(server_name)
     if server_info:
-        return jsonify(server_info), 200
+        return cached_json_response(server_name, etag, lambda: server_info)
     else:
         return jsonify({'error': 'Server not found'}), 404
 
+@app.route('/servers/<server_name>/instances', methods=['GET'])
+def get_instances(server_name):
+    instances = server_table.instances(server_name)
+    if instances:
+        return jsonify(instances), 200
+    return jsonify({'error': 'Server not found'}), 404
+
+@app.route('/servers', methods=['GET'])
+def get_servers():
+    names = tuple(name for name in request.args.get('names', '').split(',') if name)
+    if not names:
+        return jsonify({'error': 'Missing names'}), 400
+    strategy, client_id = selection_args()
+    if strategy is None:
+        return jsonify({'error': 'Unknown strategy'}), 400
+
+    if strategy != LATEST:
+        return jsonify({name: server_table.select(name, strategy, client_id) for name in names}), 200
+
+    etag = BOOT_ID + "".join(f"-{server_table.entry_version(name)}" for name in names)
+    return cached_json_response(names, etag, lambda: {name: server_table.get(name) for name in names})
+
+@app.route('/watch/<server_name>', methods=['GET'])
+def watch_server(server_name):
+    try:
+        known_version = int(request.args.get('version', 0))
+        timeout = float(request.args.get('timeout', 30))
+    except ValueError:
+        return jsonify({'error': 'Invalid version or timeout'}), 400
+    # nan would make the long-poll wait forever
+    if not (math.isfinite(timeout) and timeout >= 0):
+        return jsonify({'error': 'Invalid version or timeout'}), 400
+    timeout = min(timeout, MAX_WATCH_TIMEOUT)
+    strategy, client_id = selection_args()
+    if strategy is None:
+        return jsonify({'error': 'Unknown strategy'}), 400
+
+    if not watch_slots.acquire(blocking=False):
+        version, server_info, endpoints = server_table.watch(server_name, known_version, 0, strategy, client_id)
+        return jsonify({'version': version, 'server': server_info, 'endpoints': endpoints,
+                        'retry_after': WATCH_RETRY_AFTER}), 200
+    try:
+        version, server_info, endpoints = server_table.watch(server_name, known_version, timeout, strategy,
+                                                             client_id)
+    finally:
+        watch_slots.release()
+    return jsonify({'version': version, 'server': server_info, 'endpoints': endpoints}), 200
+
+
+def main():
+    global watch_slots
+    parser = argparse.ArgumentParser(description="Central registry for the talk show robot servers")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--threads', type=int, default=32, help="worker threads")
+    parser.add_argument('--max-watches', type=int, default=None,
+                        help=f"/watch long-polls held open at once (default: threads - {RESERVED_THREADS}), "
+                             "the rest poll again every few seconds")
+    parser.add_argument('--debug', action='store_true', help="run the single-threaded Flask debug server")
+    parser.add_argument('--state-dir', default=STATE_DIR, help="where the journal and snapshot are kept")
+    parser.add_argument('--snapshot-every', type=int, default=1000, help="compact the journal after this many events")
+    parser.add_argument('--fsync', action='store_true', help="fsync every journal append")
+    parser.add_argument('--in-memory', action='store_true', help="do not persist registrations")
+    args = parser.parse_args()
+    max_watches = args.max_watches if args.max_watches is not None else args.threads - RESERVED_THREADS
+    watch_slots = threading.BoundedSemaphore(max(1, min(max_watches, args.threads - 1)))
+
+    # with --debug the reloader parent only watches files, the child it spawns owns the state
+    reloader_parent = args.debug and os.environ.get('WERKZEUG_RUN_MAIN') != 'true'
+
+    if not (args.in_memory or reloader_parent):
+        start = time.perf_counter()
+        server_table.attach_journal(RegistryJournal(args.state_dir, snapshot_every=args.snapshot_every,
+                                                    fsync=args.fsync))
+        print(f"Restored {len(server_table)} servers from {args.state_dir} "
+              f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    if not reloader_parent:
+        server_table.start_reaper()
+
+    if args.debug:
+        app.run(debug=True, host=args.host, port=args.port)
+        return
+
+    from waitress import serve
+    serve(app, host=args.host, port=args.port, threads=args.threads,
+          connection_limit=1000, backlog=1024, ident=None)
+
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
+    main()
@@ -2,24 +2,33 @@ from kivy.app import App
 from kivy.uix.button import Button
 from kivy.uix.boxlayout import BoxLayout
 import asyncio
-from pythonosc.udp_client import SimpleUDPClient
+from bootstrap import bootstrap, watch_after_first_frame
+from osc_endpoint import OSCEndpoint
+from session_recorder import record_from_env
 from kivy.uix.label import Label
-import requests
-from registry_url import REGISTRY_URL
 
+ROBOT_SERVER = "chat_server"
 
 
-async def get_robot_server_data():
-        response = requests.get(f'{REGISTRY_URL}/servers/chat_server')
-        return response.json()
+class OSCServer:
+    def __init__(self, robot_data=None, endpoint=None):
 
+        self.endpoint = endpoint if endpoint is not None else OSCEndpoint()
+        self.robot_data = robot_data
+        self.robot_ip = robot_data["ip_address"]
+        self.robot_port = robot_data["port"]
+        self.client = self.endpoint.client_for(robot_data)
 
-class OSCServer:
-    def __init__(self, robot_data=None):
 
+    def set_robot_endpoint(self, robot_data):
+        if robot_data == self.robot_data:
+            return
+        self.robot_data = robot_data
         self.robot_ip = robot_data["ip_address"]
         self.robot_port = robot_data["port"]
-        self.client = SimpleUDPClient(self.robot_ip, self.robot_port)
+        self.client.close()
+        self.client = self.endpoint.client_for(robot_data)
+        print(f"Robot endpoint changed to {self.robot_ip}:{self.robot_port}")
      
 
     # SEND TO TRITIUM OSC ############################################################
@@ -145,17 +154,26 @@ class OSCApp(App):
         self.column2.add_widget(Button(text="Start Game", on_press=self.osc_server.send_start_game))
 
 
+def make_panel(robot_data, endpoint):
+    # Entry point for panel_host.py: the same server and app, sending through
+    # the host's shared endpoint.
+    server = OSCServer(robot_data=robot_data, endpoint=endpoint)
+    return server, OSCApp(osc_server=server)
+
+
 async def main():
     try:
-        robot_server_data = await get_robot_server_data()
-
-        server = OSCServer(robot_data=robot_server_data)
+        server = await bootstrap([ROBOT_SERVER], lambda endpoint, robots: OSCServer(robots[ROBOT_SERVER], endpoint))
+        watch_after_first_frame(ROBOT_SERVER, server.set_robot_endpoint)
         
         osc_app = OSCApp(osc_server=server)
+        # after the app's startup stop_chat_controller, which is not an operator action
+        record_from_env({'chat': server})
         await osc_app.async_run(async_lib='asyncio') 
     
     except KeyboardInterrupt:
         server.client.send_message("/stop_chat_controller", [])
+        server.client.flush()
         print("Server closed manually.")
 
 if __name__ == "__main__":
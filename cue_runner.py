@@ -0,0 +1,268 @@
+import os
+# the runner parses its own arguments
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+
+import argparse
+import asyncio
+import importlib
+import inspect
+import json
+import struct
+import sys
+import time
+from pythonosc.parsing import osc_types
+from bootstrap import resolve_groups
+from osc_endpoint import OSCEndpoint, get_ip
+from osc_latency import LatencyHistogram
+from panel_host import PANELS
+from registry_client import RegistryError, get_registry_client
+from registry_store import STRATEGIES
+from robot_client import parse_robot
+
+# Plays a cue sheet headless: each cue calls one of the panels' existing
+# OSCServer.send_* commands at a fixed offset from the start.
+#
+#   {"cues": [
+#       {"at": 0,    "panel": "chat",     "command": "start_monologue"},
+#       {"at": 12.5, "panel": "producer", "command": "say_this", "args": ["Good evening"]},
+#       {"at": 90,   "panel": "producer", "command": "transition", "args": ["interview"]}
+#   ]}
+#
+#   python cue_runner.py show.json --timetag-lead 0.05
+#
+# "command" is the send_* method without its prefix. Without "args", the
+# button-press placeholders (the `test` / `instance` parameters) get None;
+# every other parameter needs a value.
+#
+# Every cue has an absolute deadline on the monotonic clock, so a late wakeup
+# never pushes the cues after it back. asyncio.sleep() wakes up to a few ms
+# late (more with a busy loop), so the scheduler sleeps to a margin before
+# the deadline and spins the rest. The margin follows the worst oversleep it
+# has seen, and while cues are running the GIL switch interval is cut from
+# 5 ms so a busy thread (registry lookups, logging) cannot sit on a deadline.
+#
+# With --timetag-lead the commands go out that much earlier, wrapped in an
+# OSC bundle timetagged with the cue's wall-clock time, and the robot
+# executes them at that time (that needs both clocks in sync, e.g. NTP). For
+# robots with the "reliable" feature a bundle holding a reliable command is
+# sent in the /reliable envelope, so it is acknowledged and retransmitted
+# like the command on its own would be.
+MIN_SPIN = 0.005
+MAX_SPIN = 0.050
+LATE = 0.001
+# another thread holding the GIL can delay a wakeup by a whole switch interval
+SWITCH_INTERVAL = 0.0002
+# parameters the buttons fill with their widget; a cue leaves them out
+PLACEHOLDERS = ("test", "instance")
+
+
+class Cue:
+    def __init__(self, at, panel, command, args=None):
+        self.at = float(at)
+        self.panel = panel
+        self.command = command
+        self.args = args
+        self.call_args = None
+
+    def __repr__(self):
+        return f"T+{self.at:g}s {self.panel} {self.command} {self.args or ''}".rstrip()
+
+
+def load_cues(path):
+    with open(path) as f:
+        sheet = json.load(f)
+    cues = [Cue(cue['at'], cue['panel'], cue['command'], cue.get('args')) for cue in sheet['cues']]
+    for cue in cues:
+        if cue.panel not in PANELS:
+            raise ValueError(f"{cue}: unknown panel, expected one of {', '.join(PANELS)}")
+        if cue.at < 0:
+            raise ValueError(f"{cue}: negative offset")
+    # stable: cues at the same offset fire in file order
+    cues.sort(key=lambda cue: cue.at)
+    return cues
+
+
+def check_cue(server_class, cue):
+    # Fails on commands the panel does not have and on arguments they do not
+    # take, before the show rather than at T+90s; fills in cue.call_args.
+    function = getattr(server_class, "send_" + cue.command, None)
+    if function is None:
+        raise ValueError(f"{cue}: {cue.panel} has no send_{cue.command}")
+    signature = inspect.signature(function)
+    args = list(cue.args or ())
+    if not args:
+        args = [None for name in signature.parameters if name in PLACEHOLDERS]
+    try:
+        signature.bind(None, *args)
+    except TypeError as e:
+        raise ValueError(f"{cue}: {e}")
+    cue.call_args = args
+
+
+def check_cues(cues):
+    for cue in cues:
+        check_cue(importlib.import_module(PANELS[cue.panel]).OSCServer, cue)
+
+
+class CueScheduler:
+    def __init__(self, min_spin=MIN_SPIN, max_spin=MAX_SPIN, clock=time.perf_counter):
+        self.min_spin = min_spin
+        self.max_spin = max_spin
+        self.clock = clock
+        self.spin = min_spin
+        self.lateness = LatencyHistogram()
+        self.late = 0
+
+    async def wait_until(self, deadline):
+        remaining = deadline - self.clock()
+        if remaining > self.spin:
+            await asyncio.sleep(remaining - self.spin)
+            overslept = self.clock() - (deadline - self.spin)
+            if overslept > 0:
+                self.spin = min(self.max_spin, max(self.spin, overslept * 1.5))
+        while self.clock() < deadline:
+            pass
+        lateness = self.clock() - deadline
+        self.lateness.record(lateness * 1e6)
+        if lateness > LATE:
+            self.late += 1
+        return lateness
+
+    async def run(self, cues, fire, lead=0.0, start=None):
+        start = self.clock() if start is None else start
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(switch_interval, SWITCH_INTERVAL))
+        try:
+            for cue in cues:
+                await self.wait_until(start + cue.at - lead)
+                fire(cue)
+        finally:
+            sys.setswitchinterval(switch_interval)
+        return start
+
+
+class _Capture:
+    # stands in for an OSCServer's client while a command is turned into a bundle
+    def __init__(self):
+        self.messages = []
+
+    def send_message(self, address, value):
+        self.messages.append((address, value))
+
+
+def timed_bundle(datagrams, when):
+    return b"#bundle\x00" + osc_types.write_date(when) + b"".join(
+        [struct.pack(">i", len(datagram)) + datagram for datagram in datagrams])
+
+
+class CueRunner:
+    def __init__(self, servers, scheduler=None, lead=0.0):
+        self.servers = servers
+        self.scheduler = scheduler or CueScheduler()
+        self.lead = lead
+        self.fired = 0
+        self._wall_start = None
+
+    def fire(self, cue):
+        server = self.servers[cue.panel]
+        method = getattr(server, "send_" + cue.command)
+        if not self.lead:
+            method(*cue.call_args)
+            server.client.flush()
+        else:
+            client, capture = server.client, _Capture()
+            server.client = capture
+            try:
+                method(*cue.call_args)
+            finally:
+                server.client = client
+            datagrams = [client.encode(address, value) for address, value in capture.messages]
+            bundle = timed_bundle(datagrams, self._wall_start + cue.at)
+            send_encoded = getattr(client, "send_encoded", None)
+            if send_encoded is None:
+                client.send_datagram(bundle)
+            else:
+                send_encoded([address for address, value in capture.messages], bundle)
+            client.flush()
+        self.fired += 1
+
+    async def run(self, cues):
+        for cue in cues:
+            check_cue(type(self.servers[cue.panel]), cue)
+        # the wall clock is read once; timetags are offsets from it
+        start = self.scheduler.clock() + max(self.lead, 0.1)
+        self._wall_start = time.time() + (start - self.scheduler.clock())
+        await self.scheduler.run(cues, self.fire, lead=self.lead, start=start)
+
+
+async def connect(panels, bind_port=0, panel_modules=PANELS, group=False, robots=None):
+    # One endpoint for every panel the sheet uses; bound so robots with the
+    # "reliable" or "latency" features can answer. With `group` each panel
+    # sends to every registered instance of its server, with `robots` to
+    # that list of robots.
+    modules = {panel: importlib.import_module(panel_modules[panel]) for panel in panels}
+    server_names = [module.ROBOT_SERVER for module in modules.values()]
+    if group or robots:
+        robots = await resolve_groups(server_names, robots)
+    else:
+        # no background revalidation: its first request imports requests,
+        # which would take the CPU away from the scheduler mid-show
+        robots = await get_registry_client().resolve_many(server_names, revalidate=False)
+    missing = [name for name, server_data in robots.items() if server_data is None]
+    if missing:
+        raise RegistryError(f"Not registered: {', '.join(missing)}")
+    peer = next(iter(robots.values()))["ip_address"]
+    endpoint = await OSCEndpoint(await get_ip(peer), bind_port).start()
+    servers = {panel: module.OSCServer(robot_data=robots[module.ROBOT_SERVER], endpoint=endpoint)
+               for panel, module in modules.items()}
+    return endpoint, servers
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Fire a cue sheet of OSC commands on schedule")
+    parser.add_argument('cue_file')
+    parser.add_argument('--timetag-lead', type=float, default=0.0,
+                        help="send each cue this many seconds early in a timetagged bundle")
+    parser.add_argument('--bind-port', type=int, default=0)
+    parser.add_argument('--group', action='store_true',
+                        help="send every cue to all registered instances of its panel's server")
+    parser.add_argument('--robots', nargs='+', type=parse_robot, metavar='HOST:PORT',
+                        help="send every cue to these robots")
+    parser.add_argument('--strategy', choices=STRATEGIES,
+                        help="how the registry picks between several instances of a server "
+                             "(default: $TALKSHOW_SELECTION or latest)")
+    parser.add_argument('--check', action='store_true', help="validate the cue sheet and exit")
+    args = parser.parse_args()
+
+    if args.strategy:
+        get_registry_client().strategy = args.strategy
+
+    cues = load_cues(args.cue_file)
+    check_cues(cues)
+    if args.check:
+        print(f"{len(cues)} cues OK, last at T+{cues[-1].at:g}s" if cues else "No cues")
+        return
+
+    endpoint, servers = await connect(dict.fromkeys(cue.panel for cue in cues), args.bind_port,
+                                      group=args.group, robots=args.robots)
+    runner = CueRunner(servers, lead=args.timetag_lead)
+
+    print(f"Running {len(cues)} cues" + (f", timetagged {args.timetag_lead * 1000:.0f} ms ahead"
+                                          if args.timetag_lead else ""))
+    try:
+        await runner.run(cues)
+        await asyncio.sleep(0.1)
+    finally:
+        group_stats = endpoint.group_stats()
+        endpoint.close()
+        get_registry_client().close()
+
+    lateness = runner.scheduler.lateness
+    print(f"{runner.fired} cues fired, lateness p50 {lateness.percentile(50):.0f} us "
+          f"p99 {lateness.percentile(99):.0f} us max {lateness.max:.0f} us, "
+          f"{runner.scheduler.late} late, spin margin {runner.scheduler.spin * 1000:.1f} ms")
+    for member, stats in group_stats.items():
+        print(f"{member}: {stats['sent']} sent, {stats['errors']} failed")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,277 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from pythonosc.dispatcher import Dispatcher
+from pythonosc.osc_message_builder import OscMessageBuilder
+from camera_targets import ADDED_ADDRESS, REMOVED_ADDRESS, SNAPSHOT_ADDRESS
+from osc_chunking import MAX_DATAGRAM_SIZE, ChunkSplitter, map_chunk_handler
+from osc_latency import map_timed_handler
+from osc_reliable import map_reliable_handler
+from osc_tcp import SlipDecoder
+from registry_client import RegistryClient
+from registry_url import REGISTRY_URL
+
+# Local stand-in for the robot's OSC server, for exercising the GUIs and the
+# transport code without the real robot.
+#   python fake_robot.py --port 9000 --drop 0.2
+#   python fake_robot.py --register --registry-url http://127.0.0.1:5000 --targets 200
+#
+# Every address is accepted and logged. drop_rate simulates a lossy network:
+# that fraction of inbound UDP datagrams and outbound acks is discarded.
+#
+# With `targets` it keeps a camera target list the way the robot does: the
+# camera and full panels announce where they listen (/camera_client_data,
+# /full_client_data), /get_camera_targets answers every panel that did with
+# a versioned snapshot (see camera_targets.py), and /record_camera_target and
+# /delete_camera_target send deltas. Snapshots too big for one datagram go
+# out as /chunk messages, which every GUI endpoint reassembles.
+#
+# register() puts it in central_registry.py under all the names the GUIs
+# look up and keeps the leases alive.
+ROBOT_SERVERS = ("chat_server", "producer_server", "camera_server", "full_server")
+
+
+class RobotProtocol(asyncio.DatagramProtocol):
+    def __init__(self, robot):
+        self.robot = robot
+
+    def datagram_received(self, data, addr):
+        self.robot.datagram_received(data, addr)
+
+
+class FakeRobot:
+    def __init__(self, ip="127.0.0.1", port=0, tcp=False, verbose=False, drop_rate=0.0, targets=None):
+        self.ip = ip
+        self.port = port
+        self.tcp = tcp
+        self.verbose = verbose
+        self.drop_rate = drop_rate
+        self.received = []
+        self.dropped = 0
+        self.handled = 0
+        self._handled_at_report = 0
+        self.transport = None
+        self.tcp_server = None
+        self.registry = None
+        self._keep_alive = None
+
+        self.dispatcher = Dispatcher()
+        self.dispatcher.set_default_handler(self.default_handler, needs_reply_address=True)
+        self.reassembler = map_chunk_handler(self.dispatcher)
+        self.duplicate_filter = map_reliable_handler(self.dispatcher, self.send_to)
+        map_timed_handler(self.dispatcher, self.send_to)
+
+        self.targets = None
+        if targets is not None:
+            self.targets = dict.fromkeys(f"target_{i}" for i in range(targets))
+            # a restarted robot starts a new epoch
+            self.epoch = int(time.time()) & 0x7FFFFFFF
+            self.version = 1
+            self.target_clients = {}
+            self._splitter = ChunkSplitter()
+            self.dispatcher.map("/camera_client_data", self.client_data_handler)
+            self.dispatcher.map("/full_client_data", self.client_data_handler)
+            self.dispatcher.map("/get_camera_targets", self.get_targets_handler)
+            self.dispatcher.map("/record_camera_target", self.record_target_handler)
+            self.dispatcher.map("/delete_camera_target", self.delete_target_handler)
+
+    def _drop(self):
+        if self.drop_rate and random.random() < self.drop_rate:
+            self.dropped += 1
+            return True
+        return False
+
+    def datagram_received(self, data, addr):
+        if not self._drop():
+            self.handled += 1
+            self.dispatcher.call_handlers_for_packet(data, addr)
+
+    def send_to(self, datagram, address):
+        if self.transport is not None and not self._drop():
+            self.transport.sendto(datagram, address)
+
+    def default_handler(self, client_address, addr, *args):
+        self.received.append((addr, args))
+        if self.verbose:
+            print(f"OSC Message {addr!r} from {client_address[0]}:{client_address[1]}", repr(args)[:200])
+
+    # CAMERA TARGETS ############################################################
+
+    def client_data_handler(self, address, data):
+        try:
+            info = json.loads(data)
+            self.target_clients[address] = (info['ip'], info['port'])
+        except (TypeError, ValueError, KeyError):
+            print(f"Ignoring malformed {address}: {data!r}")
+
+    def get_targets_handler(self, address, *args):
+        self.send_targets(SNAPSHOT_ADDRESS, self.targets)
+
+    def record_target_handler(self, address, name=None, *args):
+        if isinstance(name, str) and name not in self.targets:
+            self.targets[name] = None
+            self.version += 1
+            self.send_targets(ADDED_ADDRESS, [name])
+
+    def delete_target_handler(self, address, name=None, *args):
+        if name in self.targets:
+            del self.targets[name]
+            self.version += 1
+            self.send_targets(REMOVED_ADDRESS, [name])
+
+    def send_targets(self, address, names):
+        builder = OscMessageBuilder(address)
+        builder.add_arg(self.epoch)
+        builder.add_arg(self.version)
+        for name in names:
+            builder.add_arg(name)
+        datagram = builder.build().dgram
+        datagrams = self._splitter.split(datagram) if len(datagram) > MAX_DATAGRAM_SIZE else [datagram]
+        for destination in set(self.target_clients.values()):
+            for part in datagrams:
+                self.send_to(part, destination)
+
+    # REGISTRY ############################################################
+
+    def report_load(self):
+        # datagrams handled since the last heartbeat, for least_loaded balancing
+        load, self._handled_at_report = self.handled - self._handled_at_report, self.handled
+        return load
+
+    async def register(self, registry_url=REGISTRY_URL, server_names=ROBOT_SERVERS, ttl=10.0, features=None,
+                       report_load=None, instance_id=None):
+        # Registers every name in one request, then renews the leases in the
+        # background until stop(), reporting report_load() (by default the
+        # datagrams handled since the last heartbeat) with each one. Several
+        # fake robots need their own instance_id to be registered side by side.
+        self.registry = RegistryClient(registry_url=registry_url, cache_file=os.devnull)
+        if self.ip in ("", "0.0.0.0"):
+            # osc_endpoint imports Kivy, which a robot has no use for otherwise
+            from osc_endpoint import local_ip
+            ip_address = local_ip()
+        else:
+            ip_address = self.ip
+        registrations = [{'server_name': name, 'ip_address': ip_address, 'port': self.port, 'ttl': ttl}
+                         for name in server_names]
+        for registration in registrations:
+            if features:
+                registration['features'] = list(features)
+            if self.tcp:
+                registration['transport'] = "tcp"
+            if instance_id:
+                registration['instance_id'] = instance_id
+        leases = await self.registry.register_many(registrations)
+        self._keep_alive = asyncio.ensure_future(self.registry.keep_registered_many(
+            registrations, ttl, leases, report_load=report_load or self.report_load))
+        return leases
+
+    async def start(self):
+        self.transport, _ = await asyncio.get_running_loop().create_datagram_endpoint(
+            lambda: RobotProtocol(self), local_addr=(self.ip, self.port))
+        self.port = self.transport.get_extra_info("sockname")[1]
+        if self.tcp:
+            # SLIP-framed OSC 1.1 stream on the same port number
+            self.tcp_server = await asyncio.start_server(self.handle_tcp_client, self.ip, self.port)
+        return self
+
+    async def handle_tcp_client(self, reader, writer):
+        peer = writer.get_extra_info("peername")
+        decoder = SlipDecoder()
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                for datagram in decoder.feed(data):
+                    self.handled += 1
+                    self.dispatcher.call_handlers_for_packet(datagram, peer)
+        except OSError:
+            pass
+        finally:
+            writer.close()
+
+    def stop(self):
+        if self._keep_alive is not None:
+            self._keep_alive.cancel()
+            self._keep_alive = None
+        if self.registry is not None:
+            self.registry.close()
+            self.registry = None
+        if self.transport is not None:
+            self.transport.close()
+            self.transport = None
+        if self.tcp_server is not None:
+            self.tcp_server.close()
+            self.tcp_server = None
+
+
+def run_in_thread(robot, registry_url=None, **register_args):
+    # Starts `robot` on a thread with its own event loop, the way a separate
+    # robot process would run next to the code under test, and registers it
+    # if `registry_url` is given. Returns a function that stops it.
+    started = threading.Event()
+    state = {}
+
+    async def serve():
+        try:
+            await robot.start()
+            if registry_url:
+                await robot.register(registry_url, **register_args)
+        except BaseException as e:
+            state['error'] = e
+            started.set()
+            robot.stop()
+            return
+        state['loop'] = asyncio.get_running_loop()
+        state['stopping'] = asyncio.Event()
+        started.set()
+        await state['stopping'].wait()
+        robot.stop()
+
+    thread = threading.Thread(target=asyncio.run, args=(serve(),), name="fake-robot", daemon=True)
+    thread.start()
+    started.wait()
+    if 'error' in state:
+        raise state['error']
+
+    def stop():
+        state['loop'].call_soon_threadsafe(state['stopping'].set)
+        thread.join()
+    return stop
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Stand-in robot OSC server")
+    parser.add_argument('--ip', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=9000)
+    parser.add_argument('--tcp', action='store_true', help="also accept SLIP-framed OSC over TCP")
+    parser.add_argument('--drop', type=float, default=0.0, help="fraction of UDP datagrams to drop (0-1)")
+    parser.add_argument('--targets', type=int, default=10, help="camera targets to answer /get_camera_targets with")
+    parser.add_argument('--register', nargs='*', metavar='SERVER_NAME',
+                        help=f"register in the central registry (default names: {', '.join(ROBOT_SERVERS)})")
+    parser.add_argument('--registry-url', default=REGISTRY_URL)
+    parser.add_argument('--ttl', type=float, default=10.0)
+    parser.add_argument('--instance-id', help="register next to other robots under the same names")
+    parser.add_argument('--features', nargs='*', default=[],
+                        help="registered protocol extensions, e.g. chunking reliable latency")
+    parser.add_argument('--quiet', action='store_true', help="do not print every message")
+    args = parser.parse_args()
+
+    robot = await FakeRobot(args.ip, args.port, tcp=args.tcp, verbose=not args.quiet, drop_rate=args.drop,
+                            targets=args.targets).start()
+    print(f"Fake robot listening on {robot.ip}:{robot.port} with {args.targets} camera targets")
+    if args.register is not None:
+        if not args.registry_url:
+            parser.error("--register needs --registry-url (REGISTRY_URL is not set)")
+        names = args.register or ROBOT_SERVERS
+        await robot.register(args.registry_url, names, ttl=args.ttl, features=args.features,
+                             instance_id=args.instance_id)
+        print(f"Registered {', '.join(names)} at {args.registry_url}")
+    await asyncio.get_running_loop().create_future()
+
+if __name__ == "__main__":
+    asyncio.run(main())
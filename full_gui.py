@@ -1,56 +1,73 @@
 from kivy.app import App
 from kivy.uix.button import Button
 from kivy.uix.boxlayout import BoxLayout
-from kivy.uix.popup import Popup
-from kivy.uix.textinput import TextInput
 import asyncio
-from pythonosc.dispatcher import Dispatcher
-from pythonosc.osc_server import AsyncIOOSCUDPServer
-from pythonosc.udp_client import SimpleUDPClient
+from camera_targets import CameraTargets, map_target_handlers
+from bootstrap import bootstrap, watch_after_first_frame
+from osc_endpoint import OSCEndpoint
+from osc_log import get_logger
+from session_recorder import record_from_env
 import json
 from kivy.uix.label import Label
-import requests
-import socket
-from kivy.core.window import Window
-from registry_url import REGISTRY_URL
+from kivy.clock import Clock
+import os
+import time
+from target_list import TargetListView
+from registry_client import CACHE_DIR
 
 SERVER_NAME = "full_gui"
 BIND_PORT = 54321
 SERVER_IP = None
+ROBOT_SERVER = "full_server"
 
+log = get_logger(SERVER_NAME)
 
-async def get_ip():
-        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        s.connect(("8.8.8.8", 80))
-        ip = s.getsockname()[0]
-        s.close()
-        print(ip)
-        return ip
 
+class OSCServer:
+    def __init__(self, IP=None, robot_data=None, endpoint=None):
 
-async def get_robot_server_data():
-        response = requests.get(f'{REGISTRY_URL}/servers/full_server')
-        return response.json()
+        self.endpoint = endpoint if endpoint is not None else OSCEndpoint(IP, BIND_PORT)
+        self.IP = self.endpoint.ip
+        self.BIND_PORT = self.endpoint.bind_port
+        self.app = None
+        self.robot_data = robot_data
+        self.robot_ip = robot_data["ip_address"]
+        self.robot_port = robot_data["port"]
+    
+        self.dispatcher = self.endpoint.dispatcher
+        self.latency = self.endpoint.latency
+        self.ui_updates = self.endpoint.ui_updates
 
+        self.client = self.endpoint.client_for(robot_data)
+        self.targets = map_target_handlers(self.dispatcher, CameraTargets(
+            os.path.join(CACHE_DIR, SERVER_NAME + "_camera_targets.json"),
+            on_change=self.on_targets_changed, request_resync=self.send_get_saved_camera_targets))
 
-class OSCServer:
-    def __init__(self, IP, robot_data=None):
 
-        self.IP = IP
-        self.BIND_PORT = BIND_PORT
+    def set_robot_endpoint(self, robot_data):
+        if robot_data == self.robot_data:
+            return
+        self.robot_data = robot_data
         self.robot_ip = robot_data["ip_address"]
         self.robot_port = robot_data["port"]
-    
-        self.client = SimpleUDPClient(self.robot_ip, self.robot_port)
-        self.targets = [] 
+        self.client.close()
+        self.client = self.endpoint.client_for(robot_data)
+        print(f"Robot endpoint changed to {self.robot_ip}:{self.robot_port}")
+        # the robot has to learn where this GUI listens again
+        self.announce()
+
+    def announce(self):
+        self.send_client_data()
+        self.send_get_saved_camera_targets()
      
 
-    def default_handler(self, addr, *args):
-        print(f"OSC Message {addr!r}", repr(args))
-        if addr == "/send_camera_targets":
-            print("Recieved targets")
-            self.targets = list(args)
-            App.get_running_app().update_buttons(self.targets)
+    def on_targets_changed(self, targets):
+        self.ui_updates.post("camera_targets", self.render_targets)
+
+    def render_targets(self):
+        log.info("%d camera targets", len(self.targets))
+        if self.app is not None:
+            self.app.update_buttons(self.targets.names())
 
     def send_client_data(self):
         data = {
@@ -104,7 +121,7 @@ class OSCServer:
         self.client.send_message("/look_at_camera_target", name)
 
     def load_targets(self):
-        self.targets = self.send_get_saved_camera_targets()
+        self.send_get_saved_camera_targets()
 
     def send_look_around(self, test):
         self.client.send_message("/look_around", [])
@@ -155,16 +172,11 @@ class OSCServer:
 
     # RUN SERVER #############################################################
     
-    async def run_server(self):
+    async def run_server(self, osc_app=None):
     
-        dispatcher = Dispatcher()
-        dispatcher.set_default_handler(self.default_handler)
-        server = AsyncIOOSCUDPServer((self.IP, self.BIND_PORT), dispatcher, asyncio.get_event_loop())
-        _, _ = await server.create_serve_endpoint()
-        self.send_client_data()
-        osc_app = OSCApp(osc_server=self)
+        await self.endpoint.start()
+        osc_app = osc_app or OSCApp(osc_server=self)
         asyncio.ensure_future(osc_app.async_run(async_lib='asyncio'))
-        self.send_get_saved_camera_targets()
         print("Server started successfully. Waiting for messages...")
 
         await asyncio.get_event_loop().create_future()
@@ -179,10 +191,13 @@ class OSCApp(App):
         if self.osc_server:
             self.osc_server.send_stop_chat_controller("")
 
-        Window.bind(on_request_close=self.on_request_close)
         self.chat_controller_active = False  
         self.manual_listen_enabled = False
 
+    def on_start(self):
+        from kivy.core.window import Window
+        Window.bind(on_request_close=self.on_request_close)
+
     def build(self):
 
         self.main_layout = BoxLayout(orientation='horizontal')
@@ -191,6 +206,10 @@ class OSCApp(App):
         self.column2 = BoxLayout(orientation='vertical', width=200)
         self.column3 = BoxLayout(orientation='vertical', width=200)
         self.column4 = BoxLayout(orientation='vertical', width=200)
+
+        self.root_layout = BoxLayout(orientation='vertical')
+        self.root_layout.add_widget(self.main_layout)
+        self.root_layout.add_widget(self.build_latency_panel())
         
 
 
@@ -208,9 +227,42 @@ class OSCApp(App):
         self.add_column1_buttons()
         self.add_column2_buttons()
         self.add_column3_buttons()
+        self.add_column4_buttons()
+        self.target_list = TargetListView(on_look_at=self.osc_server.send_look_at_camera_target,
+                                          on_delete=self.delete_target,
+                                          on_look_around=self.osc_server.send_look_around_camera_target,
+                                          row_height=44, delete_text="Del", look_around_text="Look")
+        self.column4.add_widget(self.target_list)
+        # last known list from the cache until the robot answers
+        self.target_list.update(self.osc_server.targets.names())
+        self.osc_server.app = self
        
         
-        return self.main_layout
+        return self.root_layout
+
+    def build_latency_panel(self):
+        panel = BoxLayout(orientation='horizontal', size_hint_y=None, height=30)
+        self.latency_label = Label(text="Latency: no echoes yet", halign='left', valign='middle')
+        self.latency_label.bind(size=self.latency_label.setter('text_size'))
+        panel.add_widget(self.latency_label)
+        panel.add_widget(Button(text="Export latency", size_hint_x=None, width=150, on_press=self.export_latency))
+        Clock.schedule_interval(self.update_latency_panel, 1.0)
+        return panel
+
+    def update_latency_panel(self, dt):
+        ui = self.osc_server.ui_updates.stats()
+        text = (f"UI queue {ui['depth']} (max {ui['max_depth']}, {ui['coalesced']} coalesced) "
+                f"drain p99 {ui['drain_p99_us'] / 1000:.2f} ms")
+        rows = self.osc_server.latency.summary()
+        if rows:
+            text = "Latency  " + "   ".join(
+                f"{address} p50 {p50:.1f} ms p99 {p99:.1f} ms" for address, _, p50, p99 in rows[:3]) + "   |   " + text
+        self.latency_label.text = text
+
+    def export_latency(self, instance):
+        path = os.path.join(CACHE_DIR, time.strftime("latency-%Y%m%d-%H%M%S.json"))
+        self.osc_server.latency.export(path)
+        print(f"Latency histograms written to {path}")
     
     def on_request_close(self, *args, **kwargs):
 
@@ -300,47 +352,23 @@ class OSCApp(App):
     def add_column4_buttons(self):
 
         self.column4.add_widget(Label(text='Camera Targets', size_hint_y=None, height=30))
-        self.column4.add_widget(Button(text="Create new camera target", on_press=self.initiate_new_target_creation))
-        self.column4.add_widget(Button(text="Look around", on_press=self.osc_server.send_look_around))
+        self.column4.add_widget(Button(text="Create new camera target", size_hint_y=None, height=44,
+                                       on_press=self.initiate_new_target_creation))
+        self.column4.add_widget(Button(text="Look around", size_hint_y=None, height=44,
+                                       on_press=self.osc_server.send_look_around))
       
 
     def update_buttons(self, targets):
-      
-        self.column4.clear_widgets()  
-        self.add_column4_buttons()  
-        
-        for target in targets:
-            
-            target_layout = BoxLayout(orientation='horizontal', size_hint_y=None, height=44)
-            
-            
-            target_btn = Button(text=target, size_hint_x=0.5)
-            target_btn.bind(on_press=lambda instance, t=target: self.osc_server.send_look_at_camera_target(t))
-            
-         
-            delete_btn = Button(text="Del", size_hint_x=0.25)
-            delete_btn.bind(on_press=lambda instance, t=target: self.delete_target(t))
-            
-           
-            look_around_btn = Button(text="Look", size_hint_x=0.25)
-            look_around_btn.bind(on_press=lambda instance, t=target: self.osc_server.send_look_around_camera_target(t))  
-         
-            target_layout.add_widget(target_btn)
-            target_layout.add_widget(delete_btn)
-            target_layout.add_widget(look_around_btn)
-            
-      
-            self.column4.add_widget(target_layout)
+        self.target_list.update(targets)
 
     def delete_target(self, target):
         self.osc_server.send_delete_camera_target(target)
-
-        if target in self.osc_server.targets:
-            self.osc_server.targets.remove(target)
-        self.update_buttons(self.osc_server.targets)
+        self.osc_server.targets.discard(target)
 
 
     def show_input_popup(self, title, hint_text, send_method):
+        from kivy.uix.popup import Popup
+        from kivy.uix.textinput import TextInput
         popup_layout = BoxLayout(orientation='vertical', spacing=10, padding=10)
         input_field = TextInput(hint_text=hint_text, size_hint_y=None, height=44)
         send_btn = Button(text='Send', size_hint_y=None, height=50)
@@ -376,16 +404,26 @@ class OSCApp(App):
         self.osc_server.send_create_new_camera_target()  
         self.show_input_popup("Create New Camera Target", "Enter target name", self.osc_server.send_record_camera_target)
 
+
+def make_server(robot_data, endpoint):
+    server = OSCServer(endpoint.ip, robot_data=robot_data, endpoint=endpoint)
+    server.announce()
+    return server
+
+
 async def main():
     try:
-        robot_server_data = await get_robot_server_data()
-        SERVER_IP = await get_ip()
-
-        server = OSCServer(SERVER_IP, robot_data=robot_server_data)
-        await server.run_server()  
+        server = await bootstrap([ROBOT_SERVER], lambda endpoint, robots: make_server(robots[ROBOT_SERVER], endpoint),
+                                 bind_port=BIND_PORT)
+        watch_after_first_frame(ROBOT_SERVER, server.set_robot_endpoint)
+        osc_app = OSCApp(osc_server=server)
+        # after the app's startup stop_chat_controller, which is not an operator action
+        record_from_env({'full': server})
+        await server.run_server(osc_app)  
     
     except KeyboardInterrupt:
         server.client.send_message("/stop_chat_controller", [])
+        server.client.flush()
         print("Server closed manually.")
 
 if __name__ == "__main__":
@@ -0,0 +1,132 @@
+import itertools
+import struct
+import time
+import zlib
+from pythonosc.parsing import osc_types
+
+# Datagrams above MAX_DATAGRAM_SIZE are split into /chunk messages that each
+# fit in one Ethernet frame, so a lost IP fragment costs one chunk instead of
+# silently dropping the whole command.
+#
+#   /chunk  message_id:i  seq:i  total:i  flags:i  payload:b
+#
+# The payloads of chunks 0..total-1 concatenate to the original datagram,
+# zlib-compressed when flags has FLAG_ZLIB set. Only datagrams over
+# MAX_DATAGRAM_SIZE reach split(), and each is compressed when that makes it
+# smaller. The receiver takes at most MAX_CHUNKS chunks per message and
+# MAX_MESSAGE_SIZE bytes, before and after decompression, since `total` and
+# the payloads come straight off the network.
+CHUNK_ADDRESS = "/chunk"
+MAX_DATAGRAM_SIZE = 1200
+CHUNK_PAYLOAD_SIZE = 1152
+MAX_MESSAGE_SIZE = 1 << 20
+MAX_CHUNKS = -(-MAX_MESSAGE_SIZE // CHUNK_PAYLOAD_SIZE)
+FLAG_ZLIB = 1
+
+CHUNK_PREFIX = osc_types.write_string(CHUNK_ADDRESS) + osc_types.write_string(",iiiib")
+
+
+class ChunkSplitter:
+    def __init__(self, payload_size=CHUNK_PAYLOAD_SIZE, compress=True):
+        self.payload_size = payload_size
+        self.compress = compress
+        self._message_ids = itertools.count(1)
+
+    def split(self, datagram):
+        if len(datagram) > MAX_MESSAGE_SIZE:
+            raise ValueError(f"{len(datagram)} byte datagram is over the {MAX_MESSAGE_SIZE} byte chunking limit")
+        flags = 0
+        if self.compress:
+            compressed = zlib.compress(datagram, 6)
+            if len(compressed) < len(datagram):
+                datagram = compressed
+                flags |= FLAG_ZLIB
+
+        message_id = next(self._message_ids) & 0x7FFFFFFF
+        total = -(-len(datagram) // self.payload_size)
+        if total > MAX_CHUNKS:
+            raise ValueError(f"{total} chunks is over the {MAX_CHUNKS} chunk limit")
+        return [CHUNK_PREFIX + struct.pack(">iiii", message_id, seq, total, flags)
+                + osc_types.write_blob(datagram[seq * self.payload_size:(seq + 1) * self.payload_size])
+                for seq in range(total)]
+
+
+class ChunkReassembler:
+    # Collects /chunk messages per (sender, message_id). Partial messages are
+    # dropped after `timeout` seconds, and at most `max_partial` are held at
+    # once, each at most MAX_MESSAGE_SIZE bytes; messages over the limits
+    # are counted in `rejected`.
+    def __init__(self, timeout=5.0, max_partial=64):
+        self.timeout = timeout
+        self.max_partial = max_partial
+        self._partial = {}
+        self.completed = 0
+        self.expired = 0
+        self.rejected = 0
+
+    def feed(self, source, message_id, seq, total, flags, payload):
+        if not 0 <= seq < total <= MAX_CHUNKS:
+            if total > MAX_CHUNKS:
+                self.rejected += 1
+            return None
+        now = time.monotonic()
+        key = (source, message_id)
+        entry = self._partial.get(key)
+        if entry is None:
+            self._evict(now)
+            entry = self._partial[key] = [now, flags, [None] * total, 0, 0]
+        parts = entry[2]
+        if len(parts) != total:
+            return None
+        if parts[seq] is None:
+            entry[4] += len(payload)
+            if entry[4] > MAX_MESSAGE_SIZE:
+                del self._partial[key]
+                self.rejected += 1
+                return None
+            parts[seq] = payload
+            entry[3] += 1
+        if entry[3] < total:
+            return None
+
+        del self._partial[key]
+        datagram = b"".join(parts)
+        if entry[1] & FLAG_ZLIB:
+            decompressor = zlib.decompressobj()
+            datagram = decompressor.decompress(datagram, MAX_MESSAGE_SIZE)
+            # over the limit, or a truncated stream that would dispatch half a datagram
+            if decompressor.unconsumed_tail or not decompressor.eof:
+                self.rejected += 1
+                return None
+        self.completed += 1
+        return datagram
+
+    def _evict(self, now):
+        for key in [key for key, entry in self._partial.items() if now - entry[0] > self.timeout]:
+            del self._partial[key]
+            self.expired += 1
+        while len(self._partial) >= self.max_partial:
+            del self._partial[next(iter(self._partial))]
+            self.expired += 1
+
+
+def map_chunk_handler(dispatcher, reassembler=None):
+    # Reassembled datagrams go back through the same dispatcher, so handlers
+    # never know whether a message arrived whole or in chunks.
+    reassembler = reassembler or ChunkReassembler()
+
+    def chunk_handler(client_address, address, *args):
+        if len(args) != 5 or not isinstance(args[4], bytes):
+            return
+        # the header comes off the network: a ,ffffb message must not reach [None] * total
+        if any(type(arg) is not int for arg in args[:4]):
+            return
+        try:
+            datagram = reassembler.feed(client_address, *args)
+        except zlib.error:
+            return
+        if datagram is not None:
+            dispatcher.call_handlers_for_packet(datagram, client_address)
+
+    dispatcher.map(CHUNK_ADDRESS, chunk_handler, needs_reply_address=True)
+    return reassembler
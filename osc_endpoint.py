@@ -0,0 +1,143 @@
+import asyncio
+import socket
+from pythonosc.osc_server import AsyncIOOSCUDPServer
+from osc_chunking import map_chunk_handler
+from osc_fanout import FanOutSender
+from osc_journal import get_journal
+from osc_latency import map_echo_handler
+from osc_routing import RoutedDispatcher
+from robot_client import make_robot_client
+from ui_updates import UIUpdateQueue
+
+
+def local_ip(peer=None):
+    # The address this machine sends from towards `peer` (the robot), or
+    # towards the internet when there is no peer yet. Connecting a UDP socket
+    # only asks the routing table, nothing goes out; on a show network with
+    # no route to 8.8.8.8 the robot's own address still works, and failing
+    # both, the hostname's address or loopback. A robot on this machine
+    # answers on loopback, but a LAN address keeps working if it moves.
+    for target in (peer, "8.8.8.8"):
+        if not target:
+            continue
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+                s.connect((target, 80))
+                ip = s.getsockname()[0]
+        except OSError:
+            continue
+        if not ip.startswith("127."):
+            return ip
+    try:
+        return socket.gethostbyname(socket.gethostname())
+    except OSError:
+        return "127.0.0.1"
+
+
+async def get_ip(peer=None):
+    ip = local_ip(peer)
+    print(ip)
+    return ip
+
+
+def client_key(robot_data):
+    # panels sending to the same robot, or the same group, share a client
+    if "members" in robot_data:
+        return ("group",) + tuple(sorted(client_key(member) for member in robot_data["members"]))
+    return (robot_data["ip_address"], robot_data["port"], robot_data.get("transport") or "",
+            tuple(sorted(robot_data.get("features", ()))))
+
+
+class SharedClient:
+    # A panel's handle on a shared client stack; close() only lets go of it.
+    def __init__(self, endpoint, key, client):
+        self._endpoint = endpoint
+        self._key = key
+        self.client = client
+
+    def send_message(self, address, value):
+        self.client.send_message(address, value)
+
+    def send_datagram(self, datagram):
+        self.client.send_datagram(datagram)
+
+    def send_encoded(self, addresses, datagram):
+        # acknowledged delivery when the client stack has it (ReliableSender)
+        send_encoded = getattr(self.client, "send_encoded", None)
+        if send_encoded is None:
+            self.client.send_datagram(datagram)
+        else:
+            send_encoded(addresses, datagram)
+
+    def encode(self, address, value):
+        return self.client.encode(address, value)
+
+    def flush(self):
+        self.client.flush()
+
+    def close(self):
+        if self._endpoint is not None:
+            self._endpoint._release(self._key)
+            self._endpoint = None
+
+
+class OSCEndpoint:
+    # Everything a GUI process shares between its panels: one dispatcher and
+    # UDP bind port for whatever the robots send back (camera targets, acks,
+    # latency echoes, chunks), the UI update queue, and one client stack per
+    # robot endpoint however many panels send to it. Panels without a bind
+    # port (chat, producer on their own) pass ip=None and never start().
+    def __init__(self, ip=None, bind_port=None):
+        self.ip = ip
+        self.bind_port = bind_port
+        self.dispatcher = RoutedDispatcher(journal=get_journal())
+        map_chunk_handler(self.dispatcher)
+        self.latency = map_echo_handler(self.dispatcher)
+        self.ui_updates = UIUpdateQueue()
+        self.transport = None
+        self._clients = {}
+
+    async def start(self):
+        if self.transport is None:
+            server = AsyncIOOSCUDPServer((self.ip, self.bind_port), self.dispatcher, asyncio.get_running_loop())
+            self.transport, _ = await server.create_serve_endpoint()
+            # port 0 asks for any free port; the robots need the real one
+            self.bind_port = self.transport.get_extra_info("sockname")[1]
+        return self
+
+    def client_for(self, robot_data):
+        key = client_key(robot_data)
+        entry = self._clients.get(key)
+        if entry is None:
+            client = make_robot_client(robot_data, dispatcher=self.dispatcher, reply_port=self.bind_port)
+            entry = self._clients[key] = [client, 0]
+        entry[1] += 1
+        return SharedClient(self, key, entry[0])
+
+    def _release(self, key):
+        entry = self._clients[key]
+        entry[1] -= 1
+        if entry[1] == 0:
+            del self._clients[key]
+            entry[0].close()
+
+    @property
+    def client_count(self):
+        return len(self._clients)
+
+    def group_stats(self):
+        # {"ip:port": {'sent', 'errors'}} over the members of every group client
+        stats = {}
+        for client, _ in self._clients.values():
+            sender = getattr(client, "sender", None)
+            if isinstance(sender, FanOutSender):
+                stats.update(sender.stats())
+        return stats
+
+    def close(self):
+        for client, _ in self._clients.values():
+            client.close()
+        self._clients.clear()
+        if self.transport is not None:
+            self.transport.close()
+            self.transport = None
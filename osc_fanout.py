@@ -0,0 +1,85 @@
+from osc_chunking import ChunkSplitter, MAX_DATAGRAM_SIZE
+from osc_sender import OSCEncoder, OSCSender, CONSTANT_ADDRESSES
+from osc_tcp import OSCTCPSender
+
+# One panel driving several robots at once. A group is a registry entry with
+# a "members" list (see robot_client.robot_group); every message is encoded
+# once, oversized ones are split into /chunk messages once for the members
+# that announce "chunking", and the same bytes are handed to each member's
+# own sender. Behind an OSCSendQueue the messages of one event loop pass
+# are bundled first, so a flush costs one write per robot rather than one
+# per message per robot.
+#
+# Members keep a connected UDP socket (or a TCP connection) each, so an
+# unreachable robot turns up in its own error count and the others carry
+# on. Acks and latency echoes are per robot and are not used in a group.
+
+
+def member_name(robot_data):
+    return f"{robot_data['ip_address']}:{robot_data['port']}"
+
+
+class FanOutSender(OSCEncoder):
+    def __init__(self, members, dispatcher=None, constant_addresses=CONSTANT_ADDRESSES):
+        super().__init__(constant_addresses)
+        self.dispatcher = dispatcher
+        self._splitter = ChunkSplitter()
+        self._members = []
+        self.sent = 0
+        self.retarget_group(members)
+
+    def _make_member(self, robot_data):
+        # members never encode, so they skip pre-encoding the constant messages
+        if robot_data.get("transport") == "tcp":
+            sender = OSCTCPSender(robot_data["ip_address"], robot_data["port"], dispatcher=self.dispatcher,
+                                  constant_addresses=())
+        else:
+            sender = OSCSender(robot_data["ip_address"], robot_data["port"], constant_addresses=())
+        return member_name(robot_data), sender, "chunking" in robot_data.get("features", ())
+
+    def retarget_group(self, members):
+        old = {name: sender for name, sender, _ in self._members}
+        self._members = []
+        for robot_data in members:
+            name = member_name(robot_data)
+            sender = old.pop(name, None)
+            if sender is None:
+                self._members.append(self._make_member(robot_data))
+            else:
+                self._members.append((name, sender, "chunking" in robot_data.get("features", ())))
+        for sender in old.values():
+            sender.close()
+
+    def send_datagram(self, datagram):
+        chunks = None
+        for _, sender, chunking in self._members:
+            if chunking and len(datagram) > MAX_DATAGRAM_SIZE:
+                if chunks is None:
+                    chunks = self._splitter.split(datagram)
+                for chunk in chunks:
+                    sender.send_datagram(chunk)
+            else:
+                sender.send_datagram(datagram)
+        self.sent += 1
+
+    def send_message(self, address, value):
+        self.send_datagram(self.encode(address, value))
+
+    def stats(self):
+        # per member: datagrams written and the ones that failed (TCP members
+        # count what they had to drop while disconnected)
+        return {name: {'sent': sender.sent,
+                       'errors': getattr(sender, "send_errors", 0) + getattr(sender, "dropped", 0)}
+                for name, sender, _ in self._members}
+
+    @property
+    def send_errors(self):
+        return sum(member['errors'] for member in self.stats().values())
+
+    def __len__(self):
+        return len(self._members)
+
+    def close(self):
+        for _, sender, _ in self._members:
+            sender.close()
+        self._members = []
@@ -0,0 +1,387 @@
+import argparse
+import atexit
+import bisect
+import collections
+import datetime
+import mmap
+import os
+import struct
+import threading
+import time
+from osc_latency import TIMED_PREFIX
+from osc_reliable import RELIABLE_PREFIX
+
+# Binary journal of every OSC packet a GUI sends and receives, for working
+# out after a show what actually went over the wire. Set TALKSHOW_JOURNAL to
+# a directory and each process writes osc-<time>-<pid>.journal there.
+#
+# The send and receive paths only append (time, direction, bytes) to a
+# deque; a background thread packs and writes them every FLUSH_INTERVAL.
+# When the writer falls MAX_PENDING packets behind, packets are dropped and
+# counted rather than stalling the event loop.
+#
+# File layout: MAGIC, then one record per packet
+#
+#   length:u32  time_ns:i64  direction:u8  pad:3  packet:length
+#
+# little-endian, the packet as sent or received: bundles and /reliable and
+# /timed envelopes included, but never as /chunk messages: an outbound
+# packet is recorded before OSCSender splits it, an inbound one once the
+# chunk handler has reassembled it. Every INDEX_EVERY bytes the writer also
+# appends (time_ns, offset) to <journal>.idx, so the reader finds the start
+# of a time range with a binary search instead of a scan. A crash can only
+# leave a torn last record, which the reader ignores; without the index file
+# the reader rebuilds it from the record headers.
+#
+#   python osc_journal.py osc-20261018-193000-4242.journal --address /say_this --start +3600 --end +3660
+JOURNAL_ENV = "TALKSHOW_JOURNAL"
+MAGIC = b"OSCJRNL\x01"
+RECORD = struct.Struct("<IqB3x")
+INDEX = struct.Struct("<qQ")
+INDEX_EVERY = 1 << 12
+FLUSH_INTERVAL = 0.05
+MAX_PENDING = 100000
+INBOUND = 1
+OUTBOUND = 2
+DIRECTIONS = {INBOUND: "in", OUTBOUND: "out"}
+BUNDLE_PREFIX = b"#bundle\x00"
+BUNDLE_FIRST_BYTE = BUNDLE_PREFIX[0]
+# /reliable (session, seq, ack_port) and /timed (stamp, reply_port) carry
+# 12 bytes of arguments and then the command as a blob
+ENVELOPE_PREFIXES = (RELIABLE_PREFIX, TIMED_PREFIX)
+ENVELOPE_ARGS_SIZE = 12
+ENVELOPE_HEADS = frozenset(prefix[:8] for prefix in ENVELOPE_PREFIXES)
+# records are appended in capture order, but two threads can interleave by
+# a little; a time range scan stops only this far past its end
+ORDER_SLACK_NS = 1_000_000_000
+
+_journal = None
+
+
+class OSCJournal:
+    def __init__(self, path, flush_interval=FLUSH_INTERVAL, max_pending=MAX_PENDING, clock=time.time_ns):
+        self.path = path
+        self.clock = clock
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.recorded = 0
+        self.dropped = 0
+        self._pending = collections.deque()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "xb")
+        self._file.write(MAGIC)
+        self._index = open(path + ".idx", "xb")
+        self._offset = len(MAGIC)
+        self._next_index = self._offset
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="osc-journal", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def record(self, direction, packet):
+        # the only part that runs on the send and receive paths
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return
+        self._pending.append((self.clock(), direction, packet))
+
+    def _run(self):
+        while not self._stopping:
+            self._wake.wait(self.flush_interval)
+            self._write()
+        self._write()
+
+    def _write(self):
+        pending = self._pending
+        if not pending:
+            return
+        parts = []
+        index = []
+        offset = self._offset
+        count = 0
+        while pending:
+            timestamp, direction, packet = pending.popleft()
+            if offset >= self._next_index:
+                index.append(INDEX.pack(timestamp, offset))
+                self._next_index = offset + INDEX_EVERY
+            parts.append(RECORD.pack(len(packet), timestamp, direction))
+            parts.append(packet)
+            offset += RECORD.size + len(packet)
+            count += 1
+        # records first: an index entry must never point past the end of the journal
+        self._file.write(b"".join(parts))
+        self._file.flush()
+        if index:
+            self._index.write(b"".join(index))
+            self._index.flush()
+        self._offset = offset
+        self.recorded += count
+
+    def close(self):
+        if self._stopping:
+            return
+        self._stopping = True
+        self._wake.set()
+        self._thread.join()
+        self._file.close()
+        self._index.close()
+
+
+def get_journal():
+    # The process-wide journal when TALKSHOW_JOURNAL is set, else None.
+    global _journal
+    if _journal is None:
+        directory = os.environ.get(JOURNAL_ENV)
+        if not directory:
+            return None
+        path = os.path.join(directory, time.strftime("osc-%Y%m%d-%H%M%S") + f"-{os.getpid()}.journal")
+        _journal = OSCJournal(path)
+        print(f"Journaling OSC traffic to {path}")
+    return _journal
+
+
+def osc_address(packet, start=0, end=None):
+    end = len(packet) if end is None else end
+    stop = packet.find(b"\x00", start, end)
+    return bytes(packet[start:stop if stop >= 0 else end]).decode("utf-8", "replace")
+
+
+class JournalRecord:
+    __slots__ = ("time_ns", "direction", "address", "packet")
+
+    def __init__(self, time_ns, direction, address, packet):
+        self.time_ns = time_ns
+        self.direction = direction
+        self.address = address
+        self.packet = packet
+
+    @property
+    def time(self):
+        return self.time_ns / 1e9
+
+    def __repr__(self):
+        return f"{self.time:.6f} {DIRECTIONS.get(self.direction, '?')} {self.address} ({len(self.packet)} bytes)"
+
+
+class JournalReader:
+    # Memory-mapped view of a journal. records() walks record headers in the
+    # mapping and only copies the packets that match. With an address it does
+    # not walk every header: mmap.find() jumps to the next place the address
+    # bytes occur, and the index gets it back onto a record boundary close
+    # by, so a rare address in a multi-gigabyte show is found at memory speed.
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < len(MAGIC):
+            self._file.close()
+            raise ValueError(f"{path}: not an OSC journal")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{path}: not an OSC journal")
+        self.size = size
+        self._index_times, self._index_offsets = self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.path + ".idx", "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return self._build_index()
+        # (time_ns, offset) pairs of int64; offsets are far below 2**63
+        pairs = memoryview(data[:len(data) - len(data) % INDEX.size]).cast("q")
+        times, offsets = pairs[0::2].tolist(), pairs[1::2].tolist()
+        # entries written after the records they point to, but not after a torn one
+        count = bisect.bisect_left(offsets, self.size)
+        return times[:count], offsets[:count]
+
+    def _build_index(self):
+        times, offsets = [], []
+        next_index = 0
+        for offset, length, timestamp, direction in self._headers(len(MAGIC)):
+            if offset >= next_index:
+                times.append(timestamp)
+                offsets.append(offset)
+                next_index = offset + INDEX_EVERY
+        return times, offsets
+
+    def _headers(self, offset):
+        data, size, unpack, header_size = self._map, self.size, RECORD.unpack_from, RECORD.size
+        while offset + header_size <= size:
+            length, timestamp, direction = unpack(data, offset)
+            end = offset + header_size + length
+            if end > size:
+                # torn write at the end of a crashed session
+                return
+            yield offset, length, timestamp, direction
+            offset = end
+
+    def _find(self, wanted, offset, limit):
+        # headers of the records that contain `wanted` somewhere between
+        # `offset` (a record boundary) and `limit`
+        data = self._map
+        while True:
+            hit = data.find(wanted, offset, limit)
+            if hit < 0:
+                return
+            i = bisect.bisect_right(self._index_offsets, hit) - 1
+            if i >= 0 and self._index_offsets[i] > offset:
+                offset = self._index_offsets[i]
+            for header in self._headers(offset):
+                offset = header[0] + RECORD.size + header[1]
+                if offset > hit:
+                    yield header
+                    break
+            else:
+                return
+
+    def _start_offset(self, start_ns):
+        if start_ns is None or not self._index_offsets:
+            return len(MAGIC)
+        # the last indexed record at or before start, minus the ordering slack
+        i = bisect.bisect_right(self._index_times, start_ns - ORDER_SLACK_NS) - 1
+        return self._index_offsets[i] if i >= 0 else len(MAGIC)
+
+    def _end_offset(self, end_ns):
+        # the first indexed record safely past the end of the range
+        if end_ns is None:
+            return self.size
+        i = bisect.bisect_right(self._index_times, end_ns + ORDER_SLACK_NS)
+        return self._index_offsets[i] if i < len(self._index_offsets) else self.size
+
+    def records(self, start=None, end=None, address=None, direction=None):
+        # start/end: wall-clock seconds as from time.time(). address: an OSC
+        # address, or a prefix ending in "*". Bundles are opened, and the
+        # /reliable and /timed envelopes unwrapped, and the commands in them
+        # matched one by one.
+        start_ns = None if start is None else int(start * 1e9)
+        end_ns = None if end is None else int(end * 1e9)
+        prefix = address is not None and address.endswith("*")
+        wanted = None if address is None else (address[:-1] if prefix else address).encode()
+        data = self._map
+        start_offset = self._start_offset(start_ns)
+        if wanted is None:
+            headers = self._headers(start_offset)
+        else:
+            headers = self._find(wanted, start_offset, self._end_offset(end_ns))
+        header_size = RECORD.size
+        for offset, length, timestamp, record_direction in headers:
+            if end_ns is not None and timestamp > end_ns:
+                if timestamp > end_ns + ORDER_SLACK_NS:
+                    return
+                continue
+            if start_ns is not None and timestamp < start_ns:
+                continue
+            if direction is not None and record_direction != direction:
+                continue
+            begin = offset + header_size
+            end = begin + length
+            if length and (data[begin] == BUNDLE_FIRST_BYTE or data[begin:begin + 8] in ENVELOPE_HEADS):
+                spans = self._messages(begin, end)
+            else:
+                spans = ((begin, end),)
+            for message_start, message_end in spans:
+                if wanted is not None and not self._matches(message_start, message_end, wanted, prefix):
+                    continue
+                yield JournalRecord(timestamp, record_direction, osc_address(data, message_start, message_end),
+                                    data[message_start:message_end])
+
+    def _messages(self, start, end):
+        # (start, end) of each message in the packet, descending into bundles
+        # and envelopes
+        data = self._map
+        if data[start:start + len(BUNDLE_PREFIX)] != BUNDLE_PREFIX:
+            for envelope in ENVELOPE_PREFIXES:
+                blob = start + len(envelope) + ENVELOPE_ARGS_SIZE
+                if blob + 4 > end or data[start:start + len(envelope)] != envelope:
+                    continue
+                size, = struct.unpack_from(">i", data, blob)
+                if 0 < size <= end - blob - 4:
+                    yield from self._messages(blob + 4, blob + 4 + size)
+                    return
+            yield start, end
+            return
+        position = start + len(BUNDLE_PREFIX) + 8
+        while position + 4 <= end:
+            size, = struct.unpack_from(">i", data, position)
+            position += 4
+            if size <= 0 or position + size > end:
+                return
+            yield from self._messages(position, position + size)
+            position += size
+
+    def _matches(self, start, end, wanted, prefix):
+        stop = start + len(wanted)
+        if stop > end or self._map[start:stop] != wanted:
+            return False
+        return prefix or stop == end or self._map[stop] == 0
+
+    def time_range(self):
+        # (first, last) record time in seconds; the last is looked for after
+        # the last index entry only
+        first = next(self._headers(len(MAGIC)), None)
+        if first is None:
+            return None, None
+        tail = self._index_offsets[-1] if self._index_offsets else len(MAGIC)
+        last = max((timestamp for offset, length, timestamp, direction in self._headers(tail)), default=first[2])
+        return first[2] / 1e9, last / 1e9
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def parse_time(text, origin):
+    # "+90" is seconds after the journal starts; anything else an ISO date
+    # and time, or a time of day on the journal's first day
+    if text is None:
+        return None
+    if text.startswith("+"):
+        return origin + float(text[1:])
+    try:
+        return datetime.datetime.fromisoformat(text).timestamp()
+    except ValueError:
+        day = datetime.date.fromtimestamp(origin)
+        return datetime.datetime.combine(day, datetime.time.fromisoformat(text)).timestamp()
+
+
+def describe(packet):
+    from pythonosc.osc_message import OscMessage
+    try:
+        return repr(OscMessage(packet).params)[:200]
+    except Exception:
+        return packet[:64].hex()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search an OSC traffic journal")
+    parser.add_argument('journal')
+    parser.add_argument('--address', help="OSC address, or a prefix ending in *")
+    parser.add_argument('--start', help="+seconds from the start of the journal, an ISO time, or HH:MM:SS")
+    parser.add_argument('--end', help="same forms as --start")
+    parser.add_argument('--direction', choices=["in", "out"])
+    parser.add_argument('--count', action='store_true', help="only count matching messages")
+    args = parser.parse_args()
+
+    reader = JournalReader(args.journal)
+    first, last = reader.time_range()
+    if first is None:
+        print("Empty journal")
+        return
+    direction = {"in": INBOUND, "out": OUTBOUND}.get(args.direction)
+    started = time.perf_counter()
+    matches = 0
+    for record in reader.records(parse_time(args.start, first), parse_time(args.end, first), args.address, direction):
+        matches += 1
+        if not args.count:
+            print(f"{datetime.datetime.fromtimestamp(record.time).isoformat(timespec='microseconds')} "
+                  f"{DIRECTIONS[record.direction]:3s} {record.address} {describe(record.packet)}")
+    elapsed = time.perf_counter() - started
+    print(f"{matches} messages in {elapsed * 1000:.1f} ms, journal {reader.size / 1e6:.1f} MB "
+          f"from {datetime.datetime.fromtimestamp(first):%H:%M:%S} to {datetime.datetime.fromtimestamp(last):%H:%M:%S}")
+    reader.close()
+
+if __name__ == "__main__":
+    main()
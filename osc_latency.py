@@ -0,0 +1,180 @@
+import json
+import os
+import struct
+import time
+from pythonosc.parsing import osc_types
+
+# Round-trip latency probes for robots that announce the "latency" feature.
+# Every outbound command is wrapped as
+#
+#   /timed  stamp:h  reply_port:i  payload:b
+#
+# where stamp is the GUI's time.monotonic_ns() at encode time. The robot
+# answers, as soon as the packet arrives,
+#
+#   /latency_echo  address:s  stamp:h
+#
+# to the GUI's bind port and then handles the payload as usual. The stamp
+# never leaves the GUI's clock domain, so no clock sync is needed.
+TIMED_ADDRESS = "/timed"
+ECHO_ADDRESS = "/latency_echo"
+
+TIMED_PREFIX = osc_types.write_string(TIMED_ADDRESS) + osc_types.write_string(",hib")
+ECHO_PREFIX = osc_types.write_string(ECHO_ADDRESS) + osc_types.write_string(",sh")
+
+# log-linear buckets: 32 per power of two (about 3% resolution), microseconds
+SUB_BUCKET_BITS = 5
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+MAX_TRACKABLE_US = 60 * 1000 * 1000
+
+
+def bucket_index(value):
+    if value < 2 * SUB_BUCKET_COUNT:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    return shift * SUB_BUCKET_COUNT + (value >> shift)
+
+
+def bucket_upper(index):
+    # highest value that lands in bucket `index`
+    if index < 2 * SUB_BUCKET_COUNT:
+        return index
+    shift = index // SUB_BUCKET_COUNT - 1
+    top = index - shift * SUB_BUCKET_COUNT
+    return ((top + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    # HDR-style histogram of latencies in microseconds: constant relative
+    # error, fixed memory, O(1) record.
+    def __init__(self, max_value=MAX_TRACKABLE_US):
+        self.max_value = max_value
+        self.counts = [0] * (bucket_index(max_value) + 1)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def record(self, value):
+        value = min(max(int(value), 0), self.max_value)
+        self.counts[bucket_index(value)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, p):
+        if not self.count:
+            return 0
+        rank = max(1, -(-self.count * p // 100))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(bucket_upper(index), self.max)
+        return self.max
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'min_us': self.min or 0,
+            'mean_us': round(self.mean(), 1),
+            'p50_us': self.percentile(50),
+            'p90_us': self.percentile(90),
+            'p99_us': self.percentile(99),
+            'p999_us': self.percentile(99.9),
+            'max_us': self.max,
+            # non-empty buckets as [highest value, count], enough to merge runs
+            'buckets': [[bucket_upper(index), n] for index, n in enumerate(self.counts) if n],
+        }
+
+
+class LatencyTracker:
+    # One histogram per OSC address, fed by /latency_echo.
+    def __init__(self):
+        self.histograms = {}
+        self.echoes = 0
+
+    def record(self, address, rtt_us):
+        histogram = self.histograms.get(address)
+        if histogram is None:
+            histogram = self.histograms[address] = LatencyHistogram()
+        histogram.record(rtt_us)
+        self.echoes += 1
+
+    def on_echo(self, address, stamp):
+        self.record(address, (time.monotonic_ns() - stamp) // 1000)
+
+    def summary(self):
+        # (address, count, p50 ms, p99 ms), busiest address first
+        rows = [(address, h.count, h.percentile(50) / 1000, h.percentile(99) / 1000)
+                for address, h in self.histograms.items()]
+        rows.sort(key=lambda row: row[1], reverse=True)
+        return rows
+
+    def export(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        data = {address: h.as_dict() for address, h in sorted(self.histograms.items())}
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+        return path
+
+
+class TimedSender:
+    # Wraps an OSCSender or OSCTCPSender and stamps every message it encodes,
+    # so whatever sits on top (send queue, ReliableSender) is unchanged.
+    def __init__(self, sender, reply_port):
+        self.sender = sender
+        self.reply_port = reply_port
+
+    def encode(self, address, value):
+        return (TIMED_PREFIX + struct.pack(">qi", time.monotonic_ns(), self.reply_port)
+                + osc_types.write_blob(self.sender.encode(address, value)))
+
+    def send_datagram(self, datagram):
+        self.sender.send_datagram(datagram)
+
+    def send_message(self, address, value):
+        self.send_datagram(self.encode(address, value))
+
+    def close(self):
+        self.sender.close()
+
+
+def map_echo_handler(dispatcher, tracker=None):
+    # GUI side: records every /latency_echo into `tracker`.
+    tracker = tracker or LatencyTracker()
+
+    def echo_handler(address, *args):
+        if len(args) == 2:
+            tracker.on_echo(*args)
+
+    dispatcher.map(ECHO_ADDRESS, echo_handler)
+    return tracker
+
+
+def map_timed_handler(dispatcher, send_to):
+    # For the robot (or a stand-in): echoes the stamp straight back, then
+    # dispatches the payload. send_to(datagram, (ip, port)) writes a UDP datagram.
+    def timed_handler(client_address, address, *args):
+        if len(args) != 3 or not isinstance(args[2], bytes):
+            return
+        stamp, reply_port, payload = args
+        try:
+            inner_address, _ = osc_types.get_string(payload, 0)
+        except osc_types.ParseError:
+            return
+        send_to(ECHO_PREFIX + osc_types.write_string(inner_address) + struct.pack(">q", stamp),
+                (client_address[0], reply_port))
+        dispatcher.call_handlers_for_packet(payload, client_address)
+
+    dispatcher.map(TIMED_ADDRESS, timed_handler, needs_reply_address=True)
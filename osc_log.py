@@ -0,0 +1,52 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+
+# Console logging for the OSC receive path. Handlers only put the record on a
+# bounded queue; formatting (including repr of message arguments) and the
+# write to stderr happen on a background thread, so a burst of robot
+# telemetry never blocks the event loop on console I/O. When the queue is
+# full, records are dropped and counted instead of waiting.
+QUEUE_SIZE = 10000
+LOG_FORMAT = "%(asctime)s %(name)s %(message)s"
+
+_listener = None
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # QueueHandler formats on the caller's thread; leave that to the listener
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _start_listener():
+    global _listener
+    log_queue = queue.Queue(QUEUE_SIZE)
+    console = logging.StreamHandler(sys.stderr)
+    console.setFormatter(logging.Formatter(LOG_FORMAT))
+    _listener = logging.handlers.QueueListener(log_queue, console, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    root = logging.getLogger("talkshow")
+    root.addHandler(DeferredQueueHandler(log_queue))
+    root.setLevel(logging.INFO)
+    root.propagate = False
+
+
+def get_logger(name):
+    if _listener is None:
+        _start_listener()
+    return logging.getLogger("talkshow." + name)
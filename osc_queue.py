@@ -0,0 +1,129 @@
+import asyncio
+import struct
+from osc_chunking import MAX_DATAGRAM_SIZE
+from osc_journal import OUTBOUND
+
+# Idempotent commands: an identical repeat straight after itself adds nothing.
+# Only back-to-back copies are dropped, so A, B, A still ends on A and an
+# enable, disable, enable toggle still ends enabled.
+COALESCE_ADDRESSES = frozenset((
+    "/stay_on_topic",
+    "/look_at_camera_target",
+    "/look_around",
+    "/look_around_camera_target",
+    "/get_camera_targets",
+    "/enable_manual_listen_mode",
+    "/disable_manual_listen_mode",
+    "/stop_listening",
+))
+
+# keep bundles inside a single Ethernet frame, and small enough that robots
+# taking /chunk messages never get a bundle split into chunks
+MAX_BUNDLE_SIZE = MAX_DATAGRAM_SIZE
+BUNDLE_HEADER = b"#bundle\x00" + struct.pack(">Q", 1)  # timetag 1 means "immediately"
+
+
+def as_coalesce_key(address, value):
+    if isinstance(value, list):
+        value = tuple(value)
+    return address, value
+
+
+class OSCSendQueue:
+    # Wraps an OSCSender. send_message() only appends to a list and schedules
+    # a drain on the next event loop iteration, so a UI callback never touches
+    # the socket. The drain drops back-to-back duplicates of coalescible
+    # commands and packs whatever piled up into as few OSC bundles as fit in
+    # MAX_BUNDLE_SIZE. With a `journal` (osc_journal.py) every packet is
+    # recorded as it goes out.
+    def __init__(self, sender, linger=0.0, bundle=True, coalesce_addresses=COALESCE_ADDRESSES, journal=None):
+        self.sender = sender
+        self.linger = linger
+        self.bundle = bundle
+        self.coalesce_addresses = coalesce_addresses
+        self.journal = journal
+        self._pending = []
+        self._scheduled = None
+        self.enqueued = 0
+        self.coalesced = 0
+        self.packets = 0
+
+    def send_message(self, address, value):
+        self._pending.append((address, value))
+        self.enqueued += 1
+        if self._scheduled is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                # no loop (shutdown, scripts): behave like a plain sender
+                self.flush()
+                return
+            if self.linger > 0:
+                self._scheduled = loop.call_later(self.linger, self.flush)
+            else:
+                self._scheduled = loop.call_soon(self.flush)
+
+    def flush(self):
+        if self._scheduled is not None:
+            self._scheduled.cancel()
+            self._scheduled = None
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+
+        datagrams = []
+        previous = None
+        for address, value in pending:
+            if address is None:
+                # already encoded by the caller
+                datagrams.append(value)
+                previous = None
+                continue
+            if address in self.coalesce_addresses:
+                key = as_coalesce_key(address, value)
+                if key == previous:
+                    self.coalesced += 1
+                    continue
+                previous = key
+            else:
+                previous = None
+            datagrams.append(self.sender.encode(address, value))
+
+        for packet in self._pack(datagrams):
+            self.sender.send_datagram(packet)
+            self.packets += 1
+            if self.journal is not None:
+                self.journal.record(OUTBOUND, packet)
+
+    def _pack(self, datagrams):
+        if not self.bundle or len(datagrams) == 1:
+            yield from datagrams
+            return
+
+        parts = []
+        size = len(BUNDLE_HEADER)
+        for datagram in datagrams:
+            element_size = 4 + len(datagram)
+            if parts and size + element_size > MAX_BUNDLE_SIZE:
+                yield self._bundle(parts)
+                parts = []
+                size = len(BUNDLE_HEADER)
+            parts.append(datagram)
+            size += element_size
+        if parts:
+            yield self._bundle(parts)
+
+    def _bundle(self, parts):
+        if len(parts) == 1:
+            return parts[0]
+        return BUNDLE_HEADER + b"".join([struct.pack(">i", len(part)) + part for part in parts])
+
+    def encode(self, address, value):
+        return self.sender.encode(address, value)
+
+    def send_datagram(self, datagram):
+        self.send_message(None, datagram)
+
+    def close(self):
+        self.flush()
+        self.sender.close()
@@ -0,0 +1,226 @@
+import asyncio
+import collections
+import itertools
+import random
+import struct
+import time
+from pythonosc.parsing import osc_types
+
+# Optional acknowledged delivery over UDP for robots that announce the
+# "reliable" feature. A command is wrapped as
+#
+#   /reliable  session:i  seq:i  ack_port:i  payload:b
+#
+# and the robot answers `/ack session seq` to the sender's IP on ack_port,
+# the GUI's existing OSC bind port. The session id is random per sender so a
+# restarted GUI is never mistaken for a stale duplicate.
+RELIABLE_ADDRESS = "/reliable"
+ACK_ADDRESS = "/ack"
+
+# commands that change the show state and must not silently vanish
+RELIABLE_ADDRESSES = frozenset((
+    "/start_chat_controller",
+    "/stop_chat_controller",
+    "/start_monologue",
+    "/start_interview",
+    "/start_game",
+    "/transition_next_segment",
+    "/wrap_up",
+    "/continue_segment",
+    "/say_this",
+    "/record_camera_target",
+    "/delete_camera_target",
+))
+
+WINDOW = 32
+MAX_RETRIES = 8
+INITIAL_RTO = 0.25
+MIN_RTO = 0.02
+MAX_RTO = 2.0
+CLOCK_GRANULARITY = 0.001
+
+RELIABLE_PREFIX = osc_types.write_string(RELIABLE_ADDRESS) + osc_types.write_string(",iiib")
+ACK_PREFIX = osc_types.write_string(ACK_ADDRESS) + osc_types.write_string(",ii")
+
+
+class RttEstimator:
+    # RFC 6298 smoothed RTT and retransmission timeout.
+    def __init__(self):
+        self.srtt = None
+        self.rttvar = None
+        self.rto = INITIAL_RTO
+
+    def sample(self, rtt):
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+        self.rto = min(MAX_RTO, max(MIN_RTO, self.srtt + max(CLOCK_GRANULARITY, 4 * self.rttvar)))
+
+
+class InFlight:
+    __slots__ = ('address', 'envelope', 'sent_at', 'retries', 'timer')
+
+    def __init__(self, address, envelope):
+        self.address = address
+        self.envelope = envelope
+        self.sent_at = 0.0
+        self.retries = 0
+        self.timer = None
+
+
+class ReliableSender:
+    # Sits on top of the send queue. Reliable addresses are wrapped, tracked
+    # and retransmitted on an RTT-derived timeout with exponential backoff;
+    # at most `window` of them are unacknowledged at once and the rest wait
+    # in order. Everything else passes straight through.
+    def __init__(self, client, ack_port, dispatcher, reliable_addresses=RELIABLE_ADDRESSES, window=WINDOW,
+                 max_retries=MAX_RETRIES):
+        self.client = client
+        self.ack_port = ack_port
+        self.dispatcher = dispatcher
+        self.reliable_addresses = reliable_addresses
+        self.window = window
+        self.max_retries = max_retries
+        self.session = random.getrandbits(31)
+        self.rtt = RttEstimator()
+        self._seq = itertools.count(1)
+        self._in_flight = {}
+        self._backlog = collections.deque()
+        self.acked = 0
+        self.retransmits = 0
+        self.failed = 0
+        dispatcher.map(ACK_ADDRESS, self.ack_handler)
+
+    def send_message(self, address, value):
+        if address not in self.reliable_addresses:
+            self.client.send_message(address, value)
+            return
+        self._send_reliably(address, self.client.encode(address, value))
+
+    def send_encoded(self, addresses, datagram):
+        # An already encoded datagram carrying the commands at `addresses`,
+        # such as a timetagged bundle; acknowledged as one if any of them is
+        # a reliable address.
+        if not any(address in self.reliable_addresses for address in addresses):
+            self.client.send_datagram(datagram)
+            return
+        self._send_reliably(" + ".join(addresses), datagram)
+
+    def _send_reliably(self, label, datagram):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # no loop to drive retransmits (shutdown): best effort
+            self.client.send_datagram(datagram)
+            return
+
+        seq = next(self._seq) & 0x7FFFFFFF
+        envelope = (RELIABLE_PREFIX + struct.pack(">iii", self.session, seq, self.ack_port)
+                    + osc_types.write_blob(datagram))
+        entry = InFlight(label, envelope)
+        if len(self._in_flight) >= self.window:
+            self._backlog.append((seq, entry))
+        else:
+            self._transmit(seq, entry)
+
+    def _transmit(self, seq, entry):
+        self._in_flight[seq] = entry
+        entry.sent_at = time.monotonic()
+        self.client.send_datagram(entry.envelope)
+        timeout = min(MAX_RTO, self.rtt.rto * (2 ** entry.retries))
+        entry.timer = asyncio.get_running_loop().call_later(timeout, self._on_timeout, seq)
+
+    def _on_timeout(self, seq):
+        entry = self._in_flight.pop(seq, None)
+        if entry is None:
+            return
+        if entry.retries >= self.max_retries:
+            self.failed += 1
+            print(f"{entry.address} was not acknowledged after {entry.retries + 1} attempts")
+            self._send_backlog()
+            return
+        entry.retries += 1
+        self.retransmits += 1
+        self._transmit(seq, entry)
+
+    def on_ack(self, session, seq):
+        if session != self.session:
+            return
+        entry = self._in_flight.pop(seq, None)
+        if entry is None:
+            return
+        entry.timer.cancel()
+        if entry.retries == 0:
+            # Karn's rule: retransmitted messages give ambiguous samples
+            self.rtt.sample(time.monotonic() - entry.sent_at)
+        self.acked += 1
+        self._send_backlog()
+
+    def _send_backlog(self):
+        while self._backlog and len(self._in_flight) < self.window:
+            self._transmit(*self._backlog.popleft())
+
+    def ack_handler(self, address, *args):
+        if len(args) == 2:
+            self.on_ack(*args)
+
+    def encode(self, address, value):
+        return self.client.encode(address, value)
+
+    def send_datagram(self, datagram):
+        self.client.send_datagram(datagram)
+
+    def flush(self):
+        self.client.flush()
+
+    def close(self):
+        self.dispatcher.unmap(ACK_ADDRESS, self.ack_handler)
+        for entry in self._in_flight.values():
+            entry.timer.cancel()
+        self._in_flight.clear()
+        self._backlog.clear()
+        self.client.close()
+
+
+class DuplicateFilter:
+    # Receiver side: remembers the last `span` sequence numbers per sender
+    # session and rejects repeats and anything older than that.
+    def __init__(self, span=1024):
+        self.span = span
+        self._sessions = {}
+
+    def accept(self, key, seq):
+        state = self._sessions.get(key)
+        if state is None:
+            state = self._sessions[key] = [seq, {seq}]
+            return True
+        highest, seen = state
+        if seq <= highest - self.span or seq in seen:
+            return False
+        seen.add(seq)
+        if seq > highest:
+            state[0] = seq
+            if len(seen) > 2 * self.span:
+                state[1] = {s for s in seen if s > seq - self.span}
+        return True
+
+
+def map_reliable_handler(dispatcher, send_to, duplicate_filter=None):
+    # For the robot (or a stand-in): acknowledges every /reliable message,
+    # duplicates included in case the first ack was lost, and dispatches the
+    # payload once. send_to(datagram, (ip, port)) writes a UDP datagram.
+    duplicate_filter = duplicate_filter or DuplicateFilter()
+
+    def reliable_handler(client_address, address, *args):
+        if len(args) != 4 or not isinstance(args[3], bytes):
+            return
+        session, seq, ack_port, payload = args
+        send_to(ACK_PREFIX + struct.pack(">ii", session, seq), (client_address[0], ack_port))
+        if duplicate_filter.accept((client_address[0], session), seq):
+            dispatcher.call_handlers_for_packet(payload, client_address)
+
+    dispatcher.map(RELIABLE_ADDRESS, reliable_handler, needs_reply_address=True)
+    return duplicate_filter
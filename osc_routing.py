@@ -0,0 +1,63 @@
+import collections
+from pythonosc.dispatcher import Dispatcher
+from pythonosc.parsing import osc_types
+from osc_chunking import CHUNK_ADDRESS
+from osc_journal import INBOUND
+from osc_log import get_logger
+
+MAX_ROUTES = 1024
+CHUNK_FRAGMENT = osc_types.write_string(CHUNK_ADDRESS)
+
+log = get_logger("osc")
+
+
+class RoutedDispatcher(Dispatcher):
+    # Dispatcher with a precompiled routing table. python-osc builds and
+    # compiles a regex and scans every mapping for each incoming message;
+    # here the handler tuple for an address is resolved once and then served
+    # from a dict. Wildcard mappings still work, since a cache miss falls
+    # back to the stock matcher. Every change to the mappings clears the table.
+    #
+    # Messages nothing is mapped for are counted per address in `unmatched`
+    # and logged through the queue-backed logger on the 1st, 2nd, 4th, 8th...
+    # occurrence, so a telemetry stream shows up without flooding the console.
+    #
+    # With a `journal` (osc_journal.py) every packet is recorded before it is
+    # dispatched, except /chunk fragments: the chunk handler sends the
+    # reassembled datagram back through here, and that is what gets recorded.
+    def __init__(self, journal=None):
+        super().__init__()
+        self.journal = journal
+        self._routes = {}
+        self.unmatched = collections.Counter()
+        super().set_default_handler(self._unmatched_handler, needs_reply_address=True)
+
+    def map(self, address, handler, *args, needs_reply_address=False):
+        self._routes.clear()
+        return super().map(address, handler, *args, needs_reply_address=needs_reply_address)
+
+    def unmap(self, address, handler, *args, needs_reply_address=False):
+        self._routes.clear()
+        super().unmap(address, handler, *args, needs_reply_address=needs_reply_address)
+
+    def set_default_handler(self, handler, needs_reply_address=False):
+        raise TypeError("RoutedDispatcher routes unmatched addresses itself; map the address instead")
+
+    def call_handlers_for_packet(self, data, client_address):
+        if self.journal is not None and not data.startswith(CHUNK_FRAGMENT):
+            self.journal.record(INBOUND, data)
+        return super().call_handlers_for_packet(data, client_address)
+
+    def handlers_for_address(self, address_pattern):
+        handlers = self._routes.get(address_pattern)
+        if handlers is None:
+            if len(self._routes) >= MAX_ROUTES:
+                # a peer inventing addresses must not grow the table without bound
+                self._routes.clear()
+            handlers = self._routes[address_pattern] = tuple(super().handlers_for_address(address_pattern))
+        return handlers
+
+    def _unmatched_handler(self, client_address, address, *args):
+        count = self.unmatched[address] = self.unmatched[address] + 1
+        if count & (count - 1) == 0:
+            log.info("OSC Message %r from %s (%d so far): %r", address, client_address[0], count, args)
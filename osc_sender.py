@@ -0,0 +1,116 @@
+import socket
+from pythonosc.osc_message_builder import OscMessageBuilder
+from pythonosc.parsing import osc_types
+from osc_chunking import ChunkSplitter, MAX_DATAGRAM_SIZE
+
+# Argument-less commands the GUIs send; their datagrams never change, so they
+# are encoded once when the sender is created.
+CONSTANT_ADDRESSES = (
+    "/start_chat_controller",
+    "/stop_chat_controller",
+    "/enable_manual_listen_mode",
+    "/disable_manual_listen_mode",
+    "/stop_listening",
+    "/start_monologue",
+    "/start_interview",
+    "/start_game",
+    "/new_camera_target_mode",
+    "/get_camera_targets",
+    "/look_around",
+    "/stay_on_topic",
+)
+
+
+def as_arg_list(value):
+    # same argument rules as SimpleUDPClient.send_message
+    if value is None:
+        return ()
+    if isinstance(value, (list, tuple)):
+        return value
+    return (value,)
+
+
+def build_datagram(address, args):
+    builder = OscMessageBuilder(address=address)
+    for arg in args:
+        builder.add_arg(arg)
+    return builder.build().dgram
+
+
+class OSCEncoder:
+    # Constant messages are served from pre-encoded bytes; messages whose
+    # arguments are all strings reuse a cached address + type tag prefix and
+    # only encode the payload.
+    def __init__(self, constant_addresses=CONSTANT_ADDRESSES):
+        self._constant = {address: build_datagram(address, ()) for address in constant_addresses}
+        self._prefixes = {}
+
+    def encode(self, address, value):
+        args = as_arg_list(value)
+        if not args:
+            datagram = self._constant.get(address)
+            if datagram is None:
+                datagram = self._constant[address] = build_datagram(address, ())
+            return datagram
+
+        for arg in args:
+            if type(arg) is not str:
+                return build_datagram(address, args)
+
+        prefix = self._prefixes.get((address, len(args)))
+        if prefix is None:
+            prefix = osc_types.write_string(address) + osc_types.write_string("," + "s" * len(args))
+            self._prefixes[(address, len(args))] = prefix
+        if len(args) == 1:
+            return prefix + osc_types.write_string(args[0])
+        return prefix + b"".join([osc_types.write_string(arg) for arg in args])
+
+
+class OSCSender(OSCEncoder):
+    # Drop-in replacement for SimpleUDPClient that writes to a connected UDP socket.
+    def __init__(self, ip, port, constant_addresses=CONSTANT_ADDRESSES, chunking=False):
+        super().__init__(constant_addresses)
+        self._sock = None
+        self._family = None
+        # only robots that announce the "chunking" feature can reassemble /chunk messages
+        self._splitter = ChunkSplitter() if chunking else None
+        self.sent = 0
+        self.send_errors = 0
+        self.retarget(ip, port)
+
+    def retarget(self, ip, port):
+        family, _, _, _, sockaddr = socket.getaddrinfo(ip, port, type=socket.SOCK_DGRAM)[0]
+        if family != self._family:
+            if self._sock is not None:
+                self._sock.close()
+            self._sock = socket.socket(family, socket.SOCK_DGRAM)
+            self._sock.setblocking(False)
+            self._family = family
+        self._sock.connect(sockaddr)
+        self.ip = ip
+        self.port = port
+
+    def send_datagram(self, datagram):
+        if self._splitter is not None and len(datagram) > MAX_DATAGRAM_SIZE:
+            for chunk in self._splitter.split(datagram):
+                self._send(chunk)
+        else:
+            self._send(datagram)
+
+    def _send(self, datagram):
+        try:
+            self._sock.send(datagram)
+            self.sent += 1
+        except OSError as e:
+            # A connected UDP socket reports ICMP errors (robot not listening yet)
+            # on the next send; a full send buffer raises BlockingIOError. Neither
+            # may take down a UI callback.
+            self.send_errors += 1
+            print(f"OSC send to {self.ip}:{self.port} failed: {e}")
+
+    def send_message(self, address, value):
+        self.send_datagram(self.encode(address, value))
+
+    def close(self):
+        self._sock.close()
+
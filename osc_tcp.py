@@ -0,0 +1,143 @@
+import asyncio
+import socket
+from osc_sender import OSCEncoder, CONSTANT_ADDRESSES
+
+# OSC 1.1 stream framing: every packet is SLIP-encoded and wrapped in END
+# bytes (the leading END flushes any line noise before the packet).
+SLIP_END = b"\xc0"
+SLIP_ESC = b"\xdb"
+SLIP_ESC_END = b"\xdb\xdc"
+SLIP_ESC_ESC = b"\xdb\xdd"
+
+MAX_BUFFERED = 1 << 20
+RECONNECT_MIN = 0.25
+RECONNECT_MAX = 5.0
+# a connection that lasts this long, or brings anything back, resets the
+# backoff; one the robot accepts and drops at once does not
+RECONNECT_STABLE = 2.0
+
+
+def slip_encode(datagram):
+    return SLIP_END + datagram.replace(SLIP_ESC, SLIP_ESC_ESC).replace(SLIP_END, SLIP_ESC_END) + SLIP_END
+
+
+class SlipDecoder:
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, data):
+        self._buffer += data
+        *frames, rest = self._buffer.split(SLIP_END)
+        self._buffer = rest
+        return [bytes(frame).replace(SLIP_ESC_END, SLIP_END).replace(SLIP_ESC_ESC, SLIP_ESC)
+                for frame in frames if frame]
+
+
+class OSCTCPSender(OSCEncoder):
+    # Persistent OSC-over-TCP connection with the same interface as OSCSender.
+    # Packets are buffered while disconnected and written with TCP_NODELAY in
+    # one batch per event loop iteration. Packets the robot sends back on the
+    # connection are handed to `dispatcher`, like the GUI's UDP server would.
+    def __init__(self, ip, port, dispatcher=None, constant_addresses=CONSTANT_ADDRESSES):
+        super().__init__(constant_addresses)
+        self.ip = ip
+        self.port = port
+        self.dispatcher = dispatcher
+        self._writer = None
+        self._pending = bytearray()
+        self._flush_handle = None
+        self._task = None
+        self._closed = False
+        self.sent = 0
+        self.dropped = 0
+        self.received = 0
+        self.connects = 0
+        self._start()
+
+    def _start(self):
+        if self._closed or (self._task is not None and not self._task.done()):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        delay = RECONNECT_MIN
+        while not self._closed:
+            try:
+                reader, writer = await asyncio.open_connection(self.ip, self.port)
+            except OSError as e:
+                print(f"OSC TCP connect to {self.ip}:{self.port} failed: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX)
+                continue
+
+            writer.get_extra_info("socket").setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._writer = writer
+            self.connects += 1
+            connected_at = loop.time()
+            received = self.received
+            self._flush()
+            try:
+                await self._read(reader, writer.get_extra_info("peername"))
+            except OSError as e:
+                print(f"OSC TCP connection to {self.ip}:{self.port} lost: {e}")
+            finally:
+                self._writer = None
+                writer.close()
+
+            if self.received > received or loop.time() - connected_at >= RECONNECT_STABLE:
+                delay = RECONNECT_MIN
+            elif not self._closed:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX)
+
+    async def _read(self, reader, peer):
+        decoder = SlipDecoder()
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                return
+            self.received += len(data)
+            for datagram in decoder.feed(data):
+                if self.dispatcher is not None:
+                    self.dispatcher.call_handlers_for_packet(datagram, peer)
+
+    def send_datagram(self, datagram):
+        buffered = len(self._pending)
+        if self._writer is not None:
+            buffered += self._writer.transport.get_write_buffer_size()
+        if buffered + len(datagram) > MAX_BUFFERED:
+            self.dropped += 1
+            return
+
+        self._pending += slip_encode(datagram)
+        self.sent += 1
+        if self._writer is None:
+            self._start()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_soon(self._flush)
+
+    def _flush(self):
+        self._flush_handle = None
+        if self._writer is None or not self._pending:
+            return
+        self._writer.write(bytes(self._pending))
+        self._pending.clear()
+
+    def send_message(self, address, value):
+        self.send_datagram(self.encode(address, value))
+
+    def close(self):
+        self._closed = True
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._writer is not None:
+            self._flush()
+            self._writer.close()
+        if self._task is not None:
+            self._task.cancel()
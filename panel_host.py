@@ -0,0 +1,106 @@
+import os
+# the host parses its own arguments
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+
+import argparse
+import asyncio
+import importlib
+from kivy.app import App
+from kivy.uix.boxlayout import BoxLayout
+from bootstrap import bootstrap, resolve_groups, watch_after_first_frame
+from registry_client import get_registry_client
+from registry_store import STRATEGIES
+from robot_client import parse_robot
+from session_recorder import record_from_env
+
+# Runs any combination of the chat, producer and camera panels in one
+# process: one Kivy window, one asyncio loop, one registry client and one
+# OSCEndpoint, so panels aimed at the same robot share its socket and the
+# camera targets arrive on the same bind port as everything else.
+#   python panel_host.py --panels chat camera
+# A panel is any module with ROBOT_SERVER and make_panel(robot_data, endpoint)
+# returning (server, app); the app's build() supplies the panel's widgets.
+PANELS = {
+    'chat': "chat_gui",
+    'producer': "producer_gui",
+    'camera': "camera_gui",
+}
+BIND_PORT = 54322
+
+
+class PanelHostApp(App):
+    def __init__(self, panels, **kwargs):
+        super().__init__(**kwargs)
+        self.panels = panels
+
+    def build(self):
+        self.title = "Talkshow: " + ", ".join(name for name, _, _ in self.panels)
+        layout = BoxLayout(orientation='horizontal')
+        for name, server, panel_app in self.panels:
+            layout.add_widget(panel_app.build())
+        return layout
+
+
+async def load_panels(names, bind_port=BIND_PORT, groups=None):
+    # modules are imported only for the panels asked for; `groups` sends
+    # panels to a robot group (bootstrap.resolve_groups) instead of the one
+    # robot their server name resolves to
+    modules = {name: importlib.import_module(PANELS[name]) for name in names}
+    groups = groups or {}
+
+    def make_panels(endpoint, robots):
+        panels = []
+        for name, module in modules.items():
+            group = groups.get(module.ROBOT_SERVER)
+            robot_data = group or robots[module.ROBOT_SERVER]
+            if robot_data is None:
+                print(f"{module.ROBOT_SERVER} is not registered, leaving out the {name} panel")
+                continue
+            server, panel_app = module.make_panel(robot_data, endpoint)
+            if group is None:
+                watch_after_first_frame(module.ROBOT_SERVER, server.set_robot_endpoint)
+            else:
+                print(f"{name} panel sending to {len(group['members'])} robots")
+            panels.append((name, server, panel_app))
+        # before PanelHostApp.build binds the buttons
+        record_from_env({name: server for name, server, panel_app in panels})
+        print(f"{len(panels)} panels sending through {endpoint.client_count} robot clients, "
+              f"listening on {endpoint.ip}:{endpoint.bind_port}")
+        return endpoint, panels
+
+    return await bootstrap([module.ROBOT_SERVER for module in modules.values()], make_panels,
+                           bind_port=bind_port, required=False)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Chat, producer and camera panels in one window")
+    parser.add_argument('--panels', nargs='+', choices=list(PANELS), default=list(PANELS))
+    parser.add_argument('--bind-port', type=int, default=BIND_PORT,
+                        help="port the robots answer on (camera targets, acks, latency echoes)")
+    parser.add_argument('--group', action='store_true',
+                        help="send every panel to all registered instances of its server")
+    parser.add_argument('--robots', nargs='+', type=parse_robot, metavar='HOST:PORT',
+                        help="send every panel to these robots")
+    parser.add_argument('--strategy', choices=STRATEGIES,
+                        help="how the registry picks between several instances of a server "
+                             "(default: $TALKSHOW_SELECTION or latest)")
+    args = parser.parse_args()
+    if args.strategy:
+        get_registry_client().strategy = args.strategy
+
+    names = dict.fromkeys(args.panels)
+    groups = None
+    if args.group or args.robots:
+        groups = await resolve_groups([importlib.import_module(PANELS[name]).ROBOT_SERVER for name in names],
+                                      args.robots)
+    endpoint, panels = await load_panels(names, args.bind_port, groups)
+    try:
+        await PanelHostApp(panels).async_run(async_lib='asyncio')
+    finally:
+        for member, stats in endpoint.group_stats().items():
+            print(f"{member}: {stats['sent']} sent, {stats['errors']} failed")
+        endpoint.close()
+        get_registry_client().close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,29 +1,36 @@
 from kivy.app import App
 from kivy.uix.button import Button
 from kivy.uix.boxlayout import BoxLayout
-from kivy.uix.popup import Popup
-from kivy.uix.textinput import TextInput
 import asyncio
-from pythonosc.udp_client import SimpleUDPClient
+from bootstrap import bootstrap, watch_after_first_frame
+from osc_endpoint import OSCEndpoint
+from session_recorder import record_from_env
 import json
 from kivy.uix.label import Label
-import requests
-from registry_url import REGISTRY_URL
 
-
-
-async def get_robot_server_data():
-        response = requests.get(f'{REGISTRY_URL}/servers/producer_server')
-        return response.json()
+ROBOT_SERVER = "producer_server"
 
 
 class OSCServer:
-    def __init__(self, robot_data=None):
+    def __init__(self, robot_data=None, endpoint=None):
 
+        self.endpoint = endpoint if endpoint is not None else OSCEndpoint()
+        self.robot_data = robot_data
         self.robot_ip = robot_data["ip_address"]
         self.robot_port = robot_data["port"]
     
-        self.client = SimpleUDPClient(self.robot_ip, self.robot_port)
+        self.client = self.endpoint.client_for(robot_data)
+
+
+    def set_robot_endpoint(self, robot_data):
+        if robot_data == self.robot_data:
+            return
+        self.robot_data = robot_data
+        self.robot_ip = robot_data["ip_address"]
+        self.robot_port = robot_data["port"]
+        self.client.close()
+        self.client = self.endpoint.client_for(robot_data)
+        print(f"Robot endpoint changed to {self.robot_ip}:{self.robot_port}")
         
 
     # SEND TO TRITIUM OSC ############################################################
@@ -94,6 +101,8 @@ class OSCApp(App):
 
 
     def show_input_popup(self, title, hint_text, send_method):
+        from kivy.uix.popup import Popup
+        from kivy.uix.textinput import TextInput
         popup_layout = BoxLayout(orientation='vertical', spacing=10, padding=10)
         input_field = TextInput(hint_text=hint_text, size_hint_y=None, height=44)
         send_btn = Button(text='Send', size_hint_y=None, height=50)
@@ -126,17 +135,23 @@ class OSCApp(App):
         self.show_input_popup("Say This", "Enter text to say", self.osc_server.send_say_this)
 
 
+def make_panel(robot_data, endpoint):
+    server = OSCServer(robot_data=robot_data, endpoint=endpoint)
+    return server, OSCApp(osc_server=server)
+
+
 async def main():
     try:
-        robot_server_data = await get_robot_server_data()
-
-        server = OSCServer(robot_data=robot_server_data)
+        server = await bootstrap([ROBOT_SERVER], lambda endpoint, robots: OSCServer(robots[ROBOT_SERVER], endpoint))
+        watch_after_first_frame(ROBOT_SERVER, server.set_robot_endpoint)
+        record_from_env({'producer': server})
         
         osc_app = OSCApp(osc_server=server)
         await osc_app.async_run(async_lib='asyncio') 
     
     except KeyboardInterrupt:
         server.client.send_message("/stop_chat_controller", [])
+        server.client.flush()
         print("Server closed manually.")
 
 if __name__ == "__main__":
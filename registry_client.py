@@ -0,0 +1,343 @@
+import asyncio
+import json
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from registry_store import LATEST, STRATEGIES
+from registry_url import REGISTRY_URL
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".talkshow_gui")
+CACHE_FILE = os.path.join(CACHE_DIR, "registry_cache.json")
+
+POOL_SIZE = 8
+CONNECT_TIMEOUT = 0.5
+READ_TIMEOUT = 2.0
+LOOKUP_DEADLINE = 3.0
+WATCH_TIMEOUT = 25.0
+WATCH_RETRY_MAX = 10.0
+
+# how the registry picks between several instances of one server name:
+# "latest", "round_robin", "least_loaded" or "sticky" (stable per client id).
+# Set TALKSHOW_SELECTION to choose per GUI process.
+SELECTION_ENV = "TALKSHOW_SELECTION"
+SELECTION_STRATEGY = LATEST
+
+
+class RegistryError(Exception):
+    pass
+
+
+class RegistryClient:
+    def __init__(self, registry_url=REGISTRY_URL, cache_file=CACHE_FILE, deadline=LOOKUP_DEADLINE,
+                 strategy=SELECTION_STRATEGY, client_id=None):
+
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown selection strategy {strategy!r}")
+        self.registry_url = registry_url.rstrip("/")
+        self.cache_file = cache_file
+        self.deadline = deadline
+        self.strategy = strategy
+        self.client_id = client_id or socket.gethostname()
+
+        self._session = None
+        self._session_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="registry")
+        self._cache = self._load_cache()
+        self._etags = {}
+        self._revalidating = {}
+
+
+    # HTTP ############################################################
+
+    def _get_session(self):
+        # requests is only imported once the first lookup actually goes out
+        with self._session_lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._session = session
+            return self._session
+
+    def _conditional_get(self, path, cache_key, params=None):
+        # Revalidates with the last ETag; a 304 reuses the body we already hold.
+        session = self._get_session()
+        headers = {}
+        cached = self._etags.get(cache_key)
+        if cached is not None:
+            headers['If-None-Match'] = cached[0]
+        response = session.get(f'{self.registry_url}{path}', params=params, headers=headers,
+                               timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+        if response.status_code == 304 and cached is not None:
+            return cached[1]
+        if response.status_code == 404:
+            raise RegistryError(response.json().get('error', 'Not found'))
+        response.raise_for_status()
+        body = response.json()
+        if 'ETag' in response.headers:
+            self._etags[cache_key] = (response.headers['ETag'], body)
+        return body
+
+    def _selection_params(self):
+        if self.strategy == LATEST:
+            return {}
+        return {'strategy': self.strategy, 'client': self.client_id}
+
+    def _fetch(self, server_name):
+        try:
+            return self._conditional_get(f'/servers/{server_name}', server_name, params=self._selection_params())
+        except RegistryError:
+            raise RegistryError(f"{server_name} is not registered")
+
+    def _fetch_many(self, server_names):
+        params = dict(self._selection_params(), names=','.join(server_names))
+        return self._conditional_get('/servers', tuple(server_names), params=params)
+
+    def _fetch_instances(self, server_name):
+        try:
+            return self._conditional_get(f'/servers/{server_name}/instances', (server_name, 'instances'))
+        except RegistryError:
+            raise RegistryError(f"{server_name} is not registered")
+
+    def _post(self, path, data):
+        session = self._get_session()
+        response = session.post(f'{self.registry_url}{path}', json=data,
+                                timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+        if response.status_code == 404:
+            raise RegistryError(response.json().get('error', 'Not found'))
+        response.raise_for_status()
+        return response.json()
+
+    def _watch_once(self, server_name, version):
+        session = self._get_session()
+        params = dict(self._selection_params(), version=version, timeout=WATCH_TIMEOUT)
+        response = session.get(f'{self.registry_url}/watch/{server_name}', params=params,
+                               timeout=(CONNECT_TIMEOUT, WATCH_TIMEOUT + READ_TIMEOUT))
+        response.raise_for_status()
+        return response.json()
+
+    async def _run(self, description, function, *args, deadline=None):
+        deadline = self.deadline if deadline is None else deadline
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, function, *args)
+        try:
+            return await asyncio.wait_for(future, deadline)
+        except asyncio.TimeoutError:
+            raise RegistryError(f"{description} timed out after {deadline}s")
+        except OSError as e:
+            # requests.RequestException derives from OSError
+            raise RegistryError(f"{description} failed: {e}")
+
+    async def _fetch_async(self, server_name):
+        return await self._run(f"Registry lookup for {server_name}", self._fetch, server_name)
+
+
+    # CACHE ############################################################
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_file) as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return cache if isinstance(cache, dict) else {}
+
+    def _save_cache(self):
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            tmp_file = f"{self.cache_file}.{os.getpid()}.tmp"
+            with open(tmp_file, "w") as f:
+                json.dump(self._cache, f)
+            os.replace(tmp_file, self.cache_file)
+        except OSError as e:
+            print(f"Could not write registry cache: {e}")
+
+    def _store(self, server_name, server_data):
+        if self._cache.get(server_name) == server_data:
+            return
+        self._cache[server_name] = server_data
+        self._save_cache()
+
+    def cached(self, server_name):
+        server_data = self._cache.get(server_name)
+        return dict(server_data) if server_data is not None else None
+
+
+    # LOOKUP ############################################################
+
+    async def resolve(self, server_name, revalidate=True):
+        # Serve the last known endpoint straight from disk and refresh it in the
+        # background, so a slow or restarting registry never delays startup.
+        server_data = self.cached(server_name)
+        if server_data is not None:
+            if revalidate:
+                self._schedule_revalidate(server_name)
+            return server_data
+
+        server_data = await self._fetch_async(server_name)
+        self._store(server_name, server_data)
+        return dict(server_data)
+
+    def prepare(self):
+        # Imports requests and opens the session now instead of on the first
+        # lookup's thread, where on a single core it competes with whatever
+        # the caller does while waiting.
+        self._get_session()
+
+    async def resolve_many(self, server_names, revalidate=True):
+        # One round-trip for every name not already cached; missing names map to None.
+        results = {name: self.cached(name) for name in server_names}
+        missing = [name for name, server_data in results.items() if server_data is None]
+        if missing:
+            fetched = await self._run(f"Registry lookup for {', '.join(missing)}", self._fetch_many, missing)
+            for name in missing:
+                if fetched.get(name) is not None:
+                    self._store(name, fetched[name])
+                    results[name] = dict(fetched[name])
+        if revalidate:
+            for name in server_names:
+                if name not in missing:
+                    self._schedule_revalidate(name)
+        return results
+
+    async def instances(self, server_name):
+        return await self._run(f"Instance lookup for {server_name}", self._fetch_instances, server_name)
+
+    async def refresh(self, server_name):
+        server_data = await self._fetch_async(server_name)
+        self._store(server_name, server_data)
+        return dict(server_data)
+
+    def _schedule_revalidate(self, server_name):
+        task = self._revalidating.get(server_name)
+        if task is not None and not task.done():
+            return
+        self._revalidating[server_name] = asyncio.ensure_future(self._revalidate(server_name))
+
+    async def _revalidate(self, server_name):
+        try:
+            await self.refresh(server_name)
+        except RegistryError as e:
+            print(f"Using cached endpoint for {server_name}: {e}")
+
+    async def watch(self, server_name, on_change):
+        # Long-polls /watch and calls on_change(server_data) whenever the
+        # registration differs from the endpoint we last handed out. With a
+        # balanced strategy the endpoint only changes once the instance we
+        # were given is no longer registered, so the pick is not undone.
+        version = 0
+        current = self.cached(server_name)
+        retry_delay = 0.5
+        poll_delay = 0
+        while True:
+            if poll_delay:
+                # the registry had no long-poll slot free and asked us to come back later
+                await asyncio.sleep(poll_delay)
+            try:
+                result = await self._run(f"Watching {server_name}", self._watch_once, server_name, version,
+                                         deadline=WATCH_TIMEOUT + self.deadline)
+            except RegistryError as e:
+                print(f"Watch on {server_name} interrupted: {e}")
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, WATCH_RETRY_MAX)
+                continue
+
+            retry_delay = 0.5
+            poll_delay = result.get('retry_after') or 0
+            if result['version'] < version:
+                # the registry restarted and its versions started over
+                version = 0
+                continue
+            version = result['version']
+            server_data = result['server']
+            if self.strategy != LATEST and current in result.get('endpoints', ()):
+                continue
+            if server_data is not None and server_data != current:
+                current = server_data
+                self._store(server_name, server_data)
+                on_change(dict(server_data))
+
+
+    # REGISTRATION ############################################################
+
+    @staticmethod
+    def _registration(server_name, ip_address, port, ttl=None, instance_id=None, weight=None, features=None,
+                      transport=None):
+        data = {'server_name': server_name, 'ip_address': ip_address, 'port': port}
+        for key, value in (('ttl', ttl), ('instance_id', instance_id), ('weight', weight), ('features', features),
+                           ('transport', transport)):
+            if value is not None:
+                data[key] = value
+        return data
+
+    async def register(self, server_name, ip_address, port, ttl=None, instance_id=None, weight=None, features=None,
+                       transport=None):
+        data = self._registration(server_name, ip_address, port, ttl=ttl, instance_id=instance_id, weight=weight,
+                                  features=features, transport=transport)
+        return await self._run(f"Registering {server_name}", self._post, '/register', data)
+
+    async def register_many(self, registrations):
+        return await self._run("Batch registration", self._post, '/register', registrations)
+
+    async def heartbeat(self, server_name, lease_id, instance_id=None, load=None):
+        data = {'server_name': server_name, 'lease_id': lease_id}
+        if instance_id is not None:
+            data['instance_id'] = instance_id
+        if load is not None:
+            data['load'] = load
+        return await self._run(f"Heartbeat for {server_name}", self._post, '/heartbeat', data)
+
+    async def keep_registered(self, server_name, ip_address, port, ttl=10.0, instance_id=None, weight=None,
+                              features=None, transport=None, report_load=None):
+        registration = self._registration(server_name, ip_address, port, instance_id=instance_id, weight=weight,
+                                          features=features, transport=transport)
+        await self.keep_registered_many([registration], ttl=ttl, report_load=report_load)
+
+    async def keep_registered_many(self, registrations, ttl=10.0, leases=None, report_load=None):
+        # Renew at a third of the TTL so one lost heartbeat never drops a lease;
+        # when a heartbeat fails everything is registered again in one request.
+        # `leases` is the answer to a register_many() the caller already made.
+        # report_load, if given, is called before each heartbeat for least-loaded balancing.
+        registrations = [dict(registration, ttl=ttl) for registration in registrations]
+        names = ", ".join(registration['server_name'] for registration in registrations)
+        if leases is not None:
+            await asyncio.sleep(ttl / 3)
+        while True:
+            try:
+                if leases is None:
+                    leases = await self.register_many(registrations)
+                else:
+                    load = report_load() if report_load is not None else None
+                    for lease in leases:
+                        await self.heartbeat(lease['server_name'], lease['lease_id'],
+                                             instance_id=lease.get('instance_id'), load=load)
+            except RegistryError as e:
+                print(f"Registration of {names} failed: {e}")
+                leases = None
+            await asyncio.sleep(ttl / 3)
+
+    def close(self):
+        for task in self._revalidating.values():
+            task.cancel()
+        self._executor.shutdown(wait=False)
+        if self._session is not None:
+            self._session.close()
+
+
+_registry_client = None
+
+
+def get_registry_client():
+    global _registry_client
+    if _registry_client is None:
+        _registry_client = RegistryClient(strategy=os.environ.get(SELECTION_ENV) or SELECTION_STRATEGY)
+    return _registry_client
+
+
+async def get_robot_server_data(server_name):
+    return await get_registry_client().resolve(server_name)
@@ -0,0 +1,415 @@
+import hashlib
+import json
+import math
+import os
+import secrets
+import threading
+import time
+
+DEFAULT_INSTANCE = "default"
+
+# instance selection strategies for ServerTable.select
+LATEST = "latest"
+ROUND_ROBIN = "round_robin"
+LEAST_LOADED = "least_loaded"
+STICKY = "sticky"
+STRATEGIES = (LATEST, ROUND_ROBIN, LEAST_LOADED, STICKY)
+
+
+def rendezvous_hash(client, instance_id):
+    # uniform in (0, 1); crc32 is linear, so its values for one client and
+    # different instances are correlated and would skew the weights
+    digest = hashlib.blake2b(client + b"/" + instance_id.encode(), digest_size=8).digest()
+    return (int.from_bytes(digest, "big") + 0.5) / 2 ** 64
+
+
+class TimingWheel:
+    # Hashed timing wheel: scheduling is O(1) and every tick only touches the
+    # keys that landed in the slot under the cursor. Deadlines further away
+    # than one rotation are parked in the last slot and re-added when it fires.
+    def __init__(self, tick=1.0, slots=512, now=None):
+        self.tick = tick
+        self._slots = [[] for _ in range(slots)]
+        self._cursor = 0
+        self._current_tick = int((time.monotonic() if now is None else now) / tick)
+
+    def add(self, key, deadline):
+        ticks = int(-(-deadline // self.tick)) - self._current_tick
+        ticks = max(1, min(ticks, len(self._slots) - 1))
+        self._slots[(self._cursor + ticks) % len(self._slots)].append(key)
+
+    def advance(self, now):
+        target_tick = int(now / self.tick)
+        # after a full rotation every slot has been visited once
+        steps = min(target_tick - self._current_tick, len(self._slots))
+        due = []
+        for _ in range(max(steps, 0)):
+            self._cursor = (self._cursor + 1) % len(self._slots)
+            if self._slots[self._cursor]:
+                due.extend(self._slots[self._cursor])
+                self._slots[self._cursor] = []
+        self._current_tick = max(self._current_tick, target_tick)
+        return due
+
+
+class Lease:
+    __slots__ = ('lease_id', 'ttl', 'deadline')
+
+    def __init__(self, lease_id, ttl, deadline):
+        self.lease_id = lease_id
+        self.ttl = ttl
+        self.deadline = deadline
+
+
+class RegistryJournal:
+    # Append-only log of table events plus a periodic snapshot. Every event
+    # carries a sequence number so a crash between writing the snapshot and
+    # truncating the log replays cleanly: events already in the snapshot are skipped.
+    def __init__(self, directory, snapshot_every=1000, fsync=False):
+        self.directory = directory
+        self.snapshot_path = os.path.join(directory, "snapshot.json")
+        self.journal_path = os.path.join(directory, "journal.log")
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self.seq = 0
+        self._file = None
+        self._events_since_snapshot = 0
+        # byte length of the intact part of the journal, set by load()
+        self._good_size = None
+
+    def load(self):
+        snapshot = None
+        try:
+            with open(self.snapshot_path) as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            pass
+
+        events = []
+        good_size = 0
+        try:
+            with open(self.journal_path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        events.append(json.loads(line))
+                    except ValueError:
+                        # a torn final write from a crash, everything before it is intact
+                        break
+                    good_size += len(line)
+        except FileNotFoundError:
+            pass
+        self._good_size = good_size
+
+        snapshot_seq = snapshot['seq'] if snapshot else 0
+        events = [event for event in events if event['seq'] > snapshot_seq]
+        self.seq = events[-1]['seq'] if events else snapshot_seq
+        self._events_since_snapshot = len(events)
+        return snapshot, events
+
+    def open(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._file = open(self.journal_path, "a")
+        if self._good_size is not None and self._file.tell() > self._good_size:
+            # cut off the torn line load() stopped at, or the next event
+            # would be glued onto it and lost on the following restart
+            self._file.truncate(self._good_size)
+
+    def append(self, event):
+        self.seq += 1
+        event['seq'] = self.seq
+        self._file.write(json.dumps(event, separators=(',', ':')) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._events_since_snapshot += 1
+
+    def needs_snapshot(self):
+        return self._events_since_snapshot >= self.snapshot_every
+
+    def write_snapshot(self, state):
+        state['seq'] = self.seq
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+
+        self._file.close()
+        self._file = open(self.journal_path, "w")
+        self._events_since_snapshot = 0
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class ServerTable:
+    # Copy-on-write table: readers grab the current dicts without locking,
+    # writers build new dicts under a lock and swap the references in.
+    # Each server name maps to its instances, keyed by instance id in
+    # registration order; services that don't pass an instance id share
+    # DEFAULT_INSTANCE, so a re-registration replaces the old endpoint.
+    def __init__(self, tick=1.0):
+        self._servers = {}
+        self._leases = {}
+        self._loads = {}
+        self._round_robin = {}
+        self._round_robin_lock = threading.Lock()
+        self._versions = {}
+        self._watchers = {}
+        self._write_lock = threading.Lock()
+        self._wheel = TimingWheel(tick=tick)
+        self._reaper = None
+        self._journal = None
+        self.version = 0
+
+    def get(self, server_name):
+        # the most recently registered instance
+        instances = self._servers.get(server_name)
+        return next(reversed(instances.values())) if instances else None
+
+    def entry_version(self, server_name):
+        return self._versions.get(server_name, 0)
+
+    def instances(self, server_name):
+        instances = self._servers.get(server_name) or {}
+        return [dict(info, instance_id=instance_id, load=self._loads.get((server_name, instance_id), 0))
+                for instance_id, info in instances.items()]
+
+    def select(self, server_name, strategy=LATEST, client_id=None, advance=True):
+        # advance=False answers with the instance the next round_robin lookup
+        # would get, without taking it from that lookup
+        instances = self._servers.get(server_name)
+        if not instances:
+            return None
+        if strategy == LATEST or len(instances) == 1:
+            return next(reversed(instances.values()))
+
+        instance_ids = list(instances)
+        if strategy == ROUND_ROBIN:
+            instance_id = instance_ids[self._rotate(server_name, advance) % len(instance_ids)]
+        elif strategy == LEAST_LOADED:
+            loads = {i: self._loads.get((server_name, i), 0) / instances[i].get('weight', 1) for i in instance_ids}
+            lowest = min(loads.values())
+            # instances that report the same load (or none at all) take turns
+            tied = [i for i in instance_ids if loads[i] == lowest]
+            instance_id = tied[self._rotate(server_name, advance) % len(tied)] if len(tied) > 1 else tied[0]
+        elif strategy == STICKY:
+            # weighted rendezvous hashing: adding or removing an instance only moves the clients that
+            # were on it, and each instance gets a share of clients proportional to its weight
+            client = (client_id or "").encode()
+            instance_id = max(instance_ids, key=lambda i: -instances[i].get('weight', 1)
+                              / math.log(rendezvous_hash(client, i)))
+        else:
+            raise ValueError(f"Unknown selection strategy {strategy!r}")
+        return instances[instance_id]
+
+    def _rotate(self, server_name, advance):
+        with self._round_robin_lock:
+            position = self._round_robin.get(server_name, 0)
+            if advance:
+                self._round_robin[server_name] = position + 1
+        return position
+
+    def _changed(self, server_name):
+        # caller holds the write lock
+        self.version += 1
+        self._versions[server_name] = self.version
+        watcher = self._watchers.get(server_name)
+        if watcher is not None:
+            watcher.notify_all()
+
+    def watch(self, server_name, known_version, timeout, strategy=LATEST, client_id=None):
+        # Long-poll: block until the entry moves past known_version or the timeout passes.
+        # Returns the version, the instance `strategy` picks and every registered endpoint,
+        # so a balanced client can stay where it is while its instance is still there.
+        with self._write_lock:
+            if self._versions.get(server_name, 0) <= known_version:
+                watcher = self._watchers.get(server_name)
+                if watcher is None:
+                    watcher = self._watchers[server_name] = threading.Condition(self._write_lock)
+                watcher.wait_for(lambda: self._versions.get(server_name, 0) > known_version, timeout)
+            version = self._versions.get(server_name, 0)
+        endpoints = list((self._servers.get(server_name) or {}).values())
+        return version, self.select(server_name, strategy, client_id, advance=False), endpoints
+
+    # PERSISTENCE ############################################################
+
+    def attach_journal(self, journal):
+        snapshot, events = journal.load()
+        with self._write_lock:
+            servers = {}
+            if snapshot:
+                self.version = snapshot['version']
+                self._versions = dict(snapshot['versions'])
+                if snapshot.get('format', 1) == 1:
+                    # single-instance snapshots written before instances existed
+                    servers = {name: {DEFAULT_INSTANCE: info} for name, info in snapshot['servers'].items()}
+                    leases = [(name, DEFAULT_INSTANCE, lease_id, ttl)
+                              for name, (lease_id, ttl) in snapshot['leases'].items()]
+                else:
+                    servers = snapshot['servers']
+                    leases = snapshot['leases']
+                for server_name, instance_id, lease_id, ttl in leases:
+                    self._grant_lease((server_name, instance_id), ttl, lease_id)
+            # replay into private dicts instead of copying the table per event
+            for event in events:
+                self._apply(servers, event)
+            self._servers = servers
+            journal.open()
+            self._journal = journal
+
+    def _apply(self, servers, event):
+        server_name = event['name']
+        instance_id = event.get('instance_id', DEFAULT_INSTANCE)
+        instances = servers.get(server_name, {})
+        if event['op'] == 'register':
+            if instances.get(instance_id) != event['info']:
+                instances.pop(instance_id, None)
+                instances[instance_id] = event['info']
+                servers[server_name] = instances
+                self._changed(server_name)
+            if event['ttl'] is None:
+                self._leases.pop((server_name, instance_id), None)
+            else:
+                self._grant_lease((server_name, instance_id), event['ttl'], event['lease_id'])
+            return
+
+        removed = list(instances) if instance_id is None else [instance_id]
+        removed = [i for i in removed if instances.pop(i, None) is not None]
+        if removed:
+            for i in removed:
+                self._leases.pop((server_name, i), None)
+            if not instances:
+                servers.pop(server_name, None)
+            self._changed(server_name)
+
+    def _log(self, event):
+        if self._journal is None:
+            return
+        self._journal.append(event)
+        if self._journal.needs_snapshot():
+            self._journal.write_snapshot({
+                'format': 2,
+                'version': self.version,
+                'versions': self._versions,
+                'servers': self._servers,
+                'leases': [(name, instance_id, lease.lease_id, lease.ttl)
+                           for (name, instance_id), lease in self._leases.items()],
+            })
+
+
+    # WRITES ############################################################
+
+    def _set_instance(self, server_name, instance_id, server_info):
+        # re-registering an unchanged endpoint only refreshes the lease
+        instances = self._servers.get(server_name, {})
+        if instances.get(instance_id) != server_info:
+            instances = dict(instances)
+            instances.pop(instance_id, None)
+            instances[instance_id] = server_info
+            servers = dict(self._servers)
+            servers[server_name] = instances
+            self._servers = servers
+            self._changed(server_name)
+
+    def _remove_instances(self, keys):
+        servers = dict(self._servers)
+        changed = set()
+        for server_name, instance_id in keys:
+            instances = servers.get(server_name)
+            if not instances or instance_id not in instances:
+                continue
+            instances = dict(instances)
+            del instances[instance_id]
+            if instances:
+                servers[server_name] = instances
+            else:
+                del servers[server_name]
+            self._leases.pop((server_name, instance_id), None)
+            self._loads.pop((server_name, instance_id), None)
+            changed.add(server_name)
+        self._servers = servers
+        for server_name in changed:
+            self._changed(server_name)
+
+    def _grant_lease(self, key, ttl, lease_id=None):
+        # leases restored from the journal restart their full TTL
+        lease = Lease(lease_id or secrets.token_hex(8), ttl, time.monotonic() + ttl)
+        self._leases[key] = lease
+        self._wheel.add((key, lease.lease_id), lease.deadline)
+        return lease.lease_id
+
+    def register(self, server_name, server_info, ttl=None, instance_id=DEFAULT_INSTANCE):
+        with self._write_lock:
+            self._set_instance(server_name, instance_id, server_info)
+            lease_id = None
+            if ttl is None:
+                self._leases.pop((server_name, instance_id), None)
+            else:
+                lease_id = self._grant_lease((server_name, instance_id), ttl)
+            self._log({'op': 'register', 'name': server_name, 'instance_id': instance_id,
+                       'info': server_info, 'ttl': ttl, 'lease_id': lease_id})
+            return lease_id
+
+    def renew(self, server_name, lease_id, instance_id=DEFAULT_INSTANCE, load=None):
+        # Only moves the deadline; the wheel notices when the old slot fires.
+        # Load reports are kept out of the journal and the entry version, they
+        # change too often to be worth persisting or waking watchers for.
+        with self._write_lock:
+            lease = self._leases.get((server_name, instance_id))
+            if lease is None or lease.lease_id != lease_id:
+                return None
+            lease.deadline = time.monotonic() + lease.ttl
+            if load is not None:
+                self._loads[(server_name, instance_id)] = load
+            return lease.ttl
+
+    def deregister(self, server_name, instance_id=None):
+        with self._write_lock:
+            instances = self._servers.get(server_name)
+            if not instances or (instance_id is not None and instance_id not in instances):
+                return False
+            removed = list(instances) if instance_id is None else [instance_id]
+            self._remove_instances([(server_name, i) for i in removed])
+            self._log({'op': 'deregister', 'name': server_name, 'instance_id': instance_id})
+            return True
+
+    def expire_due(self, now=None):
+        now = time.monotonic() if now is None else now
+        expired = []
+        with self._write_lock:
+            for key, lease_id in self._wheel.advance(now):
+                lease = self._leases.get(key)
+                if lease is None or lease.lease_id != lease_id:
+                    continue
+                if lease.deadline > now:
+                    self._wheel.add((key, lease_id), lease.deadline)
+                    continue
+                del self._leases[key]
+                expired.append(key)
+
+            if expired:
+                self._remove_instances(expired)
+                for server_name, instance_id in expired:
+                    self._log({'op': 'expire', 'name': server_name, 'instance_id': instance_id})
+        return expired
+
+    def start_reaper(self):
+        if self._reaper is not None:
+            return
+        self._reaper = threading.Thread(target=self._reap_forever, name="lease-reaper", daemon=True)
+        self._reaper.start()
+
+    def _reap_forever(self):
+        while True:
+            time.sleep(self._wheel.tick)
+            for server_name, instance_id in self.expire_due():
+                print(f"Lease expired for {server_name} ({instance_id})")
+
+    def __len__(self):
+        return len(self._servers)
@@ -0,0 +1,110 @@
+import os
+# the replay tool parses its own arguments
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+
+import argparse
+import asyncio
+import time
+from cue_runner import Cue, CueRunner, check_cue, connect
+from panel_host import PANELS
+from registry_client import get_registry_client
+from registry_store import STRATEGIES
+from robot_client import parse_robot
+from session_recorder import load_session
+
+# Sends a session recorded with TALKSHOW_RECORD (see session_recorder.py)
+# again through the panels' OSCServers, headless, to load-test the robot or
+# a stand-in for it:
+#
+#   python replay_session.py session-20261018-203000-4242.jsonl              # as recorded
+#   python replay_session.py session-20261018-203000-4242.jsonl --speed 20   # 20x faster
+#   python replay_session.py session-20261018-203000-4242.jsonl --max --repeat 50
+#
+# With --speed the gaps between actions shrink by that factor and the
+# actions are kept on schedule by cue_runner.py's CueScheduler. --max sends
+# them back to back, one flush each, and only lets the event loop in every
+# YIELD_EVERY actions so acks and latency echoes still get handled.
+SESSION_PANELS = dict(PANELS, full="full_gui")
+YIELD_EVERY = 64
+
+
+def session_cues(actions, speed=1.0, repeat=1):
+    # each pass starts where the previous one's last action was
+    if not actions:
+        return []
+    period = actions[-1][0] / speed
+    return [Cue(n * period + at / speed, panel, command, args)
+            for n in range(repeat) for at, panel, command, args in actions]
+
+
+async def run_flat_out(runner, cues):
+    for cue in cues:
+        check_cue(type(runner.servers[cue.panel]), cue)
+    for i, cue in enumerate(cues, 1):
+        runner.fire(cue)
+        if i % YIELD_EVERY == 0:
+            await asyncio.sleep(0)
+
+
+async def replay(runner, cues, flat_out=False):
+    started = time.perf_counter()
+    if flat_out:
+        await run_flat_out(runner, cues)
+    else:
+        await runner.run(cues)
+    return time.perf_counter() - started
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded operator session")
+    parser.add_argument('session_file')
+    pace = parser.add_mutually_exclusive_group()
+    pace.add_argument('--speed', type=float, default=1.0, help="play N times faster than recorded")
+    pace.add_argument('--max', action='store_true', help="send as fast as possible")
+    parser.add_argument('--repeat', type=int, default=1, help="play the session this many times in a row")
+    parser.add_argument('--bind-port', type=int, default=0)
+    parser.add_argument('--group', action='store_true',
+                        help="send to all registered instances of each panel's server")
+    parser.add_argument('--robots', nargs='+', type=parse_robot, metavar='HOST:PORT',
+                        help="send to these robots")
+    parser.add_argument('--strategy', choices=STRATEGIES,
+                        help="how the registry picks between several instances of a server "
+                             "(default: $TALKSHOW_SELECTION or latest)")
+    args = parser.parse_args()
+    if args.speed <= 0:
+        parser.error("--speed must be positive")
+    if args.strategy:
+        get_registry_client().strategy = args.strategy
+
+    header, actions = load_session(args.session_file)
+    unknown = sorted({panel for at, panel, command, values in actions} - set(SESSION_PANELS))
+    if unknown:
+        parser.error(f"unknown panels in session: {', '.join(unknown)}")
+    cues = session_cues(actions, args.speed, args.repeat)
+    if not cues:
+        print("Empty session")
+        return
+
+    endpoint, servers = await connect(dict.fromkeys(cue.panel for cue in cues), args.bind_port, SESSION_PANELS,
+                                      group=args.group, robots=args.robots)
+    runner = CueRunner(servers)
+    print(f"Replaying {len(actions)} actions from {header.get('host', '?')} x{args.repeat}, "
+          + ("as fast as possible" if args.max else f"at {args.speed:g}x"))
+    try:
+        elapsed = await replay(runner, cues, flat_out=args.max)
+        await asyncio.sleep(0.1)
+    finally:
+        group_stats = endpoint.group_stats()
+        endpoint.close()
+        get_registry_client().close()
+
+    print(f"{runner.fired} actions in {elapsed:.2f} s, {runner.fired / elapsed:.0f}/s")
+    for member, stats in group_stats.items():
+        print(f"{member}: {stats['sent']} sent, {stats['errors']} failed")
+    if not args.max:
+        lateness = runner.scheduler.lateness
+        print(f"lateness p50 {lateness.percentile(50):.0f} us p99 {lateness.percentile(99):.0f} us "
+              f"max {lateness.max:.0f} us, {runner.scheduler.late} late")
+
+if __name__ == "__main__":
+    asyncio.run(main())
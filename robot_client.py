@@ -0,0 +1,47 @@
+from osc_fanout import FanOutSender
+from osc_journal import get_journal
+from osc_latency import TimedSender
+from osc_queue import OSCSendQueue
+from osc_reliable import ReliableSender
+from osc_sender import OSCSender
+from osc_tcp import OSCTCPSender
+
+
+def robot_group(members):
+    # A group of robots in the shape of one registry entry, so any OSCServer
+    # can take it as its robot_data; ip_address and port are the first
+    # member's, for the places that print where a panel is sending.
+    members = [dict(robot_data) for robot_data in members]
+    if not members:
+        raise ValueError("a robot group needs at least one member")
+    return {"ip_address": members[0]["ip_address"], "port": members[0]["port"], "members": members}
+
+
+def parse_robot(text):
+    # "host:port" as given on a command line
+    host, _, port = text.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"expected host:port, got {text!r}")
+    return {"ip_address": host, "port": int(port)}
+
+
+def make_robot_client(robot_data, dispatcher=None, reply_port=None):
+    # The client stack every OSCServer sends through, configured from the
+    # robot's registry entry. `dispatcher` receives whatever the robot sends
+    # back, over a TCP connection or as acks and latency echoes on
+    # `reply_port` (the GUI's bind port).
+    if "members" in robot_data:
+        return OSCSendQueue(FanOutSender(robot_data["members"], dispatcher=dispatcher), journal=get_journal())
+    features = robot_data.get("features", ())
+    if robot_data.get("transport") == "tcp":
+        sender = OSCTCPSender(robot_data["ip_address"], robot_data["port"], dispatcher=dispatcher)
+    else:
+        sender = OSCSender(robot_data["ip_address"], robot_data["port"], chunking="chunking" in features)
+    if "latency" in features and reply_port is not None:
+        sender = TimedSender(sender, reply_port)
+
+    client = OSCSendQueue(sender, journal=get_journal())
+    if ("reliable" in features and robot_data.get("transport") != "tcp"
+            and dispatcher is not None and reply_port is not None):
+        client = ReliableSender(client, reply_port, dispatcher)
+    return client
@@ -0,0 +1,94 @@
+import json
+import os
+import socket
+import time
+
+# Records what the operator sends: every OSCServer.send_* call a button or
+# popup makes, one JSON line each, so replay_session.py can play the show
+# back against a stand-in robot. Set TALKSHOW_RECORD to a directory and each
+# GUI (or panel_host.py) writes one session file there:
+#
+#   {"session": 1, "started": 1760000000.0, "host": "booth", "panels": ["chat"]}
+#   [0.0, "chat", "stop_chat_controller", [""]]
+#   [4.212, "chat", "start_monologue", [null]]
+#   [12.87, "producer", "say_this", ["Good evening"]]
+#
+# Times are seconds since the session started, on the monotonic clock.
+# Arguments that are not JSON (the Button a press passes along) become null.
+# Lines are written as they happen, so a crash keeps everything before it.
+RECORD_ENV = "TALKSHOW_RECORD"
+SESSION_VERSION = 1
+
+# sent by the GUI itself, not by the operator; replaying them would point
+# the robot's camera target updates at the recording machine
+NOT_RECORDED = frozenset(("client_data", "get_saved_camera_targets"))
+
+
+class SessionRecorder:
+    def __init__(self, path, panels=()):
+        self.path = path
+        self.recorded = 0
+        self._started = time.monotonic()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "w", buffering=1)
+        self._file.write(json.dumps({'session': SESSION_VERSION, 'started': time.time(),
+                                     'host': socket.gethostname(), 'panels': list(panels)}) + "\n")
+
+    def attach(self, panel, server):
+        # Instance attributes shadow the methods, so this has to run before
+        # the app binds its buttons to server.send_*, and after anything the
+        # app sends on its own at startup.
+        for name in dir(type(server)):
+            command = name[len("send_"):]
+            if name.startswith("send_") and command not in NOT_RECORDED:
+                setattr(server, name, self._wrap(panel, command, getattr(server, name)))
+
+    def _wrap(self, panel, command, method):
+        def recorded(*args):
+            self.record(panel, command, args)
+            return method(*args)
+        return recorded
+
+    def record(self, panel, command, args):
+        if self._file is None:
+            return
+        at = round(time.monotonic() - self._started, 3)
+        self._file.write(json.dumps([at, panel, command, list(args)], separators=(",", ":"),
+                                    default=lambda value: None) + "\n")
+        self.recorded += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def record_from_env(servers):
+    # servers: {panel: OSCServer}. Returns the recorder, or None when
+    # recording is off.
+    directory = os.environ.get(RECORD_ENV)
+    if not directory:
+        return None
+    path = os.path.join(directory, time.strftime("session-%Y%m%d-%H%M%S") + f"-{os.getpid()}.jsonl")
+    recorder = SessionRecorder(path, panels=servers)
+    for panel, server in servers.items():
+        recorder.attach(panel, server)
+    print(f"Recording operator actions to {path}")
+    return recorder
+
+
+def load_session(path):
+    # (header, [(at, panel, command, args), ...]); a line cut short by a
+    # crash ends the session
+    actions = []
+    with open(path) as f:
+        header = json.loads(f.readline())
+        if header.get('session') != SESSION_VERSION:
+            raise ValueError(f"{path}: not a version {SESSION_VERSION} session file")
+        for line in f:
+            try:
+                at, panel, command, args = json.loads(line)
+            except ValueError:
+                break
+            actions.append((at, panel, command, args))
+    return header, actions
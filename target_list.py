@@ -0,0 +1,133 @@
+from kivy.properties import NumericProperty
+from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.button import Button
+from kivy.uix.recyclelayout import RecycleLayout
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+
+
+class TargetRow(RecycleDataViewBehavior, BoxLayout):
+    # One visible camera target: look-at, delete and look-around buttons.
+    # Rows are recycled as the list scrolls, so the buttons hold no target;
+    # a press reports the row's current data index to the list.
+    def __init__(self, **kwargs):
+        kwargs.setdefault('orientation', 'horizontal')
+        super().__init__(**kwargs)
+        self.index = None
+        self.list_view = None
+        self.target_btn = Button(size_hint_x=0.5, on_press=lambda instance: self.press('look_at'))
+        self.delete_btn = Button(size_hint_x=0.25, on_press=lambda instance: self.press('delete'))
+        self.look_around_btn = Button(size_hint_x=0.25, on_press=lambda instance: self.press('look_around'))
+        self.add_widget(self.target_btn)
+        self.add_widget(self.delete_btn)
+        self.add_widget(self.look_around_btn)
+
+    def refresh_view_attrs(self, rv, index, data):
+        self.index = index
+        self.list_view = rv
+        self.target_btn.text = data['target']
+        self.delete_btn.text = rv.delete_text
+        self.look_around_btn.text = rv.look_around_text
+
+    def press(self, action):
+        if self.list_view is not None:
+            self.list_view.row_action(action, self.index)
+
+
+class UniformRows:
+    # Stands in for RecycleLayout.view_opts when every row has the same
+    # size: sizing dicts exist only for rows that have been on screen.
+    def __init__(self, count, template):
+        self.count = count
+        self.template = template
+        self._opts = {}
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        opt = self._opts.get(index)
+        if opt is None:
+            opt = self._opts[index] = self.template.copy()
+        return opt
+
+    def retain(self, indices):
+        self._opts = {index: self._opts[index] for index in indices if index in self._opts}
+
+
+class FixedRowLayout(RecycleLayout):
+    # Vertical layout manager for rows of one fixed height. RecycleBoxLayout
+    # builds sizing options and positions for every data item on each
+    # change; here both follow from the row index, so a data change or a
+    # scroll only costs work for the visible rows.
+    row_height = NumericProperty(44)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._laid_out = None
+        self.fbind('width', self._catch_layout_trigger)
+        self.fbind('row_height', self._catch_layout_trigger)
+
+    def _template(self):
+        return {'size': [self.width, self.row_height], 'size_hint': [None, None],
+                'size_hint_min': [None, None], 'size_hint_max': [None, None], 'pos': None,
+                'pos_hint': {}, 'viewclass': self.viewclass, 'width_none': False, 'height_none': False}
+
+    def compute_sizes_from_data(self, data, flags):
+        self.clear_layout()
+        self.view_opts = UniformRows(len(data), self._template())
+
+    def compute_layout(self, data, flags):
+        super().compute_layout(data, flags)
+        shape = (len(data), self.width, self.row_height)
+        if self._changed_views is None and shape == self._laid_out:
+            return
+        self._laid_out = shape
+        self.clear_layout()
+        self.view_opts = UniformRows(len(data), self._template())
+        self.height = len(data) * self.row_height
+
+    def compute_visible_views(self, data, viewport):
+        if not data:
+            return []
+        x, y, w, h = viewport
+        top = self.y + self.height
+        first = max(0, int((top - (y + h)) // self.row_height))
+        last = min(len(data) - 1, int((top - y) // self.row_height))
+        return list(range(first, last + 1))
+
+    def set_visible_views(self, indices, data, viewport):
+        super().set_visible_views(indices, data, viewport)
+        self.view_opts.retain(indices)
+
+    def refresh_view_layout(self, index, layout, view, viewport):
+        layout['size'] = [self.width, self.row_height]
+        layout['pos'] = (self.x, self.y + self.height - (index + 1) * self.row_height)
+        super().refresh_view_layout(index, layout, view, viewport)
+
+
+class TargetListView(RecycleView):
+    # Scrollable camera target list. Only the rows that fit in the viewport
+    # exist as widgets and `data` holds one small dict per target, so memory
+    # and layout stay flat whether there are ten targets or ten thousand.
+    def __init__(self, on_look_at, on_delete, on_look_around, row_height=44, delete_text="Delete",
+                 look_around_text="Relative Look Around", **kwargs):
+        super().__init__(**kwargs)
+        self.actions = {'look_at': on_look_at, 'delete': on_delete, 'look_around': on_look_around}
+        self.delete_text = delete_text
+        self.look_around_text = look_around_text
+        self.targets = []
+
+        self.add_widget(FixedRowLayout(row_height=row_height, size_hint_y=None))
+        # the layout manager only picks up viewclass once it is attached
+        self.viewclass = TargetRow
+
+    def update(self, targets):
+        targets = list(dict.fromkeys(targets))
+        if targets != self.targets:
+            self.targets = targets
+            self.data = [{'target': target} for target in targets]
+
+    def row_action(self, action, index):
+        if index is not None and index < len(self.targets):
+            self.actions[action](self.targets[index])
@@ -0,0 +1,47 @@
+from pythonosc.dispatcher import Dispatcher
+from camera_targets import ADDED_ADDRESS, REMOVED_ADDRESS, SNAPSHOT_ADDRESS, CameraTargets, map_target_handlers
+from osc_sender import build_datagram
+
+
+def receive(dispatcher, address, *args):
+    dispatcher.call_handlers_for_packet(build_datagram(address, list(args)), ("127.0.0.1", 9000))
+
+
+def test_deltas_apply_in_order_and_repeats_are_ignored():
+    dispatcher = Dispatcher()
+    targets = map_target_handlers(dispatcher, CameraTargets())
+    receive(dispatcher, SNAPSHOT_ADDRESS, 1, 10, "desk", "door")
+    receive(dispatcher, ADDED_ADDRESS, 1, 11, "window")
+    receive(dispatcher, REMOVED_ADDRESS, 1, 12, "desk")
+    receive(dispatcher, ADDED_ADDRESS, 1, 11, "window")
+    assert targets.names() == ["door", "window"]
+    assert targets.version == 12 and targets.resyncs == 0
+
+
+def test_a_gap_or_a_restart_asks_for_the_full_list_once():
+    requests = []
+    targets = CameraTargets(request_resync=lambda: requests.append(1))
+    targets.apply_delta(1, 1, added=["desk"])
+    assert requests == [1]
+
+    targets.replace(["desk"], 1, 1)
+    assert not targets.apply_delta(1, 3, added=["door"])
+    assert not targets.apply_delta(1, 4, added=["window"])
+    assert requests == [1, 1]
+    assert targets.names() == ["desk"]
+
+    targets.replace(["desk", "door", "window"], 1, 4)
+    assert not targets.apply_delta(2, 1, removed=["desk"])
+    assert len(requests) == 3
+
+
+def test_the_cache_restores_targets_and_version(tmp_path):
+    cache_file = str(tmp_path / "targets" / "robot.json")
+    targets = CameraTargets(cache_file=cache_file)
+    targets.replace(["desk", "door"], 3, 7)
+    targets.apply_delta(3, 8, added=["window"])
+
+    restored = CameraTargets(cache_file=cache_file)
+    assert restored.names() == ["desk", "door", "window"]
+    assert (restored.epoch, restored.version) == (3, 8)
+    assert restored.apply_delta(3, 9, removed=["door"])
@@ -0,0 +1,91 @@
+import json
+import threading
+import pytest
+import central_registry
+from registry_store import ServerTable
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(central_registry, "server_table", ServerTable())
+    monkeypatch.setattr(central_registry, "watch_slots", threading.BoundedSemaphore(1))
+    return central_registry.app.test_client()
+
+
+def test_watch_past_the_cap_is_answered_at_once(client):
+    client.post('/register', json={'server_name': "robot", 'ip_address': "10.0.0.1", 'port': 9000})
+    central_registry.watch_slots.acquire()
+    try:
+        body = client.get('/watch/robot', query_string={'version': 1, 'timeout': 30}).get_json()
+    finally:
+        central_registry.watch_slots.release()
+    assert body['retry_after'] == central_registry.WATCH_RETRY_AFTER
+    assert body['server'] == {'ip_address': "10.0.0.1", 'port': 9000}
+
+
+@pytest.mark.parametrize("path", ['/register', '/heartbeat', '/deregister'])
+@pytest.mark.parametrize("body", [None, [], ["robot"], "robot", 7])
+def test_bodies_that_are_not_objects_are_rejected(client, path, body):
+    response = client.post(path, data=json.dumps(body), content_type='application/json')
+    if path == '/register' and isinstance(body, list):
+        # a list is a batch registration, validated item by item
+        assert response.status_code == (400 if body else 200)
+    else:
+        assert response.status_code == 400
+
+
+@pytest.mark.parametrize("timeout", ["nan", "inf", "-inf", "-1"])
+def test_watch_timeout_must_be_finite_and_not_negative(client, timeout):
+    response = client.get('/watch/robot', query_string={'version': 5, 'timeout': timeout})
+    assert response.status_code == 400
+
+
+def test_batch_with_one_bad_registration_leaves_the_table_alone(client):
+    good = {'server_name': "ok", 'ip_address': "10.0.0.1", 'port': 9000}
+    for bad in ({'server_name': ["bad"], 'ip_address': "10.0.0.1", 'port': 9000},
+                {'server_name': "bad", 'ip_address': "10.0.0.1", 'port': 9000, 'instance_id': {"a": 1}},
+                {'server_name': "bad", 'ip_address': "10.0.0.1", 'port': 70000},
+                {'server_name': "bad", 'ip_address': "10.0.0.1", 'port': "9000"}):
+        response = client.post('/register', json=[good, bad])
+        assert response.status_code == 400
+        assert response.get_json()['index'] == 1
+    assert client.get('/servers/ok').status_code == 404
+
+
+@pytest.mark.parametrize("path, body", [
+    ('/heartbeat', {'server_name': ["x"], 'lease_id': "abc"}),
+    ('/heartbeat', {'server_name': "x", 'lease_id': "abc", 'instance_id': ["a"]}),
+    ('/deregister', {'server_name': {"x": 1}}),
+    ('/deregister', {'server_name': "x", 'instance_id': ["a"]}),
+])
+def test_names_that_are_not_strings_are_rejected(client, path, body):
+    assert client.post(path, json=body).status_code == 400
+
+
+def test_lookups_revalidate_with_the_etag(client):
+    client.post('/register', json={'server_name': "robot", 'ip_address': "10.0.0.1", 'port': 9000})
+    first = client.get('/servers/robot')
+    etag = first.headers['ETag']
+    assert first.status_code == 200
+    assert client.get('/servers/robot', headers={'If-None-Match': etag}).status_code == 304
+
+    client.post('/register', json={'server_name': "robot", 'ip_address': "10.0.0.1", 'port': 9001})
+    changed = client.get('/servers/robot', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.get_json()['port'] == 9001
+
+
+def test_batch_lookup_tag_covers_every_name(client):
+    client.post('/register', json=[{'server_name': "robot", 'ip_address': "10.0.0.1", 'port': 9000},
+                                   {'server_name': "camera", 'ip_address': "10.0.0.1", 'port': 9100}])
+    first = client.get('/servers', query_string={'names': "robot,camera"})
+    assert first.get_json() == {'robot': {'ip_address': "10.0.0.1", 'port': 9000},
+                                'camera': {'ip_address': "10.0.0.1", 'port': 9100}}
+    etag = first.headers['ETag']
+    assert client.get('/servers', query_string={'names': "robot,camera"},
+                      headers={'If-None-Match': etag}).status_code == 304
+
+    client.post('/deregister', json={'server_name': "camera"})
+    changed = client.get('/servers', query_string={'names': "robot,camera"}, headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.get_json()['camera'] is None
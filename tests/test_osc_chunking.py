@@ -0,0 +1,50 @@
+import zlib
+from pythonosc.dispatcher import Dispatcher
+from pythonosc.osc_message import OscMessage
+from pythonosc.osc_message_builder import OscMessageBuilder
+from osc_chunking import (CHUNK_ADDRESS, FLAG_ZLIB, MAX_MESSAGE_SIZE, ChunkReassembler, ChunkSplitter,
+                          map_chunk_handler)
+
+
+def feed_all(reassembler, chunks):
+    result = None
+    for chunk in chunks:
+        result = reassembler.feed(("127.0.0.1", 9000), *OscMessage(chunk).params) or result
+    return result
+
+
+def test_split_chunks_reassemble_to_the_datagram():
+    datagram = bytes(range(256)) * 40
+    assert feed_all(ChunkReassembler(), ChunkSplitter().split(datagram)) == datagram
+
+
+def test_huge_total_is_rejected_without_allocating():
+    reassembler = ChunkReassembler()
+    assert reassembler.feed(("127.0.0.1", 9000), 1, 0, 2 ** 31 - 1, 0, b"x") is None
+    assert reassembler.rejected == 1
+    assert not reassembler._partial
+
+
+def test_decompression_is_bounded():
+    bomb = zlib.compress(b"\x00" * (MAX_MESSAGE_SIZE * 4))
+    reassembler = ChunkReassembler()
+    assert reassembler.feed(("127.0.0.1", 9000), 1, 0, 1, FLAG_ZLIB, bomb) is None
+    assert reassembler.rejected == 1
+
+
+def test_truncated_zlib_stream_is_rejected():
+    reassembler = ChunkReassembler()
+    truncated = zlib.compress(bytes(range(256)) * 8)[:-6]
+    assert reassembler.feed(("127.0.0.1", 9000), 1, 0, 1, FLAG_ZLIB, truncated) is None
+    assert reassembler.rejected == 1
+
+
+def test_chunk_headers_that_are_not_ints_are_dropped():
+    dispatcher = Dispatcher()
+    reassembler = map_chunk_handler(dispatcher)
+    builder = OscMessageBuilder(CHUNK_ADDRESS)
+    for value in (1.0, 0.0, 2.0, 0.0):
+        builder.add_arg(value)
+    builder.add_arg(b"payload", OscMessageBuilder.ARG_TYPE_BLOB)
+    dispatcher.call_handlers_for_packet(builder.build().dgram, ("127.0.0.1", 9000))
+    assert not reassembler._partial
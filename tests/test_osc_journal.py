@@ -0,0 +1,59 @@
+import os
+import struct
+from pythonosc.parsing import osc_types
+from osc_chunking import ChunkSplitter, map_chunk_handler
+from osc_journal import INBOUND, OUTBOUND, JournalReader, OSCJournal
+from osc_latency import TIMED_PREFIX
+from osc_queue import BUNDLE_HEADER
+from osc_reliable import RELIABLE_PREFIX
+from osc_routing import RoutedDispatcher
+from osc_sender import build_datagram
+
+
+def reliable(datagram):
+    return RELIABLE_PREFIX + struct.pack(">iii", 7, 1, 9000) + osc_types.write_blob(datagram)
+
+
+def timed(datagram):
+    return TIMED_PREFIX + struct.pack(">qi", 123, 9000) + osc_types.write_blob(datagram)
+
+
+def bundle(*datagrams):
+    return BUNDLE_HEADER + b"".join(struct.pack(">i", len(part)) + part for part in datagrams)
+
+
+def test_commands_are_found_inside_reliable_and_timed_envelopes(tmp_path):
+    say = build_datagram("/say_this", ["Good evening"])
+    transition = build_datagram("/transition_next_segment", [])
+    path = str(tmp_path / "show.journal")
+    journal = OSCJournal(path)
+    journal.record(OUTBOUND, reliable(timed(say)))
+    journal.record(OUTBOUND, bundle(timed(transition), reliable(timed(say))))
+    journal.record(INBOUND, build_datagram("/ack", [7, 1]))
+    journal.close()
+
+    reader = JournalReader(path)
+    try:
+        found = list(reader.records(address="/say_this"))
+        assert [record.packet for record in found] == [say, say]
+        assert [record.address for record in reader.records()] == [
+            "/say_this", "/transition_next_segment", "/say_this", "/ack"]
+    finally:
+        reader.close()
+
+
+def test_a_chunked_inbound_message_is_recorded_once(tmp_path):
+    path = str(tmp_path / "show.journal")
+    journal = OSCJournal(path)
+    dispatcher = RoutedDispatcher(journal=journal)
+    map_chunk_handler(dispatcher)
+    say = build_datagram("/play_audio", [os.urandom(4000)])
+    for chunk in ChunkSplitter().split(say):
+        dispatcher.call_handlers_for_packet(chunk, ("127.0.0.1", 9000))
+    journal.close()
+
+    reader = JournalReader(path)
+    try:
+        assert [record.packet for record in reader.records()] == [say]
+    finally:
+        reader.close()
@@ -0,0 +1,44 @@
+from pythonosc.dispatcher import Dispatcher
+from osc_latency import (LatencyHistogram, TimedSender, bucket_index, bucket_upper, map_echo_handler,
+                         map_timed_handler)
+from osc_sender import OSCEncoder
+
+
+def test_buckets_hold_their_values_within_about_three_percent():
+    for value in list(range(200)) + [1000, 4097, 65535, 65536, 1234567, 59999999]:
+        upper = bucket_upper(bucket_index(value))
+        assert value <= upper <= value * 1.032
+        assert bucket_index(upper) == bucket_index(value)
+
+
+def test_percentiles_of_a_uniform_run():
+    histogram = LatencyHistogram()
+    for value in range(1, 10001):
+        histogram.record(value)
+    assert histogram.count == 10000 and histogram.min == 1 and histogram.max == 10000
+    for p, expected in ((50, 5000), (90, 9000), (99, 9900)):
+        assert expected <= histogram.percentile(p) <= expected * 1.032
+    assert histogram.percentile(100) == 10000
+    assert histogram.mean() == 5000.5
+
+
+def test_small_values_are_exact_and_outliers_are_clamped():
+    histogram = LatencyHistogram(max_value=1000)
+    for value in (3, 3, 7, -5, 5000):
+        histogram.record(value)
+    assert histogram.percentile(50) == 3
+    assert histogram.min == 0
+    assert histogram.percentile(100) == histogram.max == 1000
+    assert LatencyHistogram().percentile(99) == 0
+
+
+def test_echoes_are_recorded_per_address():
+    gui, robot = Dispatcher(), Dispatcher()
+    tracker = map_echo_handler(gui)
+    map_timed_handler(robot, lambda datagram, address: gui.call_handlers_for_packet(datagram, address))
+    sender = TimedSender(OSCEncoder(), reply_port=9001)
+    for address in ("/say_this", "/say_this", "/look_around"):
+        robot.call_handlers_for_packet(sender.encode(address, "x"), ("127.0.0.1", 5000))
+
+    assert {address: h.count for address, h in tracker.histograms.items()} == {'/say_this': 2, '/look_around': 1}
+    assert tracker.summary()[0][:2] == ("/say_this", 2)
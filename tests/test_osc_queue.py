@@ -0,0 +1,76 @@
+import asyncio
+from pythonosc.osc_bundle import OscBundle
+from osc_queue import MAX_BUNDLE_SIZE, OSCSendQueue
+from osc_sender import OSCEncoder
+
+
+class RecordingSender(OSCEncoder):
+    def __init__(self):
+        super().__init__()
+        self.sent = []
+
+    def send_datagram(self, datagram):
+        self.sent.append(datagram)
+
+    def close(self):
+        pass
+
+
+def drain(commands):
+    sender = RecordingSender()
+    queue = OSCSendQueue(sender, bundle=False)
+    for address, value in commands:
+        queue._pending.append((address, value))
+    queue.flush()
+    return sender.sent, queue.coalesced, [sender.encode(address, value) for address, value in commands]
+
+
+def test_back_to_back_duplicates_are_dropped():
+    sent, coalesced, encoded = drain([("/look_at_camera_target", "A"), ("/look_at_camera_target", "A"),
+                                      ("/stay_on_topic", []), ("/stay_on_topic", [])])
+    assert sent == [encoded[0], encoded[2]]
+    assert coalesced == 2
+
+
+def test_repeat_after_another_target_is_kept():
+    sent, coalesced, encoded = drain([("/look_at_camera_target", "A"), ("/look_at_camera_target", "B"),
+                                      ("/look_at_camera_target", "A")])
+    assert sent == encoded
+    assert coalesced == 0
+
+
+def test_toggle_keeps_its_final_state():
+    sent, coalesced, encoded = drain([("/enable_manual_listen_mode", []), ("/disable_manual_listen_mode", []),
+                                      ("/enable_manual_listen_mode", [])])
+    assert sent == encoded
+    assert coalesced == 0
+
+
+def test_a_burst_is_packed_into_bundles_that_fit():
+    sender = RecordingSender()
+    queue = OSCSendQueue(sender)
+    said = [f"line {n} " + "x" * 100 for n in range(40)]
+    for text in said:
+        queue._pending.append(("/say_this", text))
+    queue.flush()
+
+    assert 1 < len(sender.sent) < len(said)
+    assert all(len(packet) <= MAX_BUNDLE_SIZE for packet in sender.sent)
+    unpacked = [message.params[0] for packet in sender.sent for message in OscBundle(packet)]
+    assert unpacked == said
+
+
+async def send_from_a_callback(queue, sender):
+    queue.send_message("/say_this", "one")
+    queue.send_message("/stay_on_topic", [])
+    before = list(sender.sent)
+    await asyncio.sleep(0)
+    return before, sender.sent
+
+
+def test_sends_wait_for_the_next_loop_iteration():
+    sender = RecordingSender()
+    queue = OSCSendQueue(sender)
+    before, after = asyncio.run(send_from_a_callback(queue, sender))
+    assert before == []
+    assert len(after) == 1 and after[0].startswith(b"#bundle")
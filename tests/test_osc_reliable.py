@@ -0,0 +1,66 @@
+import asyncio
+import struct
+from pythonosc.dispatcher import Dispatcher
+from pythonosc.parsing import osc_types
+from osc_reliable import RELIABLE_PREFIX, DuplicateFilter, ReliableSender, map_reliable_handler
+from osc_sender import OSCEncoder, build_datagram
+
+
+class RecordingClient(OSCEncoder):
+    def __init__(self):
+        super().__init__()
+        self.sent = []
+
+    def send_datagram(self, datagram):
+        self.sent.append(datagram)
+
+    def close(self):
+        pass
+
+
+async def send_encoded(addresses, datagram):
+    client = RecordingClient()
+    sender = ReliableSender(client, 9000, Dispatcher())
+    sender.send_encoded(addresses, datagram)
+    in_flight = len(sender._in_flight)
+    sender.close()
+    return client.sent, in_flight
+
+
+def test_bundle_with_a_reliable_command_is_sent_in_the_envelope():
+    bundle = b"#bundle\x00" + bytes(8) + bytes(12)
+    sent, in_flight = asyncio.run(send_encoded(["/look_around", "/say_this"], bundle))
+    assert len(sent) == 1 and sent[0].startswith(RELIABLE_PREFIX) and sent[0].endswith(bundle)
+    assert in_flight == 1
+
+
+def test_bundle_without_one_goes_out_as_it_is():
+    bundle = b"#bundle\x00" + bytes(8) + bytes(12)
+    sent, in_flight = asyncio.run(send_encoded(["/look_around"], bundle))
+    assert sent == [bundle]
+    assert in_flight == 0
+
+
+def test_duplicate_filter_takes_late_packets_once_and_forgets_old_ones():
+    duplicates = DuplicateFilter(span=8)
+    session = ("10.0.0.1", 7)
+    assert [duplicates.accept(session, seq) for seq in (1, 3, 2, 3, 1)] == [True, True, True, False, False]
+    assert duplicates.accept(("10.0.0.1", 8), 3)
+    for seq in range(4, 40):
+        duplicates.accept(session, seq)
+    # too old to tell apart from a repeat
+    assert not duplicates.accept(session, 30)
+    assert len(duplicates._sessions[session][1]) <= 2 * duplicates.span
+
+
+def test_repeats_are_acknowledged_every_time_and_handled_once():
+    dispatcher = Dispatcher()
+    handled, acks = [], []
+    dispatcher.map("/say_this", lambda address, *args: handled.append(args))
+    map_reliable_handler(dispatcher, lambda datagram, address: acks.append(address))
+    envelope = (RELIABLE_PREFIX + struct.pack(">iii", 7, 1, 9001)
+                + osc_types.write_blob(build_datagram("/say_this", ["Good evening"])))
+    for _ in range(3):
+        dispatcher.call_handlers_for_packet(envelope, ("10.0.0.1", 5000))
+    assert handled == [("Good evening",)]
+    assert acks == [("10.0.0.1", 9001)] * 3
@@ -0,0 +1,42 @@
+import socket
+import pytest
+from osc_sender import OSCEncoder, OSCSender, build_datagram
+
+
+@pytest.mark.parametrize("address, value, args", [
+    ("/stop_chat_controller", None, []),
+    ("/stop_chat_controller", "", [""]),
+    ("/say_this", "Good evening", ["Good evening"]),
+    ("/record_camera_target", ["desk", "wide"], ["desk", "wide"]),
+    ("/look_at_camera_target", ["desk", 2, 0.5], ["desk", 2, 0.5]),
+])
+def test_encoded_datagrams_match_the_message_builder(address, value, args):
+    encoder = OSCEncoder()
+    # twice: the second call comes from the cache
+    assert encoder.encode(address, value) == build_datagram(address, args)
+    assert encoder.encode(address, value) == build_datagram(address, args)
+
+
+def test_constant_commands_are_encoded_once():
+    encoder = OSCEncoder()
+    assert encoder.encode("/look_around", []) is encoder.encode("/look_around", None)
+    assert encoder.encode("/new_address", ()) is encoder.encode("/new_address", ())
+
+
+def test_sender_follows_a_retarget():
+    first, second = socket.socket(socket.AF_INET, socket.SOCK_DGRAM), socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    for receiver in (first, second):
+        receiver.bind(("127.0.0.1", 0))
+        receiver.settimeout(1)
+    sender = OSCSender("127.0.0.1", first.getsockname()[1])
+    try:
+        sender.send_message("/say_this", "one")
+        sender.retarget("127.0.0.1", second.getsockname()[1])
+        sender.send_message("/say_this", "two")
+        assert first.recv(1024) == build_datagram("/say_this", ["one"])
+        assert second.recv(1024) == build_datagram("/say_this", ["two"])
+        assert sender.sent == 2
+    finally:
+        sender.close()
+        first.close()
+        second.close()
@@ -0,0 +1,67 @@
+import asyncio
+from osc_sender import build_datagram
+from osc_tcp import SLIP_END, OSCTCPSender, SlipDecoder, slip_encode
+
+AWKWARD = [b"\xc0", b"\xdb", b"\xdb\xdc", b"\xdb\xdd", b"a\xc0b\xdbc", bytes(range(256))]
+
+
+def test_slip_frames_round_trip_fed_a_byte_at_a_time():
+    stream = b"".join(slip_encode(packet) for packet in AWKWARD)
+    decoder = SlipDecoder()
+    frames = []
+    for n in range(len(stream)):
+        frames.extend(decoder.feed(stream[n:n + 1]))
+    assert frames == AWKWARD
+
+
+def test_slip_decoder_splits_one_read_and_skips_empty_frames():
+    stream = SLIP_END * 3 + b"".join(slip_encode(packet) for packet in AWKWARD) + slip_encode(b"tail")[:-1]
+    decoder = SlipDecoder()
+    assert decoder.feed(stream) == AWKWARD
+    assert decoder.feed(SLIP_END) == [b"tail"]
+
+
+async def send_over_tcp(datagrams):
+    received = []
+    done = asyncio.Event()
+
+    async def collect(reader, writer):
+        decoder = SlipDecoder()
+        while len(received) < len(datagrams):
+            received.extend(decoder.feed(await reader.read(4096)))
+        done.set()
+        writer.close()
+
+    server = await asyncio.start_server(collect, "127.0.0.1", 0)
+    sender = OSCTCPSender("127.0.0.1", server.sockets[0].getsockname()[1])
+    for datagram in datagrams:
+        sender.send_datagram(datagram)
+    await asyncio.wait_for(done.wait(), 2)
+    sender.close()
+    server.close()
+    return received
+
+
+async def connects_to_a_server_that_hangs_up(seconds):
+    accepted = []
+
+    async def hang_up(reader, writer):
+        accepted.append(1)
+        writer.close()
+
+    server = await asyncio.start_server(hang_up, "127.0.0.1", 0)
+    sender = OSCTCPSender("127.0.0.1", server.sockets[0].getsockname()[1])
+    await asyncio.sleep(seconds)
+    sender.close()
+    server.close()
+    return len(accepted)
+
+
+def test_reconnects_back_off_when_the_peer_hangs_up_at_once():
+    # 0.25 + 0.5 + 1.0 s of backoff fit in 1.5 s; without it, hundreds of connects
+    assert asyncio.run(connects_to_a_server_that_hangs_up(1.5)) <= 4
+
+
+def test_packets_sent_before_the_connection_arrive_framed():
+    datagrams = [build_datagram("/say_this", ["Good evening"]), build_datagram("/look_around", []), b"\xc0\xdb"]
+    assert asyncio.run(send_over_tcp(datagrams)) == datagrams
@@ -0,0 +1,98 @@
+import asyncio
+import central_registry
+from registry_client import RegistryClient
+from registry_store import ROUND_ROBIN, ServerTable
+
+A = {'ip_address': "10.0.0.1", 'port': 9000}
+B = {'ip_address': "10.0.0.2", 'port': 9000}
+
+
+class TableClient(RegistryClient):
+    # answers /watch from a ServerTable in this process, without waiting
+    def __init__(self, table, cache_file, **kwargs):
+        super().__init__("http://registry.invalid", cache_file=cache_file, **kwargs)
+        self.table = table
+
+    def _watch_once(self, server_name, version):
+        if version and version >= self.table.entry_version(server_name):
+            raise OSError("no change")
+        version, server, endpoints = self.table.watch(server_name, version, 0, self.strategy, self.client_id)
+        return {'version': version, 'server': server, 'endpoints': endpoints}
+
+
+async def watch_moves(client, table, change=None):
+    moves = []
+    task = asyncio.ensure_future(client.watch("robot", moves.append))
+    await asyncio.sleep(0.05)
+    if change is not None:
+        change(table)
+        await asyncio.sleep(0.6)
+    task.cancel()
+    client.close()
+    return moves
+
+
+def test_balanced_pick_survives_the_first_watch_poll(tmp_path):
+    table = ServerTable()
+    table.register("robot", A, instance_id="a")
+    table.register("robot", B, instance_id="b")
+    client = TableClient(table, str(tmp_path / "cache.json"), strategy=ROUND_ROBIN)
+    client._store("robot", A)
+
+    assert asyncio.run(watch_moves(client, table)) == []
+
+
+def test_balanced_pick_moves_when_its_instance_goes(tmp_path):
+    table = ServerTable()
+    table.register("robot", A, instance_id="a")
+    table.register("robot", B, instance_id="b")
+    client = TableClient(table, str(tmp_path / "cache.json"), strategy=ROUND_ROBIN)
+    client._store("robot", A)
+
+    moves = asyncio.run(watch_moves(client, table, lambda t: t.deregister("robot", instance_id="a")))
+    assert moves == [B]
+
+
+class FlaskResponse:
+    def __init__(self, response):
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.json = response.get_json
+
+    def raise_for_status(self):
+        assert self.status_code < 400
+
+
+class FlaskSession:
+    # stands in for requests.Session, answering from the registry app in this process
+    def __init__(self):
+        self.app = central_registry.app.test_client()
+        self.statuses = []
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        response = self.app.get(url.replace("http://registry.invalid", ""), query_string=params, headers=headers)
+        self.statuses.append(response.status_code)
+        return FlaskResponse(response)
+
+    def close(self):
+        pass
+
+
+async def refresh_three_times(client, table):
+    first = await client.refresh("robot")
+    second = await client.refresh("robot")
+    table.register("robot", B)
+    third = await client.refresh("robot")
+    client.close()
+    return first, second, third
+
+
+def test_refresh_revalidates_with_the_etag(tmp_path, monkeypatch):
+    table = ServerTable()
+    table.register("robot", A)
+    monkeypatch.setattr(central_registry, "server_table", table)
+    client = RegistryClient("http://registry.invalid", cache_file=str(tmp_path / "cache.json"))
+    client._session = session = FlaskSession()
+
+    assert asyncio.run(refresh_three_times(client, table)) == (A, A, B)
+    assert session.statuses == [200, 304, 200]
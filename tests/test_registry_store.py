@@ -0,0 +1,115 @@
+import time
+import pytest
+from registry_store import LATEST, LEAST_LOADED, ROUND_ROBIN, STICKY, RegistryJournal, ServerTable, TimingWheel
+
+
+def restart(directory):
+    table = ServerTable()
+    table.attach_journal(RegistryJournal(str(directory)))
+    return table
+
+
+def test_registrations_after_a_torn_line_survive_the_next_restart(tmp_path):
+    table = restart(tmp_path)
+    table.register("a", {'ip_address': "10.0.0.1", 'port': 1})
+    table._journal.close()
+    with open(tmp_path / "journal.log", "a") as f:
+        f.write('{"op":"regis')
+
+    table = restart(tmp_path)
+    table.register("b", {'ip_address': "10.0.0.1", 'port': 2})
+    table.register("c", {'ip_address': "10.0.0.1", 'port': 3})
+    table._journal.close()
+
+    table = restart(tmp_path)
+    assert sorted(table._servers) == ["a", "b", "c"]
+    table._journal.close()
+
+
+def test_timing_wheel_fires_a_deadline_in_its_slot_and_parks_far_ones():
+    wheel = TimingWheel(tick=1.0, slots=8, now=0)
+    wheel.add("soon", 3.5)
+    wheel.add("far", 20)
+    assert wheel.advance(3) == []
+    assert wheel.advance(4) == ["soon"]
+    # past one rotation: handed back at the last slot for the caller to re-add
+    assert wheel.advance(7) == ["far"]
+
+
+def test_leases_expire_unless_renewed():
+    table = ServerTable(tick=0.05)
+    start = time.monotonic()
+    lease = table.register("robot", {'ip_address': "10.0.0.1", 'port': 1}, ttl=0.2)
+    table.register("camera", {'ip_address': "10.0.0.1", 'port': 2}, ttl=1000)
+    table.register("registry", {'ip_address': "10.0.0.1", 'port': 3})
+
+    time.sleep(0.15)
+    assert table.renew("robot", lease) == 0.2
+    assert table.renew("robot", "someone-else") is None
+    # the first deadline has passed, the renewed one has not
+    assert table.expire_due(start + 0.25) == []
+    assert table.expire_due(time.monotonic() + 0.25) == [("robot", "default")]
+    assert table.get("robot") is None
+
+    # many turns of the wheel away
+    assert table.expire_due(start + 600) == []
+    assert table.expire_due(start + 1001) == [("camera", "default")]
+    assert sorted(table._servers) == ["registry"]
+
+
+def test_latest_picks_the_newest_registration_and_unknown_strategies_fail():
+    table = ServerTable()
+    table.register("robot", {'ip_address': "10.0.0.1", 'port': 1}, instance_id="a")
+    table.register("robot", {'ip_address': "10.0.0.2", 'port': 2}, instance_id="b")
+    assert table.select("robot", LATEST)['port'] == 2
+    assert table.select("camera", ROUND_ROBIN) is None
+    with pytest.raises(ValueError):
+        table.select("robot", "random")
+
+
+def test_sticky_only_moves_the_clients_of_a_removed_instance():
+    table = ServerTable()
+    for n, instance_id in enumerate("abc"):
+        table.register("robot", {'ip_address': "10.0.0.1", 'port': n}, instance_id=instance_id)
+    clients = [f"gui-{n}" for n in range(300)]
+    before = {client: table.select("robot", STICKY, client)['port'] for client in clients}
+    table.deregister("robot", instance_id="c")
+    after = {client: table.select("robot", STICKY, client)['port'] for client in clients}
+    assert all(after[client] == port for client, port in before.items() if port != 2)
+    assert 2 not in after.values()
+
+
+def test_sticky_splits_clients_in_proportion_to_weight():
+    table = ServerTable()
+    table.register("robot", {'ip_address': "10.0.0.1", 'port': 1, 'weight': 1}, instance_id="a")
+    table.register("robot", {'ip_address': "10.0.0.2", 'port': 2, 'weight': 2}, instance_id="b")
+    picks = [table.select("robot", STICKY, f"gui-{n}")['port'] for n in range(6000)]
+    assert 1.8 < picks.count(2) / picks.count(1) < 2.2
+    # the same client always gets the same instance
+    assert table.select("robot", STICKY, "gui-7") == table.select("robot", STICKY, "gui-7")
+
+
+def test_watch_does_not_advance_the_round_robin():
+    table = ServerTable()
+    table.register("robot", {'ip_address': "10.0.0.1", 'port': 1}, instance_id="a")
+    table.register("robot", {'ip_address': "10.0.0.2", 'port': 2}, instance_id="b")
+    for _ in range(3):
+        version, server, endpoints = table.watch("robot", 0, 0, ROUND_ROBIN)
+        assert server['port'] == 1
+    picks = [table.select("robot", ROUND_ROBIN)['port'] for _ in range(4)]
+    assert picks == [1, 2, 1, 2]
+
+
+def test_least_loaded_follows_reported_load_and_rotates_ties():
+    table = ServerTable()
+    lease_a = table.register("robot", {'ip_address': "10.0.0.1", 'port': 1}, ttl=30, instance_id="a")
+    lease_b = table.register("robot", {'ip_address': "10.0.0.2", 'port': 2}, ttl=30, instance_id="b")
+    # nothing reported yet: take turns instead of piling onto the first
+    assert [table.select("robot", LEAST_LOADED)['port'] for _ in range(4)] == [1, 2, 1, 2]
+
+    table.renew("robot", lease_a, instance_id="a", load=40)
+    table.renew("robot", lease_b, instance_id="b", load=5)
+    assert {table.select("robot", LEAST_LOADED)['port'] for _ in range(4)} == {2}
+
+    table.renew("robot", lease_b, instance_id="b", load=90)
+    assert {table.select("robot", LEAST_LOADED)['port'] for _ in range(4)} == {1}
@@ -0,0 +1,56 @@
+import time
+from kivy.clock import Clock
+from osc_latency import LatencyHistogram
+
+
+class UIUpdateQueue:
+    # Hand-off from network callbacks to the widgets. post() records the
+    # latest update per key and arms one Clock trigger; the trigger runs
+    # before the next frame is drawn and applies whatever is pending, so a
+    # burst of messages costs one widget update per key per frame. Nothing
+    # runs before the Kivy loop is ticking, so posting before the app is up
+    # is safe.
+    def __init__(self):
+        self._pending = {}
+        self._trigger = Clock.create_trigger(self.drain, -1)
+        self.posted = 0
+        self.coalesced = 0
+        self.drains = 0
+        self.max_depth = 0
+        self.drain_time = LatencyHistogram()
+
+    def post(self, key, callback, *args):
+        if key in self._pending:
+            self.coalesced += 1
+            # re-queued at the end: updates apply in the order of their latest post
+            del self._pending[key]
+        self._pending[key] = (callback, args)
+        self.posted += 1
+        self.max_depth = max(self.max_depth, len(self._pending))
+        self._trigger()
+
+    @property
+    def depth(self):
+        return len(self._pending)
+
+    def drain(self, dt=None):
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        start = time.perf_counter()
+        for callback, args in pending.values():
+            callback(*args)
+        self.drains += 1
+        self.drain_time.record((time.perf_counter() - start) * 1e6)
+
+    def stats(self):
+        return {
+            'depth': self.depth,
+            'max_depth': self.max_depth,
+            'posted': self.posted,
+            'coalesced': self.coalesced,
+            'drains': self.drains,
+            'drain_p50_us': self.drain_time.percentile(50),
+            'drain_p99_us': self.drain_time.percentile(99),
+            'drain_max_us': self.drain_time.max,
+        }